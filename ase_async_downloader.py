@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Asyncio Engine
+Runs the same navigation as ase_universal_downloader on top of aiohttp:
+
+1. Load the main page
+2. Faculty postback
+3. Program/year postback
+4. One postback per obligatory subject
+
+Parsing, file naming and the output folder layout are shared with the
+requests-based engine, so both engines produce exactly the same files.
+A single event loop can drive many navigations and downloads at once
+without a thread per job.
+
+USAGE:
+    python ase_universal_downloader.py --engine async --workers 4
+
+or from code:
+    import ase_async_downloader
+    result = ase_async_downloader.run_download(logger, workers=4)
+"""
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+import ase_universal_downloader as downloader
+from ase_events import BytesReceived, PhaseFinished, PhaseStarted, SubjectCompleted
+from ase_storage import Manifest, PDFSink
+from ase_transport import FORM_CONTENT_TYPE, RETRY_STATUSES, CircuitOpenError, backoff_delay, parse_retry_after
+
+
+def create_async_session():
+    """Create an aiohttp session with the same browser headers as the sync engine"""
+    # unsafe=True keeps cookies for IP-address hosts too (local mirrors/tests)
+    timeout = aiohttp.ClientTimeout(sock_connect=downloader.HTTP_CONNECT_TIMEOUT,
+                                    sock_read=downloader.HTTP_READ_TIMEOUT)
+    return aiohttp.ClientSession(headers=downloader.HEADERS, timeout=timeout,
+                                 cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+def record_outcome(status):
+    """Feed one response (or None for a failed request) to the shared circuit breaker"""
+    breaker = downloader.get_circuit_breaker()
+    if status is None or status in RETRY_STATUSES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+async def send(http, method, url, data=None):
+    """Rate-limited request with the retry policy of ASESession; returns the response
+
+    Every request of this engine is a GET or a postback that only navigates
+    or downloads, so all of them are idempotent and retried up to
+    HTTP_RETRIES times on connection errors, timeouts, 429 and 5xx, with the
+    same full-jitter backoff. data is either a dict or a PostbackClient body
+    (bytes). Use the response as an async context manager.
+    """
+    logger = logging.getLogger(__name__)
+    headers = {'Content-Type': FORM_CONTENT_TYPE} if isinstance(data, bytes) else None
+    rate_limiter = downloader.get_rate_limiter()
+    attempt = 0
+    while True:
+        downloader.get_circuit_breaker().check()
+        wait = rate_limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        start = time.monotonic()
+        try:
+            response = await http.request(method, url, data=data, headers=headers)
+        except aiohttp.ClientError as e:
+            rate_limiter.record(time.monotonic() - start)
+            record_outcome(None)
+            if isinstance(e, aiohttp.ClientConnectionError) and attempt < downloader.HTTP_RETRIES:
+                attempt += 1
+                await wait_retry(method, url, attempt, type(e).__name__, logger)
+                continue
+            if attempt:
+                logger.error(f"{method} {url} failed after {attempt} retries: {e}")
+            raise
+
+        rate_limiter.record(time.monotonic() - start, response.status,
+                            parse_retry_after(response.headers.get('Retry-After')))
+        record_outcome(response.status)
+        if response.status in RETRY_STATUSES and attempt < downloader.HTTP_RETRIES:
+            response.release()
+            attempt += 1
+            await wait_retry(method, url, attempt, f"HTTP {response.status}", logger)
+            continue
+        if attempt:
+            logger.info(f"{method} {url}: HTTP {response.status} after {attempt} retries")
+        return response
+
+async def wait_retry(method, url, attempt, reason, logger):
+    delay = backoff_delay(attempt, downloader.HTTP_BACKOFF_BASE, downloader.HTTP_BACKOFF_MAX)
+    logger.warning(f"{method} {url}: {reason}, retry {attempt}/{downloader.HTTP_RETRIES} in {delay:.1f}s")
+    await asyncio.sleep(delay)
+
+async def fetch(http, method, url, data=None):
+    """Perform a rate-limited request and return (status, body bytes, decoded HTML)"""
+    async with await send(http, method, url, data) as response:
+        try:
+            body = await response.read()
+        except aiohttp.ClientError:
+            record_outcome(None)
+            raise
+        return response.status, body, downloader.decode_html(body, response.headers.get('Content-Type'))
+
+async def fetch_step(http, phase, method, url, data=None):
+    """fetch() measured as one navigation phase"""
+    with downloader.get_metrics().timer(phase) as measurement:
+        status, body, html = await fetch(http, method, url, data)
+        measurement.status = status
+        measurement.bytes = len(body)
+    return status, html
+
+def parse_step(phase, html):
+    """parse_html() measured as one parse phase"""
+    with downloader.get_metrics().timer(phase):
+        return downloader.parse_html(html)
+
+async def navigate_to_subjects_async(http, logger):
+    """Navigate through the website to find subjects (async version)
+
+    Publishes the 'navigate' phase events around reach_subjects_page_async.
+    """
+    downloader.publish_progress(PhaseStarted('navigate'))
+    soup = None
+    try:
+        soup = await reach_subjects_page_async(http, logger)
+        return soup
+    finally:
+        downloader.publish_progress(PhaseFinished('navigate', soup is not None))
+
+async def reach_subjects_page_async(http, logger):
+    """Load the main, faculty and subjects pages in turn"""
+
+    # Step 1: Load main page
+    logger.info("Step 1: Loading main page...")
+    status, html = await fetch_step(http, 'navigate.main', 'GET', downloader.BASE_URL)
+    downloader.save_debug_page("main_page", html, logger)
+    if status != 200:
+        logger.error("Failed to load website")
+        downloader.report_debug_error(logger)
+        return None
+
+    soup = parse_step('parse.main', html)
+    logger.info("Main page loaded successfully")
+
+    # Step 2: Find and select faculty
+    client = downloader.postback_client(soup)
+    if not client:
+        logger.error("No form found on main page")
+        return None
+
+    faculty_param = downloader.find_faculty(soup, logger)
+    if not faculty_param:
+        downloader.report_debug_error(logger)
+        return None
+
+    status, html = await fetch_step(http, 'navigate.faculty', 'POST', client.action,
+                                    client.body('GridView1', faculty_param))
+    downloader.save_debug_page("faculty_programs", html, logger)
+    if status != 200:
+        logger.error("Faculty selection failed")
+        downloader.report_debug_error(logger)
+        return None
+
+    soup = parse_step('parse.faculty', html)
+    logger.info("Faculty selected successfully")
+
+    # Step 3: Find and select program/year
+    client = downloader.postback_client(soup)
+    if not client:
+        logger.error("No form found on programs page")
+        return None
+
+    year_param = downloader.find_program_and_year(soup, logger)
+    if not year_param:
+        downloader.report_debug_error(logger)
+        return None
+
+    status, html = await fetch_step(http, 'navigate.program', 'POST', client.action,
+                                    client.body('GridView1', year_param))
+    downloader.save_debug_page("subjects_page", html, logger)
+    if status != 200:
+        logger.error("Year selection failed")
+        downloader.report_debug_error(logger)
+        return None
+
+    soup = parse_step('parse.subjects', html)
+    logger.info(f"Successfully reached {downloader.USER_CONFIG['target_year']} subjects page!")
+
+    return soup
+
+async def download_subject_async(http, subject, client, logger, manifest=None, sync=False, journal=None):
+    """Download a single subject PDF into its semester folder (async version)
+
+    client is the PostbackClient of the subjects page; only its action and
+    encoded bodies are used.
+    """
+    if journal:
+        await asyncio.to_thread(journal.record_start, downloader.subject_relpath(subject))
+
+    # Timed like the sync engine: rate limiter wait and retries included
+    metrics = downloader.get_metrics()
+    with metrics.timer('download') as measurement:
+        response = await send(http, 'POST', client.action, client.body(subject['target'], subject['argument']))
+        async with response:
+            try:
+                measurement.status = response.status
+                body = None
+                if response.status == 200 and downloader.is_html(response.headers.get('Content-Type')):
+                    body = await response.read()
+                    if not body.startswith(b'%PDF'):
+                        # A page instead of the PDF
+                        measurement.status = 'page'
+                        measurement.bytes = len(body)
+                        html = downloader.decode_html(body, response.headers.get('Content-Type'))
+                        downloader.save_debug_page("download_page", html, logger)
+                        downloader.update_from_page(client, subject, html, logger)
+                if response.status == 200 and (body is None or body.startswith(b'%PDF')):
+                    result = await stream_pdf(response, subject,
+                                              downloader.sync_baseline(manifest, subject, sync), body)
+                    if result:
+                        measurement.bytes = result.size
+                        metrics.record('write', result.write_seconds, result.size if result.written else 0)
+                        if manifest is not None:
+                            manifest.record(downloader.subject_relpath(subject), subject, result)
+                        if journal:
+                            await asyncio.to_thread(journal.record_done, downloader.subject_relpath(subject), result)
+                        downloader.log_saved(subject, result, logger)
+                        return True
+                    measurement.status = 'not_pdf'
+            except aiohttp.ClientError:
+                # The body broke off after the response was counted as a success
+                record_outcome(None)
+                raise
+
+    logger.error(f"Download failed for {subject['name']}")
+    downloader.report_debug_error(logger)
+    return False
+
+async def stream_pdf(response, subject, compare_sha256=None, body=None):
+    """Stream a PDF response into its semester folder through a PDFSink
+
+    body is the already read response body, if any. Returns a StreamResult,
+    or None if the body is not a PDF.
+    """
+    chunk_size = downloader.DOWNLOAD_CHUNK_SIZE
+    slots = get_chunk_slots()
+    sink = PDFSink(lambda: downloader.subject_filepath(subject)[2], compare_sha256=compare_sha256,
+                   store=downloader.get_blob_store(), budget=downloader.get_byte_budget())
+    total = downloader.content_length(response.headers)
+    try:
+        if body is not None:
+            downloader.publish_progress(BytesReceived(subject, len(body), total))
+            return await in_executor(sink.finish) if await in_executor(sink.feed, body) else None
+        received = 0
+        while True:
+            async with slots:
+                chunk = await response.content.read(chunk_size)
+                if not chunk:
+                    break
+                received += len(chunk)
+                downloader.publish_progress(BytesReceived(subject, received, total))
+                # Spooling to disk, hashing and the store copy would block the event loop
+                if not await in_executor(sink.feed, chunk):
+                    return None
+        return await in_executor(sink.finish)
+    except BaseException:
+        sink.abort()
+        raise
+
+async def in_executor(function, *args):
+    """Run a blocking PDFSink call in the default executor
+
+    If the caller is cancelled, the call is still awaited before the
+    cancellation goes on, so sink.abort() never runs alongside it.
+    """
+    future = asyncio.get_running_loop().run_in_executor(None, function, *args)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+_chunk_slots = None
+
+def get_chunk_slots():
+    """Semaphore that caps in-flight download bytes (MAX_INFLIGHT_BYTES) for the event loop"""
+    global _chunk_slots
+    loop = asyncio.get_running_loop()
+    if _chunk_slots is None or _chunk_slots[0] is not loop:
+        slots = max(1, downloader.MAX_INFLIGHT_BYTES // downloader.DOWNLOAD_CHUNK_SIZE)
+        _chunk_slots = (loop, asyncio.Semaphore(slots))
+    return _chunk_slots[1]
+
+async def download_pdfs_async(http, subjects, soup, logger, cancel_check=None, workers=None, sync=None):
+    """Download all PDFs organized by semester (async version)
+
+    Mirrors downloader.download_pdfs: worker 1 reuses the navigated session,
+    every other worker opens its own session and navigates to the same
+    subjects page before taking subjects from the shared queue.
+    """
+    sync = downloader.SYNC_MODE if sync is None else sync
+    manifest = Manifest.load(downloader.DOWNLOAD_DIR)
+    for subject in subjects:
+        manifest.mark_seen(downloader.subject_relpath(subject))
+    store = downloader.get_blob_store()
+    store_before = store.snapshot() if store else None
+    journal, remaining = await asyncio.to_thread(downloader.open_journal, subjects, logger, manifest)
+    resumed = len(subjects) - len(remaining)
+
+    workers = max(1, min(workers or downloader.DOWNLOAD_WORKERS,
+                         downloader.MAX_DOWNLOAD_WORKERS, len(remaining) or 1))
+    downloader.get_rate_limiter().scale(workers, downloader.RATE_LIMIT_MAX_TOTAL)
+    if workers > 1:
+        logger.info(f"Starting downloads with {workers} parallel workers...")
+    else:
+        logger.info("Starting downloads...")
+
+    pending = asyncio.Queue()
+    for subject in remaining:
+        pending.put_nowait(subject)
+
+    state = {'started': 0, 'success': resumed, 'canceled': False}
+
+    def is_canceled():
+        if cancel_check and cancel_check():
+            if not state['canceled']:
+                state['canceled'] = True
+                logger.warning("Download canceled by user")
+            return True
+        return False
+
+    async def run_worker(worker_id, worker_http, worker_soup):
+        client = downloader.postback_client(worker_soup)
+        if not client:
+            logger.error(f"Worker {worker_id}: no form found on subjects page")
+            return
+        while not is_canceled():
+            try:
+                subject = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            state['started'] += 1
+            suffix = f" (worker {worker_id})" if workers > 1 else ""
+            logger.info(f"Downloading {state['started']}/{len(remaining)}: {subject['name']} "
+                        f"[{subject.get('semester', 'Unknown')}]{suffix}")
+
+            success = False
+            try:
+                success = await download_subject_async(worker_http, subject, client, logger, manifest, sync, journal)
+                if success:
+                    state['success'] += 1
+            except CircuitOpenError as e:
+                # Not attempted: the subject stays pending for the next run
+                success = None
+                logger.error(f"{e} - worker {worker_id} stopping, the next run resumes the remaining downloads")
+                return
+            except Exception as e:
+                logger.error(f"Error downloading {subject['name']}: {e}")
+            finally:
+                if success is not None:
+                    downloader.publish_progress(SubjectCompleted(subject, success))
+
+    async def worker(worker_id):
+        if worker_id == 1:
+            await run_worker(worker_id, http, soup)
+            return
+
+        async with create_async_session() as worker_http:
+            worker_soup = await navigate_to_subjects_async(worker_http, logger)
+            if not worker_soup:
+                logger.error(f"Worker {worker_id} could not reach the subjects page, leaving its share to the others")
+                return
+            await run_worker(worker_id, worker_http, worker_soup)
+
+    downloader.publish_progress(PhaseStarted('download', len(remaining)))
+    finished = False
+    try:
+        await asyncio.gather(*(worker(worker_id) for worker_id in range(1, workers + 1)))
+        if not state['canceled'] and state['success'] == len(subjects):
+            await asyncio.to_thread(journal.finish)
+        finished = not state['canceled']
+    finally:
+        journal.close()
+        downloader.publish_progress(PhaseFinished('download', finished))
+
+    await asyncio.to_thread(downloader.finish_manifest, manifest, logger, state['canceled'])
+    downloader.log_store_summary(store_before, logger)
+    return state['success']
+
+async def run_download_async(logger, cancel_check=None, workers=None, sync=None):
+    """Run the full pipeline for downloader.USER_CONFIG
+
+    Returns (success_count, subjects), or None if navigation failed.
+    """
+    async with create_async_session() as http:
+        soup = await navigate_to_subjects_async(http, logger)
+        if not soup:
+            logger.error("Failed to navigate to subjects page")
+            return None
+
+        subjects = downloader.find_obligatory_subjects(soup, logger)
+        if not subjects:
+            logger.error("No obligatory subjects found")
+            return 0, subjects
+
+        if cancel_check and cancel_check():
+            return 0, subjects
+
+        success_count = await download_pdfs_async(http, subjects, soup, logger,
+                                                  cancel_check=cancel_check, workers=workers, sync=sync)
+        return success_count, subjects
+
+def run_download(logger, cancel_check=None, workers=None, sync=None):
+    """Blocking entry point for the CLI and the GUI worker thread"""
+    return asyncio.run(run_download_async(logger, cancel_check=cancel_check, workers=workers, sync=sync))
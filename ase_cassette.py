@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Traffic Cassettes
+Records every request/response pair of a run into a single zip archive
+and replays it later without touching the network:
+
+- record: RecordingAdapter sends requests normally and stores each
+  response (status, headers, full body including PDFs) in the cassette
+- replay: ReplayAdapter answers every request from the cassette, so the
+  whole pipeline (navigation, parsing, downloads) runs offline at CPU speed
+
+Archive layout (zip):
+    cassette.json     version, metadata and the ordered interactions
+    bodies/<sha256>   response bodies, stored once per distinct content
+
+Requests are matched on method, URL and the ASP.NET event fields of the
+body (__EVENTTARGET/__EVENTARGUMENT), never on __VIEWSTATE. Repeated
+requests are answered with their recorded responses in order.
+
+USAGE:
+    python ase_universal_downloader.py --record traffic.zip
+    python ase_universal_downloader.py --replay traffic.zip
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from urllib.parse import unquote_plus
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CASSETTE_VERSION = 1
+INDEX_NAME = "cassette.json"
+
+# Describe the transfer, not the stored body (which is already decoded)
+SKIPPED_HEADERS = frozenset(['content-encoding', 'content-length', 'transfer-encoding', 'connection'])
+
+EVENT_FIELD = re.compile(rb'(?:^|&)(__EVENTTARGET|__EVENTARGUMENT)=([^&]*)')
+
+
+class CassetteMissError(requests.ConnectionError):
+    """Raised during replay for a request the cassette has no response for"""
+
+def request_key(method, url, body=None):
+    """Match key of a request: method, URL and the postback event fields"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    fields = {}
+    if body:
+        for name, value in EVENT_FIELD.findall(body):
+            fields[name.decode('ascii')] = unquote_plus(value.decode('ascii', errors='replace'))
+    return [method.upper(), url, fields.get('__EVENTTARGET', ''), fields.get('__EVENTARGUMENT', '')]
+
+class Cassette:
+    """One zip archive of recorded traffic, opened for 'record' or 'replay'
+
+    Recording writes to <path>.part and only renames it to path in close(),
+    so an interrupted recording never replaces a good cassette.
+    """
+
+    def __init__(self, path, mode):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.meta = {}
+        self.interactions = []
+        self._lock = threading.Lock()
+
+        if mode == 'record':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._zip = zipfile.ZipFile(path + '.part', 'w', zipfile.ZIP_DEFLATED)
+            self._bodies = set()
+        else:
+            self._zip = zipfile.ZipFile(path, 'r')
+            index = json.loads(self._zip.read(INDEX_NAME))
+            if index.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version: {index.get('version')}")
+            self.meta = index.get('meta', {})
+            self.interactions = index['interactions']
+            # Responses per request key, served in recorded order
+            self._queues = {}
+            for interaction in self.interactions:
+                self._queues.setdefault(tuple(interaction['key']), []).append(interaction)
+            self._served = {}
+
+    def record(self, request, response):
+        """Store one request/response pair (response.content is read here)"""
+        body = response.content
+        sha = hashlib.sha256(body).hexdigest()
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in SKIPPED_HEADERS}
+        with self._lock:
+            if sha not in self._bodies:
+                self._zip.writestr(f"bodies/{sha}", body)
+                self._bodies.add(sha)
+            self.interactions.append({
+                'key': request_key(request.method, request.url, request.body),
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': headers,
+                'body': sha,
+                'size': len(body),
+            })
+
+    def play(self, request):
+        """Return (interaction, body bytes) for a request, or raise CassetteMissError"""
+        key = tuple(request_key(request.method, request.url, request.body))
+        with self._lock:
+            recorded = self._queues.get(key)
+            if not recorded:
+                raise CassetteMissError(f"No recorded response for {key[0]} {key[1]} "
+                                        f"{key[2]} {key[3]}".rstrip())
+            position = self._served.get(key, 0)
+            self._served[key] = position + 1
+            # Once the recorded responses run out, keep answering with the last one
+            interaction = recorded[min(position, len(recorded) - 1)]
+            body = self._zip.read(f"bodies/{interaction['body']}")
+        return interaction, body
+
+    def close(self):
+        """Finish the archive (writing the index when recording)"""
+        with self._lock:
+            if self._zip is None:
+                return
+            if self.mode == 'record':
+                index = {
+                    'version': CASSETTE_VERSION,
+                    'created': datetime.now().isoformat(timespec='seconds'),
+                    'meta': self.meta,
+                    'interactions': self.interactions,
+                }
+                self._zip.writestr(INDEX_NAME, json.dumps(index, indent=1, ensure_ascii=False))
+                self._zip.close()
+                os.replace(self.path + '.part', self.path)
+            else:
+                self._zip.close()
+            self._zip = None
+
+    def summary(self):
+        """One-line description for the log"""
+        total = sum(interaction['size'] for interaction in self.interactions)
+        return (f"{len(self.interactions)} responses, {total // 1024} KB of bodies "
+                f"({len({i['body'] for i in self.interactions})} distinct)")
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter that copies every response into a cassette
+
+    Streamed responses are read completely first; iter_content then
+    replays the buffered body, so callers are unaffected.
+    """
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.cassette.record(request, response)
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers every request from a cassette"""
+
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        interaction, body = self.cassette.play(request)
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction.get('reason')
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(0)
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
+
+def install(session, cassette, pool_size=10):
+    """Mount the cassette adapter matching cassette.mode on a requests session"""
+    if cassette.mode == 'record':
+        adapter = RecordingAdapter(cassette, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    else:
+        adapter = ReplayAdapter(cassette)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Catalog Crawler
+Builds the faculty/program/year index from the website itself instead of
+the hand-kept FACULTY_CONFIGS:
+
+1. Load the main page and read every faculty row
+2. Post back to each faculty page (in parallel, bounded by CATALOG_WORKERS
+   and CATALOG_MAX_PAGES)
+3. Read every program row: name, year range, study form and the postback
+   argument of each study year link
+
+The result is written to a versioned JSON catalog that the GUI loads at
+startup and refreshes in the background.
+
+USAGE:
+    python ase_catalog.py [--workers 4] [--output catalog.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from datetime import datetime
+
+import ase_universal_downloader as downloader
+from ase_storage import AtomicFileWriter
+
+CATALOG_VERSION = 1
+
+# Postback argument prefix of each study year link (see find_program_and_year)
+YEAR_PREFIXES = {'unu': 'Anul I', 'doi': 'Anul II', 'trei': 'Anul III', 'patru': 'Anul IV'}
+
+FACULTY_LINK = re.compile(r"'GridView1','(plan\$\d+)'")
+YEAR_LINK = re.compile(r"'GridView1','((unu|doi|trei|patru)\$\d+)'")
+STUDY_YEARS = re.compile(r'(?<!\d)(\d{4}-\d{4})(?!\d)')
+
+
+def catalog_path():
+    """Default location of the catalog file"""
+    return os.path.join(downloader.BASE_DOWNLOAD_DIR, "_cache", "catalog.json")
+
+def row_label(cells):
+    """Text of the first plain cell of a row (no links, not a year range)
+
+    Kept exactly as the page renders it, so it matches the substring checks
+    in find_faculty and find_program_and_year.
+    """
+    for cell in cells:
+        text = cell.get_text().strip()
+        if text and not cell.find('a', href=True) and not STUDY_YEARS.fullmatch(text):
+            return text
+    return None
+
+def parse_faculties(soup):
+    """Faculty rows of the main page as [{'name', 'argument'}]"""
+    faculties = []
+    seen = set()
+    for row in soup.find_all('tr'):
+        cells = row.find_all(['td', 'th'], recursive=False)
+        for link in row.find_all('a', href=True):
+            match = FACULTY_LINK.search(link.get('href', ''))
+            if match:
+                name = row_label(cells)
+                if name and match.group(1) not in seen:
+                    seen.add(match.group(1))
+                    faculties.append({'name': name, 'argument': match.group(1)})
+                break
+    return faculties
+
+def parse_programs(soup):
+    """Program rows of a faculty page
+
+    Every entry holds the program name, year range, study form, whether it
+    is an English-taught variant and the postback argument of each study
+    year link, e.g. {'Anul I': 'unu$12', ...}.
+    """
+    programs = []
+    for row in soup.find_all('tr'):
+        years = {}
+        for link in row.find_all('a', href=True):
+            match = YEAR_LINK.search(link.get('href', ''))
+            if match:
+                years.setdefault(YEAR_PREFIXES[match.group(2)], match.group(1))
+        if not years:
+            continue
+
+        row_text = row.get_text()
+        normalized = downloader.remove_diacritics(row_text).upper().replace('Ţ', 'T').replace('Ş', 'S')
+        study_years = STUDY_YEARS.search(row_text)
+        name = row_label(row.find_all(['td', 'th'], recursive=False))
+        if not name or not study_years:
+            continue
+
+        programs.append({
+            'name': name,
+            'study_years': study_years.group(1),
+            'study_form': 'DISTANTA' if 'DISTANTA' in normalized else 'FRECVENTA',
+            'english': 'ENGLEZA' in normalized or 'ENGLISH' in normalized,
+            'years': {year: years[year] for year in YEAR_PREFIXES.values() if year in years},
+        })
+    return programs
+
+def page_soup(response):
+    """Soup of a catalog page response, or None"""
+    if response.status_code != 200:
+        return None
+    return downloader.parse_html(downloader.response_html(response))
+
+def fetch_page(session, url):
+    """Load one catalog page and return its soup, or None"""
+    return page_soup(session.get(url))
+
+def crawl_catalog(logger, workers=None, max_pages=None):
+    """Walk every faculty on the site and return the catalog dict, or None
+
+    Worker 1 reuses the session that loaded the main page; every other
+    worker opens its own session, like download_pdfs_concurrent. All of them
+    share the process-wide rate limiter, and no more than max_pages pages
+    are fetched in total.
+    """
+    workers = max(1, min(workers or downloader.CATALOG_WORKERS, downloader.MAX_DOWNLOAD_WORKERS))
+    max_pages = max_pages or downloader.CATALOG_MAX_PAGES
+
+    logger.info("Catalog: loading main page...")
+    session = downloader.create_session()
+    main_soup = fetch_page(session, downloader.BASE_URL)
+    if not main_soup:
+        logger.error("Catalog: failed to load the main page")
+        return None
+
+    faculties = parse_faculties(main_soup)
+    if not faculties:
+        logger.error("Catalog: no faculties found on the main page")
+        return None
+    workers = min(workers, len(faculties))
+    logger.info(f"Catalog: found {len(faculties)} faculties, crawling with {workers} workers...")
+
+    pending = queue.Queue()
+    for faculty in faculties:
+        pending.put(faculty)
+
+    lock = threading.Lock()
+    state = {'pages': 1, 'failed': 0}
+
+    def take_page():
+        """Reserve one page from the budget"""
+        with lock:
+            if state['pages'] >= max_pages:
+                return False
+            state['pages'] += 1
+            return True
+
+    def worker(worker_id):
+        worker_session, worker_soup = session, main_soup
+        if worker_id > 1:
+            if not take_page():
+                return
+            worker_session = downloader.create_session()
+            try:
+                worker_soup = fetch_page(worker_session, downloader.BASE_URL)
+            except Exception as e:
+                logger.error(f"Catalog: worker {worker_id} could not load the main page: {e}")
+                return
+            if not worker_soup:
+                logger.error(f"Catalog: worker {worker_id} could not load the main page")
+                return
+
+        # Every faculty is posted back from the same main page form
+        client = downloader.postback_client(worker_soup, worker_session)
+        while client:
+            try:
+                faculty = pending.get_nowait()
+            except queue.Empty:
+                return
+            if not take_page():
+                logger.warning(f"Catalog: page budget of {max_pages} reached, skipping {faculty['name']}")
+                with lock:
+                    state['failed'] += 1
+                continue
+
+            try:
+                # Catalog postbacks only navigate, so they are safe to retry
+                soup = page_soup(client.post('GridView1', faculty['argument'], idempotent=True))
+                if soup:
+                    faculty['programs'] = parse_programs(soup)
+                    logger.info(f"Catalog: {faculty['name']} - {len(faculty['programs'])} programs")
+                else:
+                    logger.error(f"Catalog: failed to load {faculty['name']}")
+                    with lock:
+                        state['failed'] += 1
+            except Exception as e:
+                logger.error(f"Catalog: error reading {faculty['name']}: {e}")
+                with lock:
+                    state['failed'] += 1
+
+    threads = [threading.Thread(target=worker, args=(worker_id,), daemon=True)
+               for worker_id in range(1, workers + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    crawled = [faculty for faculty in faculties if faculty.get('programs')]
+    logger.info(f"Catalog: {len(crawled)}/{len(faculties)} faculties crawled in {state['pages']} page loads")
+    if state['failed'] or not crawled:
+        # A partial catalog would hide faculties from the GUI, keep the old one
+        logger.error(f"Catalog: {state['failed'] or len(faculties)} faculties could not be read")
+        return None
+
+    return {
+        'version': CATALOG_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'source': downloader.BASE_URL,
+        'faculties': faculties,
+    }
+
+def save_catalog(catalog, path=None):
+    """Write the catalog atomically"""
+    path = path or catalog_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with AtomicFileWriter(path) as writer:
+        writer.write(json.dumps(catalog, indent=2, ensure_ascii=False).encode('utf-8'))
+        writer.commit()
+
+def load_catalog(path=None):
+    """Read the catalog file, or None if it is missing, damaged or of another version"""
+    try:
+        with open(path or catalog_path(), 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if catalog.get('version') != CATALOG_VERSION or not catalog.get('faculties'):
+        return None
+    return catalog
+
+def catalog_age(catalog):
+    """Seconds since the catalog was generated"""
+    try:
+        generated = datetime.fromisoformat(catalog['generated'])
+    except (KeyError, TypeError, ValueError):
+        return float('inf')
+    return (datetime.now() - generated).total_seconds()
+
+def refresh_catalog(logger, path=None, workers=None):
+    """Crawl the site and save the catalog; returns it, or None on failure"""
+    catalog = crawl_catalog(logger, workers=workers)
+    if catalog:
+        save_catalog(catalog, path)
+        logger.info(f"Catalog saved to: {path or catalog_path()}")
+    return catalog
+
+def program_language(program):
+    """'english' for an English-taught program entry, otherwise 'romanian'"""
+    return 'english' if program.get('english') else 'romanian'
+
+def catalog_faculty_configs(catalog):
+    """Convert a catalog into the FACULTY_CONFIGS shape used by the GUI
+
+    The faculty name exactly as shown on the site is its keyword. Besides the
+    year ranges of each program, every config keeps the faculty's postback
+    argument and the program variants (study form, language and the
+    arguments of the study year links), so year ranges can be offered per
+    study form and navigation can post back straight to the catalog's links.
+    """
+    configs = {}
+    for faculty in catalog['faculties']:
+        programs = {}
+        variants = {}
+        for program in faculty.get('programs', []):
+            years = programs.setdefault(program['name'], [])
+            if program['study_years'] not in years:
+                years.append(program['study_years'])
+            variants.setdefault(program['name'], []).append({
+                'study_years': program['study_years'],
+                'study_form': program['study_form'],
+                'language': program_language(program),
+                'years': program['years'],
+            })
+        if programs:
+            configs[faculty['name']] = {
+                'keywords': [faculty['name']],
+                'argument': faculty.get('argument'),
+                'programs': {name: sorted(years) for name, years in programs.items()},
+                'variants': variants,
+            }
+    return configs
+
+def program_years(faculty_config, program, study_form):
+    """Year ranges of a program offered in one study form
+
+    Hand-kept configs have no variants, so every year range is returned.
+    """
+    variants = faculty_config.get('variants', {}).get(program)
+    if variants is None:
+        return faculty_config['programs'].get(program, [])
+    return sorted({variant['study_years'] for variant in variants if variant['study_form'] == study_form})
+
+def find_variant(faculty_config, program, study_years, study_form, language):
+    """Catalog entry of a program matching the selection, or None
+
+    A variant taught in the selected language is preferred; otherwise the
+    first one with the same year range and study form is used.
+    """
+    matches = [variant for variant in faculty_config.get('variants', {}).get(program, [])
+               if variant['study_years'] == study_years and variant['study_form'] == study_form]
+    for variant in matches:
+        if variant['language'] == language:
+            return variant
+    return matches[0] if matches else None
+
+def catalog_arguments(faculty_config, program, study_years, study_form, language, target_year):
+    """Postback arguments of the catalog for a selection, as USER_CONFIG keys
+
+    Returns {} for hand-kept configs or when the catalog has no such link;
+    navigation then searches the pages by keywords as before.
+    """
+    arguments = {}
+    if faculty_config.get('argument'):
+        arguments['faculty_argument'] = faculty_config['argument']
+    variant = find_variant(faculty_config, program, study_years, study_form, language)
+    if variant and target_year in variant['years']:
+        arguments['year_argument'] = variant['years'][target_year]
+    return arguments
+
+def main():
+    """Crawl the catalog from the command line"""
+    parser = argparse.ArgumentParser(description="Crawl the ASE faculty/program/year catalog")
+    parser.add_argument('--workers', type=int, default=downloader.CATALOG_WORKERS,
+                        help=f"parallel faculty page loads (default: {downloader.CATALOG_WORKERS})")
+    parser.add_argument('--output', default=None, help=f"catalog file (default: {catalog_path()})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    catalog = refresh_catalog(logging.getLogger(__name__), path=args.output, workers=args.workers)
+    if not catalog:
+        print("Catalog crawl failed, see the log above.")
+        return
+    programs = sum(len(faculty['programs']) for faculty in catalog['faculties'])
+    print(f"Catalog: {len(catalog['faculties'])} faculties, {programs} programs")
+
+if __name__ == "__main__":
+    main()
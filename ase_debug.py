@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Debug Capture
+Keeps copies of fetched pages in _debug for troubleshooting, off the
+critical path between postbacks:
+
+- modes: 'off', 'on_error' (the latest pages are held in memory and only
+  written when error() is called) or 'always'
+- pages are gzip'd and written atomically by a background thread
+- retention: captures older than max_age, and the oldest ones beyond
+  max_bytes in total, are pruned after every write
+"""
+
+import gzip
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from ase_storage import AtomicFileWriter
+
+DEBUG_MODES = ('off', 'on_error', 'always')
+
+# Pages waiting for the writer; beyond this, captures are dropped rather
+# than blocking a download
+QUEUE_SIZE = 32
+
+
+class DebugCapture:
+    """Background, bounded page capture into one directory
+
+    Args:
+        directory: Folder for the captures (created on the first write)
+        mode: One of DEBUG_MODES
+        max_bytes: Total size kept in the folder
+        max_age: Seconds a capture is kept
+        buffer_pages: Pages held in memory in 'on_error' mode
+    """
+
+    def __init__(self, directory, mode='always', max_bytes=50 * 1024 * 1024, max_age=14 * 24 * 3600,
+                 buffer_pages=8, logger=None):
+        if mode not in DEBUG_MODES:
+            raise ValueError(f"Debug capture mode must be one of {', '.join(DEBUG_MODES)}")
+        self.directory = directory
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.logger = logger or logging.getLogger(__name__)
+        self.dropped = 0
+        self._buffer = deque(maxlen=buffer_pages)
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._sequence = itertools.count()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def capture(self, prefix, html):
+        """Keep a page according to the mode; never blocks on disk I/O"""
+        if self.mode == 'off':
+            return
+        item = (prefix, datetime.now(), html)
+        if self.mode == 'always':
+            self._submit(item)
+        else:
+            with self._lock:
+                self._buffer.append(item)
+
+    def error(self):
+        """Something failed: write the pages held in 'on_error' mode
+
+        Returns the number of pages queued.
+        """
+        with self._lock:
+            items = list(self._buffer)
+            self._buffer.clear()
+        for item in items:
+            self._submit(item)
+        return len(items)
+
+    def flush(self):
+        """Wait until every queued page is written"""
+        self._queue.join()
+
+    def _submit(self, item):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="debug-capture", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            self.logger.debug(f"Debug capture queue full, dropped {item[0]} page")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                path = self._write(*item)
+                self.logger.debug(f"Debug page saved to: {path}")
+                self.prune()
+            except Exception as e:
+                self.logger.warning(f"Could not save debug page: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, prefix, captured, html):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{prefix}_{captured.strftime('%Y%m%d_%H%M%S')}_{next(self._sequence):04d}.html.gz"
+        path = os.path.join(self.directory, name)
+        with AtomicFileWriter(path) as writer:
+            writer.write(gzip.compress(html.encode('utf-8'), compresslevel=6))
+            writer.commit()
+        return path
+
+    def prune(self):
+        """Delete captures older than max_age, then the oldest beyond max_bytes
+
+        Plain .html files left by older versions are pruned the same way.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.is_file() and entry.name.endswith(('.html.gz', '.html'))]
+        except FileNotFoundError:
+            return 0
+        captures = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries),
+                          reverse=True)
+
+        removed = 0
+        total = 0
+        now = time.time()
+        for mtime, size, path in captures:
+            total += size
+            if now - mtime > self.max_age or total > self.max_bytes:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Progress Events
+Typed progress events published by the downloader, so the GUI and the CLI
+render progress from data instead of parsing log lines:
+
+- PhaseStarted / PhaseFinished: 'navigate' (reaching the subjects page)
+  and 'download' (total = subjects to download)
+- SubjectDiscovered: a subject found on the subjects page
+- BytesReceived: bytes of one PDF received so far (total from
+  Content-Length, None when the server does not send it)
+- SubjectCompleted: one subject finished, successfully or not
+
+ProgressChannel delivers events synchronously on the publishing thread, so
+subscribers must be quick (store the event, update counters).
+ProgressTracker is such a subscriber: it folds the events into a snapshot
+with throughput and an ETA, which any thread may read.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+
+PhaseStarted = namedtuple('PhaseStarted', ['phase', 'total'], defaults=[None])
+PhaseFinished = namedtuple('PhaseFinished', ['phase', 'ok'])
+SubjectDiscovered = namedtuple('SubjectDiscovered', ['subject', 'count'])
+BytesReceived = namedtuple('BytesReceived', ['subject', 'received', 'total'])
+SubjectCompleted = namedtuple('SubjectCompleted', ['subject', 'ok'])
+
+
+class ProgressChannel:
+    """Publishes progress events to subscribed callbacks"""
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self._subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Call callback(event) for every published event; returns callback"""
+        with self._lock:
+            self._subscribers = self._subscribers + (callback,)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not callback)
+
+    @property
+    def active(self):
+        """Whether anyone listens (lets publishers skip building events)"""
+        return bool(self._subscribers)
+
+    def publish(self, event):
+        # The tuple is replaced, never mutated, so no lock is needed to read it
+        for callback in self._subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                self.logger.debug(f"Progress subscriber failed on {type(event).__name__}: {e}")
+
+def subject_key(subject):
+    """Identity of a subject within a run (its postback argument)"""
+    return subject['argument']
+
+class ProgressTracker:
+    """Running totals of a download phase, with throughput and ETA"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Phases can nest (a worker re-navigating during the download phase)
+        self.active = Counter()
+        self.discovered = 0
+        self._reset(0)
+
+    def _reset(self, total):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.bytes = 0
+        self.completed_bytes = 0
+        self.started = time.monotonic()
+        self.in_flight = {}
+        self.current = None
+
+    def __call__(self, event):
+        with self._lock:
+            if isinstance(event, PhaseStarted):
+                self.active[event.phase] += 1
+                if event.phase == 'download':
+                    self._reset(event.total or 0)
+            elif isinstance(event, PhaseFinished):
+                self.active[event.phase] = max(0, self.active[event.phase] - 1)
+            elif isinstance(event, SubjectDiscovered):
+                self.discovered = event.count
+            elif isinstance(event, BytesReceived):
+                key = subject_key(event.subject)
+                previous = self.in_flight.get(key, (0, None))[0]
+                self.bytes += event.received - previous
+                self.in_flight[key] = (event.received, event.total)
+                self.current = (event.subject['name'], event.received, event.total)
+            elif isinstance(event, SubjectCompleted):
+                received = self.in_flight.pop(subject_key(event.subject), (0, None))[0]
+                self.completed += 1
+                if event.ok:
+                    self.completed_bytes += received
+                else:
+                    self.failed += 1
+                if self.current and self.current[0] == event.subject['name']:
+                    self.current = None
+
+    def snapshot(self):
+        """Dict of phase, discovered, completed, total, failed, bytes,
+        rate (bytes/s), eta (seconds, None until it can be estimated) and
+        current (name, received, total) of the latest file in progress"""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            rate = self.bytes / elapsed if elapsed > 0 else 0.0
+            phase = next((name for name in ('download', 'navigate') if self.active[name]), None)
+            return {
+                'phase': phase,
+                'discovered': self.discovered,
+                'completed': self.completed,
+                'total': self.total,
+                'failed': self.failed,
+                'bytes': self.bytes,
+                'rate': rate,
+                'eta': self._eta(rate),
+                'current': self.current,
+            }
+
+    def _eta(self, rate):
+        """Remaining bytes (average size of the PDFs so far) over measured throughput"""
+        succeeded = self.completed - self.failed
+        if not succeeded or rate <= 0:
+            return None
+        remaining = max(0, self.total - self.completed)
+        in_flight = sum(received for received, _ in self.in_flight.values())
+        remaining_bytes = max(0.0, remaining * self.completed_bytes / succeeded - in_flight)
+        return remaining_bytes / rate
+
+def format_bytes(size):
+    """Human-readable size, e.g. 512 B, 340 KB, 2.4 MB"""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def format_eta(seconds):
+    """ETA as m:ss or h:mm:ss ('?' when unknown)"""
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def describe(snapshot):
+    """One-line progress text, e.g. '5/40 PDFs, 2.1 MB at 350 KB/s, ETA 1:40'"""
+    text = (f"{snapshot['completed']}/{snapshot['total']} PDFs, {format_bytes(snapshot['bytes'])} "
+            f"at {format_bytes(int(snapshot['rate']))}/s, ETA {format_eta(snapshot['eta'])}")
+    if snapshot['failed']:
+        text += f", {snapshot['failed']} failed"
+    return text
+
+def describe_file(current):
+    """Byte progress of one file, e.g. 'Econometrie: 1.2 MB / 3.4 MB'"""
+    name, received, total = current
+    if total:
+        return f"{name}: {format_bytes(received)} / {format_bytes(total)}"
+    return f"{name}: {format_bytes(received)}"
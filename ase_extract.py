@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Field Extraction
+Turns downloaded fișe into a table, one row per PDF:
+
+1. Walk the semester folders (Semestrul_I, Semestrul_II...) of one or more
+   download folders
+2. Look every PDF up by its SHA-256 (from manifest.json when the size still
+   matches) in the extraction cache, _cache/extract.json.gz
+3. Extract the text of the remaining PDFs in a process pool (one worker per
+   core by default) and read the standard fișa fields from it: credits,
+   hours per week, evaluation form, course/seminar coordinator, year and
+   semester of study
+4. Write the rows as CSV, SQLite or Parquet
+
+Unchanged PDFs are never opened again; bumping EXTRACT_VERSION (after a
+change to the field patterns) invalidates the cache.
+
+USAGE:
+    python ase_extract.py                                     # every folder in ASE_PDFs
+    python ase_extract.py ASE_PDFs/Informatica_economica_Anul_III_2023-2026 --format sqlite
+    python ase_extract.py --format parquet --output fise.parquet --workers 8
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import ase_universal_downloader as downloader
+from ase_storage import MANIFEST_NAME, AtomicFileWriter, Manifest, file_sha256, find_pdfs
+
+try:
+    import pypdf
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXTRACT_VERSION = 1
+FORMATS = ('csv', 'sqlite', 'parquet')
+
+# The fields sit on the first pages; the rest is syllabus text
+MAX_PAGES = 3
+
+# Fields read from the text, in column order
+FIELDS = ['subject', 'year', 'semester', 'credits', 'hours_per_week', 'course_hours', 'seminar_hours',
+          'evaluation', 'regime', 'coordinator', 'seminar_coordinator']
+INTEGER_FIELDS = {'year', 'semester', 'credits', 'hours_per_week', 'course_hours', 'seminar_hours', 'pages'}
+
+FiseRecord = namedtuple('FiseRecord', ['folder', 'file', 'sha256'] + FIELDS + ['pages', 'error'])
+
+# Text of a value that runs until the next numbered row (e.g. "2.3") or line
+_TEXT = r'[:\s]*(.+?)\s*(?=\n|\b\d\.\d{1,2}\b|$)'
+_WORD = r'[:\s]*([A-Za-z]+|\d+)\b'
+_NUMBER = r'[:\s]*(\d+)\b'
+
+def labels(number, value, *names):
+    """Patterns for a row: numbered (e.g. "2.5 Semestrul") first, since the
+    bare labels can also occur in the text around the tables"""
+    numbered = [rf'{re.escape(number)}\s*(?:{name}){value}' for name in names]
+    return numbered + [rf'\b(?:{name}){value}' for name in names]
+
+# Labels of the standard Romanian and English templates, without diacritics
+FIELD_PATTERNS = {
+    'subject': labels('2.1', _TEXT, r'Denumirea disciplinei', r'Name of the (?:subject|course|discipline)'),
+    'coordinator': labels('2.2', _TEXT, r'Titularul (?:activitatilor )?de curs',
+                          r'Holder of (?:the )?course activities',
+                          r'Course (?:activities )?(?:coordinator|holder|lecturer)'),
+    'seminar_coordinator': labels('2.3', _TEXT, r'Titularul (?:activitatilor )?de seminar\S*',
+                                  r'Holder of (?:the )?seminar\S* activities',
+                                  r'Seminar\S* (?:activities )?(?:coordinator|holder|tutor)'),
+    'year': labels('2.4', _WORD, r'Anul de studi[iu]', r'Year of stud(?:y|ies)'),
+    'semester': labels('2.5', _WORD, r'Semestrul', r'Semester'),
+    'evaluation': labels('2.6', _WORD, r'Tipul de evaluare', r'(?:Type|Form) of (?:evaluation|assessment)'),
+    'regime': labels('2.7', _WORD, r'Regimul disciplinei', r'(?:Type|Status|Regime) of the (?:subject|course|discipline)'),
+    'hours_per_week': labels('3.1', _NUMBER, r'Numar(?:ul)? (?:de )?ore pe saptamana', r'Number of hours per week'),
+    'course_hours': labels('3.2', _NUMBER, r'(?:din care\s*:?\s*)?curs', r'(?:of which\s*:?\s*)?(?:course|lecture)s?')[:2],
+    'seminar_hours': labels('3.3', _NUMBER, r'seminar\S*', r'(?:laboratory|lab)\S*')[:2],
+    'credits': labels('3.9', _NUMBER, r'Numarul (?:de )?credite', r'Number of (?:ECTS )?credits'),
+}
+_COMPILED = {field: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+             for field, patterns in FIELD_PATTERNS.items()}
+
+ROMAN = {'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6}
+EVALUATION_FORMS = {'E': 'Examen', 'V': 'Verificare', 'VP': 'Verificare pe parcurs', 'C': 'Colocviu'}
+REGIMES = {'O': 'Obligatorie', 'F': 'Facultativa', 'OP': 'Optionala', 'A': 'Optionala'}
+
+
+def normalize_text(text):
+    """PDF text without diacritics (ş/ţ cedilla variants too) and with single spaces"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r'[ \t\xa0]+', ' ', text)
+    return re.sub(r' ?\n[ \n]*', '\n', text)
+
+def to_number(value):
+    """'3' or 'III' as an int; None if it is neither"""
+    if value is None:
+        return None
+    value = value.strip().upper()
+    if value.isdigit():
+        return int(value)
+    return ROMAN.get(value)
+
+def parse_fields(text):
+    """Fields of FIELDS found in the (normalized) text of a fișă; missing ones are None"""
+    fields = dict.fromkeys(FIELDS)
+    for field, patterns in _COMPILED.items():
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match and match.group(1).strip():
+                fields[field] = match.group(1).strip()
+                break
+
+    for field in INTEGER_FIELDS & fields.keys():
+        fields[field] = to_number(fields[field])
+    if fields['evaluation']:
+        fields['evaluation'] = EVALUATION_FORMS.get(fields['evaluation'].upper(), fields['evaluation'].capitalize())
+    if fields['regime']:
+        fields['regime'] = REGIMES.get(fields['regime'].upper(), fields['regime'].capitalize())
+    return fields
+
+def extract_text(path, max_pages=None):
+    """Text of a PDF's first max_pages pages (all by default)
+
+    Returns (text, pages, error); error is None on success.
+    """
+    try:
+        reader = pypdf.PdfReader(path)
+        pages = len(reader.pages)
+        text = "\n".join(page.extract_text() or '' for page in reader.pages[:max_pages])
+    except Exception as e:
+        return '', None, f"{type(e).__name__}: {e}"
+    return text, pages, None
+
+def extract_file(path):
+    """Read the fields of one PDF (runs in a pool process)
+
+    Returns (fields, pages, error); error is None on success.
+    """
+    text, pages, error = extract_text(path, MAX_PAGES)
+    if error:
+        return dict.fromkeys(FIELDS), None, error
+    return parse_fields(normalize_text(text)), pages, None
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def cache_path():
+    return os.path.join(downloader.BASE_DOWNLOAD_DIR, "_cache", "extract.json.gz")
+
+class ExtractCache:
+    """Extraction results by PDF SHA-256, kept in one gzip'd JSON file"""
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries or {}
+        self.changed = False
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get('version') != EXTRACT_VERSION:
+            return cls(path)
+        return cls(path, data.get('files', {}))
+
+    def get(self, sha256):
+        return self.entries.get(sha256)
+
+    def put(self, sha256, fields, pages, error):
+        self.entries[sha256] = {'fields': fields, 'pages': pages, 'error': error}
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {'version': EXTRACT_VERSION, 'files': self.entries}
+        with AtomicFileWriter(self.path) as writer:
+            writer.write(gzip.compress(json.dumps(data, ensure_ascii=False).encode('utf-8')))
+            writer.commit()
+        self.changed = False
+
+# =============================================================================
+# EXTRACTION
+# =============================================================================
+
+def is_download_folder(path):
+    """Whether a folder holds a download (manifest or semester folders)"""
+    return (os.path.exists(os.path.join(path, MANIFEST_NAME))
+            or any(name.startswith('Semestrul_') for name in os.listdir(path)))
+
+def download_folders(base=None):
+    """Every download folder under ASE_PDFs (skips _store, _cache...)
+
+    Batch runs keep one folder per configuration inside their Run_* folder.
+    """
+    base = base or downloader.BASE_DOWNLOAD_DIR
+    try:
+        entries = sorted(os.scandir(base), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return []
+    folders = []
+    for entry in entries:
+        if not entry.is_dir() or entry.name.startswith(('_', '.')):
+            continue
+        if is_download_folder(entry.path):
+            folders.append(entry.path)
+        else:
+            folders.extend(sorted(child.path for child in os.scandir(entry.path)
+                                  if child.is_dir() and is_download_folder(child.path)))
+    return folders
+
+def pdf_hash(folder, relpath, manifest):
+    """SHA-256 of a PDF: from the manifest while the size matches, else hashed"""
+    path = os.path.join(folder, relpath)
+    entry = manifest.get(relpath)
+    if entry and entry.get('sha256') and entry.get('size') == os.path.getsize(path):
+        return entry['sha256']
+    return file_sha256(path)
+
+def scan_folders(folders, logger):
+    """(folder, relpath, semester folder, sha256) of every PDF in the folders"""
+    files = []
+    for folder in folders:
+        manifest = Manifest.load(folder)
+        for relpath, semester in find_pdfs(folder):
+            try:
+                sha256 = pdf_hash(folder, relpath, manifest)
+            except OSError as e:
+                logger.warning(f"Could not read {relpath} in {folder}: {e}")
+                continue
+            files.append((folder, relpath, semester, sha256))
+    return files
+
+def map_pool(function, paths, workers, logger):
+    """Yield function(path) for every path, in order, using every worker process
+
+    function must be picklable (a module-level function or a partial of one).
+    """
+    if not paths:
+        return
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    logger.info(f"Extracting {len(paths)} PDF(s) with {workers} process(es)")
+    if workers == 1:
+        yield from map(function, paths)
+        return
+    # Chunks amortize the inter-process round trips while leaving enough
+    # of them for the workers to balance large and small PDFs
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(function, paths, chunksize=chunksize)
+
+def run_pool(paths, workers, logger):
+    """{path: (fields, pages, error)} for the PDFs"""
+    return dict(zip(paths, map_pool(extract_file, paths, workers, logger)))
+
+def extract_folders(folders, logger, workers=None, cache=None):
+    """Extract every PDF of the folders; returns a list of FiseRecord
+
+    PDFs already in the cache (by SHA-256) are not opened. Identical PDFs
+    (hardlinks to the same store file) are extracted once.
+    """
+    if not PYPDF_AVAILABLE:
+        raise RuntimeError("Field extraction needs pypdf: pip install pypdf")
+    cache = cache or ExtractCache.load(cache_path())
+    start = time.monotonic()
+
+    files = scan_folders(folders, logger)
+    pending = {}
+    for folder, relpath, _, sha256 in files:
+        if cache.get(sha256) is None and sha256 not in pending:
+            pending[sha256] = os.path.join(folder, relpath)
+    logger.info(f"{len(files)} PDF(s) found, {len(files) - len(pending)} cached")
+
+    results = run_pool(list(pending.values()), workers, logger)
+    for sha256, path in pending.items():
+        cache.put(sha256, *results[path])
+    try:
+        cache.save()
+    except Exception as e:
+        logger.warning(f"Could not save the extraction cache: {e}")
+
+    records = []
+    for folder, relpath, semester, sha256 in files:
+        entry = cache.get(sha256)
+        fields = dict(entry['fields'])
+        if fields.get('semester') is None:
+            # Fall back on the folder the downloader sorted it into
+            fields['semester'] = to_number(semester.rpartition('_')[2])
+        if entry['error']:
+            logger.warning(f"Could not extract {relpath}: {entry['error']}")
+        records.append(FiseRecord(os.path.basename(folder), relpath, sha256,
+                                  *(fields.get(field) for field in FIELDS), entry['pages'], entry['error']))
+
+    logger.info(f"Extracted {len(records)} record(s) in {time.monotonic() - start:.1f}s "
+                f"({len(pending)} PDF(s) parsed)")
+    return records
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def write_csv(records, path):
+    # utf-8-sig so Excel shows the diacritics in names correctly
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FiseRecord._fields)
+    writer.writerows(records)
+    with AtomicFileWriter(path) as file_writer:
+        file_writer.write(buffer.getvalue().encode('utf-8-sig'))
+        file_writer.commit()
+
+def write_sqlite(records, path):
+    """Replace the fise table of a new database file (built aside, then moved in place)"""
+    columns = ', '.join(f"{field} {'INTEGER' if field in INTEGER_FIELDS else 'TEXT'}"
+                        for field in FiseRecord._fields)
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        with connection:
+            connection.execute(f"CREATE TABLE fise ({columns}, PRIMARY KEY (folder, file))")
+            connection.executemany(f"INSERT INTO fise VALUES ({', '.join('?' * len(FiseRecord._fields))})",
+                                   records)
+            connection.execute("CREATE INDEX fise_sha256 ON fise (sha256)")
+    finally:
+        connection.close()
+    os.replace(temp_path, path)
+
+def write_parquet(records, path):
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+    table = pyarrow.Table.from_pylist([record._asdict() for record in records])
+    temp_path = f"{path}.tmp"
+    pyarrow.parquet.write_table(table, temp_path)
+    os.replace(temp_path, path)
+
+WRITERS = {'csv': write_csv, 'sqlite': write_sqlite, 'parquet': write_parquet}
+EXTENSIONS = {'csv': 'csv', 'sqlite': 'db', 'parquet': 'parquet'}
+
+def write_records(records, path, output_format):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    WRITERS[output_format](records, path)
+
+def default_output(output_format, folder=None):
+    """fise.<ext> in the download folder, or in ASE_PDFs for several folders"""
+    return os.path.join(folder or downloader.BASE_DOWNLOAD_DIR, f"fise.{EXTENSIONS[output_format]}")
+
+def extract_to_file(folders, logger, output_format='csv', path=None, workers=None):
+    """Extract the folders and write the table; returns (records, path) or (None, None) on failure"""
+    path = path or default_output(output_format, folders[0] if len(folders) == 1 else None)
+    try:
+        records = extract_folders(folders, logger, workers)
+        write_records(records, path, output_format)
+    except Exception as e:
+        logger.error(f"Field extraction failed: {e}")
+        return None, None
+    logger.info(f"Fields of {len(records)} PDF(s) written to {path}")
+    return records, path
+
+def main():
+    """Extract the fields of downloaded PDFs from the command line"""
+    parser = argparse.ArgumentParser(description="Extract credits, hours, evaluation and coordinators "
+                                                 "from downloaded fișe into a table")
+    parser.add_argument('folders', nargs='*',
+                        help=f"download folders (default: every folder in {downloader.BASE_DOWNLOAD_DIR})")
+    parser.add_argument('--format', choices=FORMATS, default=downloader.EXTRACT_FORMAT,
+                        help=f"output format (default: {downloader.EXTRACT_FORMAT})")
+    parser.add_argument('--output', default=None, help="output file (default: fise.<ext> next to the PDFs)")
+    parser.add_argument('--workers', type=int, default=downloader.EXTRACT_WORKERS,
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    folders = args.folders or download_folders()
+    if not folders:
+        print("No download folders found.")
+        return 1
+    records, path = extract_to_file(folders, logging.getLogger(__name__), args.format, args.output, args.workers)
+    if records is None:
+        return 1
+    failed = sum(1 for record in records if record.error)
+    print(f"{len(records)} fișe written to {path}" + (f" ({failed} could not be read)" if failed else ""))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,12 +10,32 @@ import threading
 import os
 import json
 import sys
+import time
 from datetime import datetime
 import logging
+from collections import deque
 from pathlib import Path
 
-# Import the scraping logic WITHOUT modification
-import ase_universal_downloader as downloader
+from ase_events import ProgressTracker, describe, describe_file
+
+# The scraping logic (requests, bs4/lxml, aiohttp) makes up most of the
+# startup time, so it is imported by load_stack() on a background thread
+# once the window is up
+downloader = None
+ase_catalog = None
+stack_ready = threading.Event()
+_stack_lock = threading.Lock()
+
+def load_stack():
+    """Import the downloader and catalog modules (once, from any thread)"""
+    global downloader, ase_catalog
+    with _stack_lock:
+        if downloader is None:
+            import ase_universal_downloader
+            import ase_catalog as catalog_module
+            downloader, ase_catalog = ase_universal_downloader, catalog_module
+            stack_ready.set()
+    return downloader
 
 # ALL ASE FACULTIES - Complete list!
 FACULTY_CONFIGS = {
@@ -26,7 +46,7 @@ FACULTY_CONFIGS = {
             'Informatica economica': ['2022-2025', '2023-2026', '2024-2027', '2025-2028'],
             'Cibernetica economica': ['2022-2025', '2023-2026', '2024-2027', '2025-2028'],
             'Informatica economica  (Engleza)': ['2022-2025', '2023-2026', '2024-2027', '2025-2028'],
-            'Statistica ?i previziune economica': ['2021-2024', '2022-2025', '2023-2026', '2024-2027'],
+            'Statistica și previziune economica': ['2021-2024', '2022-2025', '2023-2026', '2024-2027'],
             'Statistica economica si data science': ['2025-2028'],
             # 2-year Master programs
             'Informatica economica (Master)': ['2024-2026', '2025-2027'],
@@ -121,34 +141,51 @@ FACULTY_CONFIGS = {
     }
 }
 
+# The log panel is refreshed LOG_REFRESH_MS after the previous refresh and
+# keeps only the last LOG_MAX_LINES lines (the log file has everything).
+# The progress bar and label are redrawn from the download events every
+# PROGRESS_REFRESH_MS.
+LOG_REFRESH_MS = 100
+LOG_MAX_LINES = 2000
+PROGRESS_REFRESH_MS = 200
+
 class TkinterLogHandler(logging.Handler):
-    """Custom logging handler to redirect logs to the GUI"""
-    def __init__(self, text_widget, progress_callback):
+    """Custom logging handler to redirect logs to the GUI
+
+    emit() only formats the record and appends it to a bounded deque, from
+    any thread; the Tk thread moves what accumulated into the widget in one
+    insert every LOG_REFRESH_MS (see drain).
+    """
+    def __init__(self, text_widget):
         super().__init__()
         self.text_widget = text_widget
-        self.progress_callback = progress_callback
+        # deque append/popleft are thread-safe; beyond maxlen the oldest
+        # pending lines could never be shown anyway
+        self.pending = deque(maxlen=LOG_MAX_LINES)
+        self.text_widget.after(LOG_REFRESH_MS, self.drain)
 
     def emit(self, record):
-        msg = self.format(record)
-
-        def append():
-            self.text_widget.insert(tk.END, msg + '\n')
-            self.text_widget.see(tk.END)
-
-            # Parse progress from log messages
-            if "Downloading" in msg and "/" in msg:
-                try:
-                    # Extract "X/Y" pattern
-                    import re
-                    match = re.search(r'(\d+)/(\d+)', msg)
-                    if match:
-                        current = int(match.group(1))
-                        total = int(match.group(2))
-                        self.progress_callback(current, total)
-                except:
-                    pass
-
-        self.text_widget.after(0, append)
+        try:
+            self.pending.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def drain(self):
+        """Show the queued lines and trim the widget"""
+        try:
+            lines = []
+            while self.pending:
+                lines.append(self.pending.popleft())
+            if lines:
+                self.text_widget.insert(tk.END, '\n'.join(lines) + '\n')
+                excess = int(self.text_widget.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+                if excess > 0:
+                    self.text_widget.delete('1.0', f'{excess + 1}.0')
+                self.text_widget.see(tk.END)
+        except tk.TclError:
+            # Window closed
+            return
+        self.text_widget.after(LOG_REFRESH_MS, self.drain)
 
 class ASEDownloaderGUI:
     def __init__(self, root):
@@ -159,6 +196,10 @@ class ASEDownloaderGUI:
         # Config file path
         self.config_file = Path(__file__).parent / "gui_settings.json"
 
+        # Downloads (and the catalog in _cache) live next to where the app was
+        # launched; __file__ is a temporary folder in the one-file exe
+        self.downloads_dir = Path.cwd() / "ASE_PDFs"
+
         # Variables
         self.selected_faculty = tk.StringVar()
         self.selected_program = tk.StringVar()
@@ -166,17 +207,55 @@ class ASEDownloaderGUI:
         self.selected_form = tk.StringVar(value="FRECVENTA")
         self.selected_language = tk.StringVar(value="romanian")
         self.selected_year = tk.StringVar(value="Anul III")
+        self.selected_workers = tk.IntVar(value=1)
+        self.use_async_engine = tk.BooleanVar(value=False)
+        self.sync_mode = tk.BooleanVar(value=False)
 
         # Download control variables
         self.is_downloading = False
         self.download_thread = None
         self.current_progress = tk.StringVar(value="")
 
+        # Faculty/program/year choices: the hand-kept FACULTY_CONFIGS until
+        # the crawled catalog is loaded with the rest of the stack
+        self.faculty_configs = FACULTY_CONFIGS
+        self.catalog = None
+
+        # Progress comes from the downloader's events, not from the log
+        self.progress_tracker = ProgressTracker()
+
         # Load saved settings
         self.load_settings()
 
         self.setup_ui()
         self.setup_logging()
+        self.root.after(PROGRESS_REFRESH_MS, self.refresh_progress)
+
+        # Idle callbacks run after the pending redraws, so the window shows first
+        self.root.after_idle(self.load_stack_in_background)
+
+    def load_stack_in_background(self):
+        """Import the downloader on a daemon thread, then finish the setup that needs it"""
+        def load():
+            try:
+                load_stack()
+            except Exception as e:
+                logging.error(f"Could not load the downloader: {e}")
+                return
+            self.root.after(0, self.on_stack_loaded)
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def on_stack_loaded(self):
+        """Subscribe to progress events and switch to the saved catalog (Tk thread)"""
+        downloader.get_progress_channel().subscribe(self.progress_tracker)
+        self.workers_spin.config(to=downloader.MAX_DOWNLOAD_WORKERS)
+        # Before the catalog is read, so the startup read and the background crawl share one _cache
+        downloader.BASE_DOWNLOAD_DIR = str(self.downloads_dir)
+        catalog = ase_catalog.load_catalog()
+        if catalog:
+            self.apply_catalog(catalog)
+        self.refresh_catalog_in_background()
 
     def setup_logging(self):
         """Setup logging to GUI and file"""
@@ -202,7 +281,7 @@ class ASEDownloaderGUI:
         root_logger.addHandler(file_handler)
 
         # GUI handler
-        gui_handler = TkinterLogHandler(self.status_text, self.update_progress_bar)
+        gui_handler = TkinterLogHandler(self.status_text)
         gui_handler.setLevel(logging.INFO)
         gui_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
         root_logger.addHandler(gui_handler)
@@ -244,7 +323,7 @@ class ASEDownloaderGUI:
         faculty_frame.pack(fill=tk.X, pady=(0, 10))
 
         self.faculty_combo = ttk.Combobox(faculty_frame, textvariable=self.selected_faculty,
-                                         values=list(FACULTY_CONFIGS.keys()),
+                                         values=list(self.faculty_configs.keys()),
                                          state="readonly", width=60)
         self.faculty_combo.pack(fill=tk.X)
         self.faculty_combo.bind('<<ComboboxSelected>>', self.update_programs)
@@ -275,9 +354,9 @@ class ASEDownloaderGUI:
         form_frame.pack(fill=tk.X, pady=(0, 5))
 
         ttk.Label(form_frame, text="Study Form:").pack(side=tk.LEFT)
-        ttk.Radiobutton(form_frame, text="La frecvența (In-person)",
+        ttk.Radiobutton(form_frame, text="La frecvența (In-person)", command=self.refresh_years,
                        variable=self.selected_form, value="FRECVENTA").pack(side=tk.LEFT, padx=(10, 0))
-        ttk.Radiobutton(form_frame, text="La distanța (Distance)",
+        ttk.Radiobutton(form_frame, text="La distanța (Distance)", command=self.refresh_years,
                        variable=self.selected_form, value="DISTANTA").pack(side=tk.LEFT, padx=(10, 0))
 
         # Language
@@ -300,6 +379,25 @@ class ASEDownloaderGUI:
                                  state="readonly", width=15)
         year_combo.pack(side=tk.LEFT, padx=(10, 0))
 
+        # Parallel downloads
+        workers_frame = ttk.Frame(options_frame)
+        workers_frame.pack(fill=tk.X, pady=(5, 0))
+
+        ttk.Label(workers_frame, text="Parallel Downloads:").pack(side=tk.LEFT)
+        # The upper bound is MAX_DOWNLOAD_WORKERS once the downloader is loaded
+        self.workers_spin = ttk.Spinbox(workers_frame, textvariable=self.selected_workers,
+                                        from_=1, to=max(1, self.selected_workers.get()), state="readonly", width=5)
+        self.workers_spin.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Label(workers_frame, text="(1 = polite serial mode)").pack(side=tk.LEFT, padx=(10, 0))
+
+        # Engine
+        ttk.Checkbutton(options_frame, text="Use asyncio engine (aiohttp)",
+                        variable=self.use_async_engine).pack(anchor=tk.W, pady=(5, 0))
+
+        # Sync mode
+        ttk.Checkbutton(options_frame, text="Sync mode (keep folder, only write new/changed PDFs)",
+                        variable=self.sync_mode).pack(anchor=tk.W)
+
         # Download section
         download_frame = ttk.LabelFrame(main_frame, text="5. Download", padding="10")
         download_frame.pack(fill=tk.X, pady=(0, 10))
@@ -336,8 +434,8 @@ class ASEDownloaderGUI:
     def update_programs(self, event=None):
         """Update program dropdown based on selected faculty"""
         faculty = self.selected_faculty.get()
-        if faculty and faculty in FACULTY_CONFIGS:
-            programs = list(FACULTY_CONFIGS[faculty]['programs'].keys())
+        if faculty and faculty in self.faculty_configs:
+            programs = list(self.faculty_configs[faculty]['programs'].keys())
             self.program_combo['values'] = programs
             self.program_combo.set('')
             self.years_combo.set('')
@@ -348,19 +446,83 @@ class ASEDownloaderGUI:
         faculty = self.selected_faculty.get()
         program = self.selected_program.get()
 
-        if faculty and program and faculty in FACULTY_CONFIGS:
-            if program in FACULTY_CONFIGS[faculty]['programs']:
-                years = FACULTY_CONFIGS[faculty]['programs'][program]
-                self.years_combo['values'] = years
+        if faculty and program and faculty in self.faculty_configs:
+            if program in self.faculty_configs[faculty]['programs']:
+                self.years_combo['values'] = self.program_years(faculty, program)
                 self.years_combo.set('')
                 self.save_settings()
 
-    def update_progress_bar(self, current, total):
-        """Update the progress bar based on downloads completed"""
-        if total > 0:
-            percentage = (current / total) * 100
-            self.progress['value'] = percentage
-            self.current_progress.set(f"Downloading: {current}/{total} PDFs")
+    def refresh_years(self):
+        """Offer the year ranges of the selected study form, keeping a selection that is still valid"""
+        faculty = self.selected_faculty.get()
+        program = self.selected_program.get()
+        if faculty in self.faculty_configs and program in self.faculty_configs[faculty]['programs']:
+            years = self.program_years(faculty, program)
+            self.years_combo['values'] = years
+            if self.selected_years.get() not in years:
+                self.years_combo.set('')
+        self.save_settings()
+
+    def program_years(self, faculty, program):
+        """Year ranges of a program; per study form once the catalog is loaded"""
+        config = self.faculty_configs[faculty]
+        if ase_catalog is None:
+            return config['programs'][program]
+        return ase_catalog.program_years(config, program, self.selected_form.get())
+
+    def refresh_catalog_in_background(self):
+        """Re-crawl the catalog on a daemon thread when it is missing or older than CATALOG_MAX_AGE"""
+        if self.catalog and ase_catalog.catalog_age(self.catalog) < downloader.CATALOG_MAX_AGE:
+            return
+
+        def crawl():
+            try:
+                catalog = ase_catalog.refresh_catalog(logging.getLogger())
+            except Exception as e:
+                logging.error(f"Catalog refresh failed: {e}")
+                return
+            if catalog:
+                self.root.after(0, lambda: self.apply_catalog(catalog))
+
+        logging.info("Refreshing faculty catalog in the background...")
+        threading.Thread(target=crawl, daemon=True).start()
+
+    def apply_catalog(self, catalog):
+        """Switch the dropdowns to a freshly crawled catalog, keeping valid selections"""
+        configs = ase_catalog.catalog_faculty_configs(catalog)
+        if not configs:
+            return
+        self.catalog = catalog
+        self.faculty_configs = configs
+        self.faculty_combo['values'] = list(configs.keys())
+
+        faculty = self.selected_faculty.get()
+        if faculty not in configs:
+            # Selections from the hand-kept list may be named differently on the site
+            if not self.is_downloading:
+                self.selected_faculty.set('')
+                self.selected_program.set('')
+                self.selected_years.set('')
+        else:
+            self.program_combo['values'] = list(configs[faculty]['programs'].keys())
+            program = self.selected_program.get()
+            if program in configs[faculty]['programs']:
+                self.years_combo['values'] = self.program_years(faculty, program)
+        logging.info(f"Faculty catalog updated: {len(configs)} faculties")
+
+    def refresh_progress(self):
+        """Redraw the progress bar and label from the progress tracker"""
+        if self.is_downloading:
+            snapshot = self.progress_tracker.snapshot()
+            if snapshot['phase'] == 'download' and snapshot['total']:
+                self.progress['value'] = snapshot['completed'] / snapshot['total'] * 100
+                text = f"Downloading: {describe(snapshot)}"
+                if snapshot['current']:
+                    text += f"\n{describe_file(snapshot['current'])}"
+                self.current_progress.set(text)
+            elif snapshot['phase'] == 'navigate':
+                self.current_progress.set("Navigating to the subjects page...")
+        self.root.after(PROGRESS_REFRESH_MS, self.refresh_progress)
 
     def load_settings(self):
         """Load saved settings from JSON file"""
@@ -375,6 +537,9 @@ class ASEDownloaderGUI:
                 self.selected_form.set(settings.get('form', 'FRECVENTA'))
                 self.selected_language.set(settings.get('language', 'romanian'))
                 self.selected_year.set(settings.get('year', 'Anul III'))
+                self.selected_workers.set(settings.get('workers', 1))
+                self.use_async_engine.set(settings.get('async_engine', False))
+                self.sync_mode.set(settings.get('sync_mode', False))
 
                 logging.info("Loaded saved settings")
             except Exception as e:
@@ -389,7 +554,10 @@ class ASEDownloaderGUI:
                 'years': self.selected_years.get(),
                 'form': self.selected_form.get(),
                 'language': self.selected_language.get(),
-                'year': self.selected_year.get()
+                'year': self.selected_year.get(),
+                'workers': self.selected_workers.get(),
+                'async_engine': self.use_async_engine.get(),
+                'sync_mode': self.sync_mode.get()
             }
 
             with open(self.config_file, 'w', encoding='utf-8') as f:
@@ -400,7 +568,7 @@ class ASEDownloaderGUI:
 
     def validate_selection(self):
         """Validate that all required fields are selected"""
-        if not self.selected_faculty.get():
+        if self.selected_faculty.get() not in self.faculty_configs:
             messagebox.showerror("Error", "Please select your faculty")
             return False
         if not self.selected_program.get():
@@ -430,7 +598,9 @@ class ASEDownloaderGUI:
                       f"Years: {self.selected_years.get()}\n"
                       f"Form: {self.selected_form.get()}\n"
                       f"Language: {self.selected_language.get()}\n"
-                      f"Year: {self.selected_year.get()}")
+                      f"Year: {self.selected_year.get()}\n"
+                      f"Parallel downloads: {self.selected_workers.get()}\n"
+                      f"Sync mode: {'on' if self.sync_mode.get() else 'off'}")
 
         # Clear status
         self.status_text.delete(1.0, tk.END)
@@ -463,42 +633,40 @@ class ASEDownloaderGUI:
 
         messagebox.showinfo("Canceled", "Download has been canceled.")
 
-    def archive_old_downloads(self, current_dir):
-        """Move old downloads to _archive folder for comparison"""
-        try:
-            # Count PDFs in current directory (including semester subdirectories)
-            pdf_count = len(list(current_dir.rglob("*.pdf")))
-            if pdf_count == 0:
-                return  # Nothing to archive
-
-            # Create archive directory
-            archive_dir = current_dir.parent / "_archive"
-            archive_dir.mkdir(exist_ok=True)
-
-            # Create timestamped archive folder
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            folder_name = current_dir.name
-            archive_folder = archive_dir / f"{folder_name}_{timestamp}"
-
-            # Move the entire current directory to archive
-            import shutil
-            shutil.move(str(current_dir), str(archive_folder))
-
-            logging.info(f"Archived old downloads to: {archive_folder}")
-            logging.info(f"Archived {pdf_count} PDFs for comparison")
+    def replace_old_downloads(self, current_dir):
+        """Keep old downloads as a snapshot, then empty the folder for the new run
 
+        The PDFs stay in _store (see ase_snapshots), so clearing the folder
+        only removes links and nothing is moved or copied.
+        """
+        if not downloader.SNAPSHOT_ENABLED:
+            return  # No history to keep them in: the new run updates the folder in place
+        try:
+            import ase_snapshots
+            snapshot_id = ase_snapshots.record_snapshot(str(current_dir), logging.getLogger(),
+                                                        downloader.SNAPSHOT_KEEP_LAST, downloader.SNAPSHOT_KEEP_DAILY,
+                                                        reason="replaced by a new download")
         except Exception as e:
-            logging.warning(f"Could not archive old downloads: {e}")
+            logging.warning(f"Could not snapshot old downloads, updating the folder in place: {e}")
+            return
+        if snapshot_id:
+            logging.info(f"Old downloads kept as snapshot {snapshot_id} "
+                         f"(python ase_snapshots.py restore {current_dir.name} {snapshot_id})")
+
+        import shutil
+        shutil.rmtree(current_dir, ignore_errors=True)
 
     def download_worker(self):
         """Worker thread for downloading PDFs"""
         try:
             if not self.is_downloading:
                 return
+            # Normally loaded by now; waits if Download was clicked right at startup
+            load_stack()
 
             # Get user configuration
             faculty = self.selected_faculty.get()
-            config = FACULTY_CONFIGS[faculty]
+            config = self.faculty_configs[faculty]
 
             # Configure the downloader module directly
             downloader.USER_CONFIG = {
@@ -509,26 +677,25 @@ class ASEDownloaderGUI:
                 'language': self.selected_language.get(),
                 'target_year': self.selected_year.get()
             }
+            # Post back straight to the catalog's links when the selection came from it
+            downloader.USER_CONFIG.update(ase_catalog.catalog_arguments(
+                config, self.selected_program.get(), self.selected_years.get(),
+                self.selected_form.get(), self.selected_language.get(), self.selected_year.get()))
 
             # Setup clean directory structure: ASE_PDFs/Informatica_economica_Anul_III_2023-2026/
-            # Use current working directory (where .exe was launched from)
-            downloads_dir = Path.cwd() / "ASE_PDFs"
+            # in the current working directory (where .exe was launched from)
+            downloads_dir = self.downloads_dir
 
             # Create folder name with program, year and study period
-            program = self.selected_program.get().replace(" ", "_")  # "Informatica economica"
-            year = self.selected_year.get().replace(" ", "_")  # "Anul III" -> "Anul_III"
-            period = self.selected_years.get()  # "2023-2026"
-
-            # Remove diacritics from folder name too
-            import ase_universal_downloader as downloader_module
-            folder_name = f"{program}_{year}_{period}"
-            folder_name = downloader_module.remove_diacritics(folder_name)
-
-            current_dir = downloads_dir / folder_name
+            current_dir = downloads_dir / downloader.config_folder_name(downloader.USER_CONFIG)
 
-            # Archive old downloads if they exist
-            if current_dir.exists():
-                self.archive_old_downloads(current_dir)
+            # Snapshot and replace old downloads if they exist (sync mode updates the folder
+            # in place, and an interrupted run is resumed in place)
+            if current_dir.exists() and not self.sync_mode.get():
+                if downloader.interrupted_run(str(current_dir)):
+                    logging.info(f"Resuming interrupted download in: {current_dir}")
+                else:
+                    self.replace_old_downloads(current_dir)
 
             # Create the current directory
             current_dir.mkdir(parents=True, exist_ok=True)
@@ -542,39 +709,33 @@ class ASEDownloaderGUI:
 
             # Validate config
             downloader.validate_config()
-
-            # Create session
-            session = downloader.create_session()
-
-            # Navigate to subjects page
-            if not self.is_downloading:
-                return
-            soup = downloader.navigate_to_subjects(session, logging.getLogger())
-
-            if not soup:
-                logging.error("Failed to navigate to subjects page")
-                self.show_error("Navigation failed", "Could not reach the subjects page. Check your configuration.")
-                return
-
-            # Find subjects
-            if not self.is_downloading:
-                return
-            subjects = downloader.find_obligatory_subjects(soup, logging.getLogger())
-
-            if not subjects:
-                logging.error("No obligatory subjects found")
-                self.show_error("No subjects found", "No obligatory subjects were found. Check your configuration.")
-                return
-
-            # Download PDFs
-            if not self.is_downloading:
-                return
+            downloader.start_metrics()
 
             # Pass cancel check function to downloader
             def is_canceled():
                 return not self.is_downloading
 
-            success_count = downloader.download_pdfs(session, subjects, soup, logging.getLogger(), cancel_check=is_canceled)
+            if not self.is_downloading:
+                return
+
+            if self.use_async_engine.get():
+                # Asyncio engine runs the whole pipeline on its own event loop
+                import ase_async_downloader
+                result = ase_async_downloader.run_download(logging.getLogger(),
+                                                           cancel_check=is_canceled,
+                                                           workers=self.selected_workers.get(),
+                                                           sync=self.sync_mode.get())
+                if result is None:
+                    self.show_error("Navigation failed", "Could not reach the subjects page. Check your configuration.")
+                    return
+                success_count, subjects = result
+                if not subjects:
+                    self.show_error("No subjects found", "No obligatory subjects were found. Check your configuration.")
+                    return
+            else:
+                success_count, subjects = self.run_sync_engine(is_canceled)
+                if subjects is None:
+                    return
 
             # Check if we were canceled
             if not self.is_downloading:
@@ -591,10 +752,56 @@ class ASEDownloaderGUI:
             if self.is_downloading:
                 logging.error(f"Unexpected error: {str(e)}", exc_info=True)
                 self.show_error("Download failed", f"An error occurred: {str(e)}")
+                if downloader is not None:
+                    downloader.report_debug_error(logging.getLogger())
         finally:
-            if self.is_downloading:
-                self.is_downloading = False
-                self.reset_ui()
+            # downloader is still None if the run stopped before load_stack() or it failed
+            try:
+                if downloader is not None:
+                    downloader.finish_metrics(logging.getLogger())
+                    downloader.flush_debug_capture(logging.getLogger())
+            except Exception as e:
+                logging.warning(f"Could not finish the run cleanly: {e}")
+            finally:
+                if self.is_downloading:
+                    self.is_downloading = False
+                    self.reset_ui()
+
+    def run_sync_engine(self, is_canceled):
+        """Run navigation and downloads with the requests-based engine
+
+        Returns (success_count, subjects), with subjects None if the run stopped early.
+        """
+        # Create session
+        session = downloader.create_session()
+
+        # Navigate to subjects page
+        soup = downloader.navigate_to_subjects(session, logging.getLogger())
+
+        if not soup:
+            logging.error("Failed to navigate to subjects page")
+            self.show_error("Navigation failed", "Could not reach the subjects page. Check your configuration.")
+            return 0, None
+
+        # Find subjects
+        if not self.is_downloading:
+            return 0, None
+        subjects = downloader.find_obligatory_subjects(soup, logging.getLogger())
+
+        if not subjects:
+            logging.error("No obligatory subjects found")
+            self.show_error("No subjects found", "No obligatory subjects were found. Check your configuration.")
+            return 0, None
+
+        # Download PDFs
+        if not self.is_downloading:
+            return 0, None
+
+        success_count = downloader.download_pdfs(session, subjects, soup, logging.getLogger(),
+                                                 cancel_check=is_canceled,
+                                                 workers=self.selected_workers.get(),
+                                                 sync=self.sync_mode.get())
+        return success_count, subjects
 
     def show_error(self, title, message):
         """Show error message in main thread"""
@@ -621,10 +828,33 @@ class ASEDownloaderGUI:
             self.progress['value'] = 0
         self.root.after(0, reset)
 
+def startup_probe(root, path):
+    """Benchmark hook (ASE_STARTUP_PROBE=path, see benchmarks/bench_startup.py)
+
+    Writes when the first frame was drawn and when the downloader finished
+    loading (time.time() stamps) to path as JSON, then closes the window.
+    """
+    root.update()
+    timings = {'first_frame': time.time()}
+
+    def wait_for_stack():
+        if not stack_ready.is_set():
+            root.after(10, wait_for_stack)
+            return
+        timings['stack_ready'] = time.time()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(timings, f)
+        root.destroy()
+
+    wait_for_stack()
+
 def main():
     """Main function"""
     root = tk.Tk()
     app = ASEDownloaderGUI(root)
+    probe = os.environ.get('ASE_STARTUP_PROBE')
+    if probe:
+        startup_probe(root, probe)
     root.mainloop()
 
 if __name__ == "__main__":
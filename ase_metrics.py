@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Run Metrics
+Structured timings for every run, next to the free-text log:
+
+- RunMetrics: thread-safe collector of phase measurements (wall time,
+  bytes, HTTP status, retries), e.g. 'navigate.faculty', 'parse.subjects',
+  'download' (one subject postback) or 'write' (persisting one file)
+- write_json: per-phase counts, latency percentiles and throughput
+- write_prometheus: the same as a Prometheus textfile, for the
+  node_exporter textfile collector
+
+Phases are free-form names; the downloader decides what to measure.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from ase_storage import AtomicFileWriter
+
+METRICS_VERSION = 1
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Measurement:
+    """Details filled in by the code inside RunMetrics.timer()"""
+
+    __slots__ = ('bytes', 'status', 'retries')
+
+    def __init__(self):
+        self.bytes = 0
+        self.status = None
+        self.retries = 0
+
+class PhaseStats:
+    """Everything recorded for one phase"""
+
+    def __init__(self):
+        self.durations = []
+        self.bytes = 0
+        self.retries = 0
+        self.statuses = Counter()
+
+    def summary(self):
+        durations = sorted(self.durations)
+        total = sum(durations)
+        summary = {
+            'count': len(durations),
+            'seconds_total': round(total, 6),
+            'bytes': self.bytes,
+            'bytes_per_second': round(self.bytes / total, 1) if total else 0.0,
+            'retries': self.retries,
+            'statuses': dict(sorted((str(status), count) for status, count in self.statuses.items())),
+        }
+        for quantile in QUANTILES:
+            summary[f"p{int(quantile * 100)}"] = round(percentile(durations, quantile), 6)
+        summary['max'] = round(durations[-1], 6) if durations else 0.0
+        return summary
+
+def percentile(values, quantile):
+    """Nearest-rank percentile of sorted values (0.0 when empty)"""
+    if not values:
+        return 0.0
+    rank = math.ceil(quantile * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+class RunMetrics:
+    """Collects phase measurements of one run
+
+    Args:
+        labels: Run-wide labels (program, year...) written with every series
+    """
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self.started = time.time()
+        self._start = time.monotonic()
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase, seconds, bytes=0, status=None, retries=0):
+        """Add one measurement of a phase"""
+        with self._lock:
+            stats = self._phases.get(phase)
+            if stats is None:
+                stats = self._phases[phase] = PhaseStats()
+            stats.durations.append(seconds)
+            stats.bytes += bytes or 0
+            stats.retries += retries or 0
+            if status is not None:
+                stats.statuses[status] += 1
+
+    @contextmanager
+    def timer(self, phase):
+        """Time a block; the yielded Measurement takes bytes, status and retries
+
+        A block that raises is recorded with status 'error'.
+        """
+        measurement = Measurement()
+        start = time.monotonic()
+        try:
+            yield measurement
+        except BaseException:
+            measurement.status = 'error'
+            raise
+        finally:
+            self.record(phase, time.monotonic() - start, measurement.bytes,
+                        measurement.status, measurement.retries)
+
+    def summary(self):
+        """Run summary as a JSON-ready dict"""
+        duration = time.monotonic() - self._start
+        with self._lock:
+            phases = {phase: stats.summary() for phase, stats in sorted(self._phases.items())}
+        download = phases.get('download', {})
+        return {
+            'version': METRICS_VERSION,
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'duration_seconds': round(duration, 3),
+            'labels': self.labels,
+            'totals': {
+                'downloads': download.get('count', 0),
+                'bytes': download.get('bytes', 0),
+                'bytes_per_second': round(download.get('bytes', 0) / duration, 1) if duration else 0.0,
+                'retries': sum(phase['retries'] for phase in phases.values()),
+            },
+            'phases': phases,
+        }
+
+    def write_json(self, path):
+        """Write summary() atomically"""
+        write_atomic(path, json.dumps(self.summary(), indent=2, ensure_ascii=False))
+
+    def write_prometheus(self, path):
+        """Write summary() in the Prometheus text exposition format, atomically"""
+        summary = self.summary()
+        run = labels_text(self.labels)
+        lines = [
+            "# HELP ase_run_start_timestamp_seconds Start time of the last run.",
+            "# TYPE ase_run_start_timestamp_seconds gauge",
+            f"ase_run_start_timestamp_seconds{run} {self.started:.3f}",
+            "# HELP ase_run_duration_seconds Wall time of the last run.",
+            "# TYPE ase_run_duration_seconds gauge",
+            f"ase_run_duration_seconds{run} {summary['duration_seconds']}",
+            "# HELP ase_run_download_bytes_per_second PDF bytes per second over the whole run.",
+            "# TYPE ase_run_download_bytes_per_second gauge",
+            f"ase_run_download_bytes_per_second{run} {summary['totals']['bytes_per_second']}",
+            "# HELP ase_phase_duration_seconds Wall time per phase.",
+            "# TYPE ase_phase_duration_seconds summary",
+        ]
+        phases = summary['phases']
+        for phase, stats in phases.items():
+            for quantile in QUANTILES:
+                quantile_labels = labels_text(self.labels, phase=phase, quantile=str(quantile))
+                lines.append(f"ase_phase_duration_seconds{quantile_labels} {stats[f'p{int(quantile * 100)}']}")
+            lines.append(f"ase_phase_duration_seconds_sum{labels_text(self.labels, phase=phase)} {stats['seconds_total']}")
+            lines.append(f"ase_phase_duration_seconds_count{labels_text(self.labels, phase=phase)} {stats['count']}")
+        lines += ["# HELP ase_phase_bytes_total Bytes transferred per phase.", "# TYPE ase_phase_bytes_total counter"]
+        lines += [f"ase_phase_bytes_total{labels_text(self.labels, phase=phase)} {stats['bytes']}"
+                  for phase, stats in phases.items()]
+        lines += ["# HELP ase_phase_retries_total HTTP retries per phase.", "# TYPE ase_phase_retries_total counter"]
+        lines += [f"ase_phase_retries_total{labels_text(self.labels, phase=phase)} {stats['retries']}"
+                  for phase, stats in phases.items()]
+        lines += ["# HELP ase_phase_responses_total Results per phase and HTTP status.",
+                  "# TYPE ase_phase_responses_total counter"]
+        lines += [f"ase_phase_responses_total{labels_text(self.labels, phase=phase, status=status)} {count}"
+                  for phase, stats in phases.items() for status, count in stats['statuses'].items()]
+        write_atomic(path, "\n".join(lines) + "\n")
+
+def labels_text(labels, **extra):
+    """Prometheus label set, e.g. {phase="download",program="Marketing"}"""
+    merged = dict(labels, **extra)
+    if not merged:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in merged.items()) + '}'
+
+def escape_label(value):
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def write_atomic(path, text):
+    """Write a text file through AtomicFileWriter, so readers never see half of it"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with AtomicFileWriter(path) as writer:
+        writer.write(text.encode('utf-8'))
+        writer.commit()
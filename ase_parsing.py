@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - HTML Parsing Layer
+Pluggable parsing backends for the ASP.NET pages:
+
+- 'lxml': builds a native lxml tree (C speed) and wraps it in LxmlNode,
+  which implements the small part of the BeautifulSoup API used by
+  get_form_data and the find_* functions (find, find_all, get, get_text)
+- 'bs4': BeautifulSoup, optionally restricted with a SoupStrainer to the
+  <form> element where the hidden fields and GridView tables live
+
+Pages are decoded with their declared charset instead of letting the
+parser sniff the raw bytes.
+"""
+
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+def decode_html(content, content_type=None):
+    """Decode page bytes using the declared charset instead of sniffing them
+
+    Looks at the Content-Type header first, then at the <meta> charset in the
+    first few KB, and falls back to UTF-8.
+    """
+    if isinstance(content, str):
+        return content
+
+    match = re.search(r'charset=["\']?([\w-]+)', content_type or '', re.IGNORECASE)
+    charset = match.group(1) if match else None
+    if not charset:
+        match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', content[:4096], re.IGNORECASE)
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return content.decode(charset, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+def parse(html, backend='lxml', bs4_parser='html.parser', only_form=True):
+    """Parse decoded HTML with the chosen backend
+
+    Both backends return an object supporting find/find_all/get/get_text,
+    so callers don't need to know which one is in use.
+    """
+    if backend == 'lxml' and LXML_AVAILABLE:
+        # Encode once so lxml never has to deal with str + encoding declarations
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        return LxmlNode(lxml.html.document_fromstring(html.encode('utf-8'), parser=parser))
+
+    parse_only = SoupStrainer('form') if only_form else None
+    return BeautifulSoup(html, bs4_parser, parse_only=parse_only)
+
+class LxmlNode:
+    """BeautifulSoup-compatible view of an lxml element
+
+    Only the subset of the Tag API this project uses is implemented.
+    Matching follows BeautifulSoup: find/find_all search descendants (never
+    the node itself), attribute filters compare exact values and True
+    means "attribute present".
+    """
+
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def name(self):
+        return self.element.tag
+
+    @property
+    def attrs(self):
+        return dict(self.element.attrib)
+
+    def get(self, key, default=None):
+        return self.element.get(key, default)
+
+    def __getitem__(self, key):
+        return self.element.attrib[key]
+
+    def __eq__(self, other):
+        return isinstance(other, LxmlNode) and other.element is self.element
+
+    def __hash__(self):
+        return hash(self.element)
+
+    def __str__(self):
+        return lxml.html.tostring(self.element, encoding='unicode')
+
+    def _matches(self, element, attrs):
+        for key, expected in attrs.items():
+            value = element.get(key)
+            if expected is True:
+                if value is None:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def _iter(self, name, attrs, recursive=True):
+        names = tuple(name) if isinstance(name, (list, tuple)) else ((name,) if name else ())
+        if recursive:
+            candidates = self.element.iterdescendants(*names)
+        else:
+            candidates = (child for child in self.element if not names or child.tag in names)
+        for element in candidates:
+            # Skip comments and processing instructions
+            if isinstance(element.tag, str) and self._matches(element, attrs):
+                yield LxmlNode(element)
+
+    def find(self, name=None, recursive=True, **attrs):
+        for node in self._iter(name, attrs, recursive):
+            return node
+        return None
+
+    def find_all(self, name=None, recursive=True, **attrs):
+        return list(self._iter(name, attrs, recursive))
+
+    def find_parent(self, name=None):
+        parent = self.element.getparent()
+        while parent is not None:
+            if not name or parent.tag == name:
+                return LxmlNode(parent)
+            parent = parent.getparent()
+        return None
+
+    def get_text(self, separator='', strip=False):
+        strings = self.element.itertext()
+        if strip:
+            strings = (text.strip() for text in strings)
+            strings = [text for text in strings if text]
+        return separator.join(strings)
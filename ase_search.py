@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Full-Text Search
+A local SQLite FTS5 index over the text of every downloaded fișă:
+
+- index: extracts the text of new or changed PDFs (by SHA-256, see
+  ase_extract) in a process pool, together with the download metadata:
+  subject name, program, year, semester and language. A PDF already
+  indexed under another path (hardlinks to the same store file) is copied
+  from the index instead of being parsed again; PDFs deleted from disk are
+  dropped.
+- query: ranked hits (BM25, subject and program matches weigh more than
+  the body) with a snippet around the match. Diacritics are optional in
+  queries: "functii" finds "funcții".
+
+The index lives in _cache/search.db and can be deleted at any time.
+
+USAGE:
+    python ase_search.py index                         # every folder in ASE_PDFs
+    python ase_search.py index ASE_PDFs/Informatica_economica_Anul_III_2023-2026
+    python ase_search.py query "retele neuronale"
+    python ase_search.py query "regresie OR econometr*" --semester II --limit 5
+"""
+
+import argparse
+import functools
+import logging
+import os
+import pathlib
+import re
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import ase_extract
+import ase_universal_downloader as downloader
+from ase_storage import Manifest, RunJournal
+
+INDEX_VERSION = 1
+
+# Commit after this many documents, so an interrupted run keeps its progress
+COMMIT_EVERY = 200
+
+# Column weights for bm25(): subject, program, body
+RANK_WEIGHTS = (10.0, 4.0, 1.0)
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        folder TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        subject TEXT,
+        program TEXT,
+        year INTEGER,
+        semester INTEGER,
+        language TEXT,
+        pages INTEGER,
+        error TEXT,
+        indexed TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256)",
+    "CREATE INDEX IF NOT EXISTS documents_folder ON documents (folder)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+        subject, program, body, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+]
+
+# Config folder names, e.g. Informatica_economica_Anul_III_2023-2026
+FOLDER_NAME = re.compile(r'^(?P<program>.+)_Anul_(?P<year>[IVX]+)_\d{4}-\d{4}$')
+
+SearchHit = namedtuple('SearchHit', ['path', 'subject', 'program', 'year', 'semester', 'language',
+                                     'snippet', 'score'])
+
+
+def index_path():
+    """Default location of the search index"""
+    return os.path.join(downloader.BASE_DOWNLOAD_DIR, "_cache", "search.db")
+
+def open_index(path=None):
+    """Open (and create or upgrade) the index for writing"""
+    path = path or index_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path)
+    if connection.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        # Derived data: an index from another version is rebuilt from the PDFs
+        connection.executescript("DROP TABLE IF EXISTS documents; DROP TABLE IF EXISTS search;")
+    try:
+        for statement in SCHEMA:
+            connection.execute(statement)
+    except sqlite3.OperationalError as e:
+        connection.close()
+        raise RuntimeError(f"This Python's SQLite has no FTS5 support: {e}")
+    connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+    connection.commit()
+    return connection
+
+def folder_metadata(folder):
+    """{'program', 'year', 'language'} of a download folder
+
+    Taken from the configuration in its run journal; older folders without
+    one fall back on the folder name (no language then).
+    """
+    config = RunJournal.load(folder).config
+    if config:
+        return {'program': config.get('program_name'),
+                'year': ase_extract.to_number(config.get('target_year', '').rpartition(' ')[2]),
+                'language': config.get('language')}
+    match = FOLDER_NAME.match(os.path.basename(folder))
+    if match:
+        return {'program': match.group('program').replace('_', ' '),
+                'year': ase_extract.to_number(match.group('year')), 'language': None}
+    return {'program': None, 'year': None, 'language': None}
+
+def subject_name(manifest, relpath):
+    """Subject name as the site shows it, or the file name if the manifest lacks it"""
+    entry = manifest.get(relpath)
+    if entry and entry.get('name'):
+        return entry['name']
+    return os.path.splitext(os.path.basename(relpath))[0].replace('_', ' ')
+
+def describe_documents(folders, logger):
+    """Every PDF of the folders as a documents row (without pages/error), by path"""
+    documents = {}
+    manifests = {}
+    metadata = {}
+    for folder, relpath, semester, sha256 in ase_extract.scan_folders(folders, logger):
+        if folder not in manifests:
+            manifests[folder] = Manifest.load(folder)
+            metadata[folder] = folder_metadata(folder)
+        path = os.path.abspath(os.path.join(folder, relpath))
+        documents[path] = dict(metadata[folder], path=path, folder=os.path.abspath(folder), sha256=sha256,
+                               subject=subject_name(manifests[folder], relpath),
+                               semester=ase_extract.to_number(semester.rpartition('_')[2]))
+    return documents
+
+def put_document(connection, document, body, pages, error):
+    """Insert or replace one document and its text"""
+    row = connection.execute("SELECT id FROM documents WHERE path = ?", (document['path'],)).fetchone()
+    if row:
+        connection.execute("DELETE FROM search WHERE rowid = ?", row)
+        connection.execute("DELETE FROM documents WHERE id = ?", row)
+    cursor = connection.execute(
+        "INSERT INTO documents (path, folder, sha256, subject, program, year, semester, language, pages, error, "
+        "indexed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (document['path'], document['folder'], document['sha256'], document['subject'], document['program'],
+         document['year'], document['semester'], document['language'], pages, error,
+         datetime.now().isoformat(timespec='seconds')))
+    connection.execute("INSERT INTO search (rowid, subject, program, body) VALUES (?, ?, ?, ?)",
+                       (cursor.lastrowid, document['subject'], document['program'], body))
+
+def indexed_text(connection, sha256):
+    """(body, pages, error) of a PDF already in the index, or None"""
+    return connection.execute(
+        "SELECT search.body, documents.pages, documents.error FROM documents "
+        "JOIN search ON search.rowid = documents.id WHERE documents.sha256 = ? LIMIT 1", (sha256,)).fetchone()
+
+def index_folders(folders, logger, path=None, workers=None):
+    """Bring the index up to date with the folders
+
+    Returns {'indexed', 'reused', 'unchanged', 'removed'} counts.
+    """
+    if not ase_extract.PYPDF_AVAILABLE:
+        raise RuntimeError("Indexing needs pypdf: pip install pypdf")
+    start = time.monotonic()
+    documents = describe_documents(folders, logger)
+    stats = {'indexed': 0, 'reused': 0, 'unchanged': 0, 'removed': 0}
+
+    connection = open_index(path)
+    try:
+        folder_keys = sorted({os.path.abspath(folder) for folder in folders})
+        known = {}
+        for folder in folder_keys:
+            known.update(connection.execute("SELECT path, sha256 FROM documents WHERE folder = ?", (folder,)))
+
+        pending = {}
+        written = 0
+        for document in documents.values():
+            if known.get(document['path']) == document['sha256']:
+                stats['unchanged'] += 1
+                continue
+            text = indexed_text(connection, document['sha256'])
+            if text is not None:
+                put_document(connection, document, *text)
+                stats['reused'] += 1
+                written += 1
+            else:
+                pending.setdefault(document['sha256'], []).append(document)
+        logger.info(f"{len(documents)} PDF(s) found: {stats['unchanged']} unchanged, {stats['reused']} copied "
+                    f"from identical PDFs, {len(pending)} to extract")
+
+        paths = [group[0]['path'] for group in pending.values()]
+        extract = functools.partial(ase_extract.extract_text, max_pages=None)
+        for group, (text, pages, error) in zip(pending.values(), ase_extract.map_pool(extract, paths, workers, logger)):
+            if error:
+                logger.warning(f"Could not extract {group[0]['path']}: {error}")
+            for document in group:
+                put_document(connection, document, text, pages, error)
+                stats['indexed'] += 1
+                written += 1
+            if written >= COMMIT_EVERY:
+                connection.commit()
+                written = 0
+
+        # PDFs deleted from the folders, and folders deleted altogether
+        gone = set(known) - set(documents)
+        for (folder,) in connection.execute("SELECT DISTINCT folder FROM documents").fetchall():
+            if not os.path.isdir(folder):
+                gone.update(path for (path,) in connection.execute(
+                    "SELECT path FROM documents WHERE folder = ?", (folder,)))
+        for path_on_disk in gone:
+            row = connection.execute("SELECT id FROM documents WHERE path = ?", (path_on_disk,)).fetchone()
+            connection.execute("DELETE FROM search WHERE rowid = ?", row)
+            connection.execute("DELETE FROM documents WHERE id = ?", row)
+            stats['removed'] += 1
+        connection.commit()
+        if stats['indexed'] or stats['removed']:
+            connection.execute("INSERT INTO search (search) VALUES ('optimize')")
+            connection.commit()
+    finally:
+        connection.close()
+
+    logger.info(f"Index updated in {time.monotonic() - start:.1f}s: {stats['indexed']} extracted, "
+                f"{stats['reused']} copied, {stats['unchanged']} unchanged, {stats['removed']} removed")
+    return stats
+
+def quote_terms(query):
+    """The query as plain terms, for input that is not valid FTS5 syntax"""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def search(query, path=None, limit=20, program=None, year=None, semester=None, language=None):
+    """Ranked hits for an FTS5 query, best first
+
+    program matches any part of the program name; year and semester take
+    numbers or roman numerals.
+    """
+    path = path or index_path()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No search index at {path}; run 'python ase_search.py index' first")
+    filters = []
+    parameters = []
+    if program:
+        filters.append("documents.program LIKE ?")
+        parameters.append(f"%{program}%")
+    for column, value in (('year', year), ('semester', semester)):
+        if value is not None:
+            filters.append(f"documents.{column} = ?")
+            parameters.append(ase_extract.to_number(str(value)))
+    if language:
+        filters.append("documents.language = ?")
+        parameters.append(language)
+
+    sql = ("SELECT documents.path, documents.subject, documents.program, documents.year, documents.semester, "
+           "documents.language, snippet(search, 2, '[', ']', ' ... ', 12), "
+           f"bm25(search, {', '.join(map(str, RANK_WEIGHTS))}) AS score "
+           "FROM search JOIN documents ON documents.id = search.rowid "
+           f"WHERE search MATCH ? {''.join(' AND ' + f for f in filters)} ORDER BY score LIMIT ?")
+    # as_uri percent-encodes '?', '#' and '%' and handles Windows drive letters
+    connection = sqlite3.connect(pathlib.Path(os.path.abspath(path)).as_uri() + "?mode=ro", uri=True)
+    try:
+        try:
+            rows = connection.execute(sql, [query] + parameters + [limit]).fetchall()
+        except sqlite3.OperationalError:
+            # Not FTS5 syntax (e.g. a stray quote or colon): search the words as typed
+            rows = connection.execute(sql, [quote_terms(query)] + parameters + [limit]).fetchall()
+    finally:
+        connection.close()
+    return [SearchHit(*row) for row in rows]
+
+def display_path(path):
+    """Path relative to ASE_PDFs when it is inside it"""
+    base = os.path.abspath(downloader.BASE_DOWNLOAD_DIR)
+    return os.path.relpath(path, base) if path.startswith(base + os.sep) else path
+
+def print_hits(hits, seconds):
+    for number, hit in enumerate(hits, 1):
+        details = ', '.join(str(part) for part in (
+            hit.program, f"anul {hit.year}" if hit.year else None,
+            f"semestrul {hit.semester}" if hit.semester else None, hit.language) if part)
+        print(f"{number:3}. {hit.subject}" + (f" ({details})" if details else ""))
+        print(f"     {display_path(hit.path)}")
+        if hit.snippet:
+            print(f"     {' '.join(hit.snippet.split())}")
+    print(f"\n{len(hits)} hit(s) in {seconds * 1000:.1f} ms")
+
+def main():
+    """Index the downloaded PDFs or search them from the command line"""
+    parser = argparse.ArgumentParser(description="Full-text search over the downloaded fișe")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    index = commands.add_parser('index', help="add new and changed PDFs to the index")
+    index.add_argument('folders', nargs='*',
+                       help=f"download folders (default: every folder in {downloader.BASE_DOWNLOAD_DIR})")
+    index.add_argument('--workers', type=int, default=downloader.EXTRACT_WORKERS,
+                       help="worker processes (default: one per core)")
+    index.add_argument('--index', default=None, help=f"index file (default: {index_path()})")
+
+    query = commands.add_parser('query', help="search the index")
+    query.add_argument('query', help='FTS5 query: words, "exact phrase", prefix*, OR, NOT')
+    query.add_argument('--limit', type=int, default=20, help="hits to show (default: 20)")
+    query.add_argument('--program', help="only programs whose name contains this")
+    query.add_argument('--year', help="only this study year (3 or III)")
+    query.add_argument('--semester', help="only this semester (1 or I)")
+    query.add_argument('--language', choices=['romanian', 'english'], help="only PDFs of this language")
+    query.add_argument('--index', default=None, help=f"index file (default: {index_path()})")
+    args = parser.parse_args()
+
+    if args.command == 'query':
+        start = time.perf_counter()
+        try:
+            hits = search(args.query, args.index, args.limit, args.program, args.year, args.semester, args.language)
+        except FileNotFoundError as e:
+            print(e)
+            return 1
+        print_hits(hits, time.perf_counter() - start)
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    folders = args.folders or ase_extract.download_folders()
+    if not folders:
+        print("No download folders found.")
+        return 1
+    try:
+        index_folders(folders, logging.getLogger(__name__), args.index, args.workers)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
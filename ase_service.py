@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Download Service
+Long-running local service for many users (e.g. a student association),
+built on navigate_to_subjects, find_obligatory_subjects and download_pdfs:
+
+- HTTP/JSON job API: submit a configuration, poll its status and progress,
+  list and fetch the resulting PDFs
+- coalescing: a submission identical to a queued or running job, or to one
+  that finished less than SERVICE_RESULT_TTL ago, joins that job, so N users
+  asking for the same program/year cost the site one navigation and one
+  postback per subject. Configurations are compared after normalization
+  (keyword case and order, whitespace, study form diacritics), and a later
+  job skips the postback of every PDF fetched less than SERVICE_SESSION_TTL
+  ago (see downloader.fresh_subjects)
+- warm sessions: the session that reached a subjects page is kept for
+  SERVICE_SESSION_TTL and reused by the next job of that configuration
+  (without navigating again)
+
+Jobs run one at a time on a runner thread, since the downloader keeps the
+configuration in module globals; each job uses SERVICE_WORKERS parallel
+downloads and syncs the stable folder of its configuration (like --sync).
+
+API:
+    POST /jobs                     body: configuration JSON (USER_CONFIG keys)
+                                   -> 202 job (with "coalesced": true/false)
+    GET  /jobs                     all known jobs
+    GET  /jobs/<id>                status, progress and result of one job
+    GET  /jobs/<id>/files/<path>   one PDF of a finished job
+    GET  /health                   queue length and running job
+
+USAGE:
+    python ase_service.py [--host 127.0.0.1] [--port 8642] [--workers 2]
+    curl -X POST localhost:8642/jobs -d @config.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import ase_universal_downloader as downloader
+from ase_events import ProgressTracker, describe
+from ase_storage import Manifest
+
+
+def clean_config(config):
+    """Copy of a submitted configuration with whitespace and the study form normalized
+
+    Raises ValueError for an invalid configuration.
+    """
+    if not isinstance(config, dict):
+        raise ValueError("The configuration must be a JSON object")
+    config = {name: ' '.join(value.split()) if isinstance(value, str) else value for name, value in config.items()}
+    if isinstance(config.get('faculty_keywords'), str):
+        config['faculty_keywords'] = [config['faculty_keywords']]
+    if isinstance(config.get('faculty_keywords'), list):
+        config['faculty_keywords'] = [' '.join(str(keyword).split()) for keyword in config['faculty_keywords']]
+    config = downloader.normalize_config(config)
+    downloader.validate_config(config)
+    return config
+
+def config_key(config):
+    """Identity of a configuration: identical keys are coalesced into one job
+
+    Faculty keywords are matched case-insensitively (see find_faculty), so
+    their case and order don't make a different configuration.
+    """
+    key = dict(config, faculty_keywords=sorted({keyword.casefold() for keyword in config['faculty_keywords']}))
+    return json.dumps(key, sort_keys=True, ensure_ascii=False)
+
+class Job:
+    """One download of a configuration, shared by every coalesced submission"""
+
+    def __init__(self, config):
+        self.id = uuid.uuid4().hex[:12]
+        self.config = config
+        self.key = config_key(config)
+        self.status = 'queued'
+        self.submissions = 1
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.result = None
+        self.tracker = ProgressTracker()
+
+    def reusable(self, result_ttl):
+        """Whether a new identical submission can join this job"""
+        if self.status in ('queued', 'running'):
+            return True
+        return self.status == 'done' and time.time() - self.finished < result_ttl
+
+    def to_dict(self, files=True):
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'config': self.config,
+            'submissions': self.submissions,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error,
+        }
+        if self.status == 'running':
+            snapshot = self.tracker.snapshot()
+            data['progress'] = dict(snapshot, text=describe(snapshot))
+        if self.result:
+            data['result'] = self.result if files else {k: v for k, v in self.result.items() if k != 'files'}
+        return data
+
+class SessionPool:
+    """Sessions that reached a subjects page, kept warm per configuration key"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def checkout(self, key):
+        """(session, soup) of a warm session, or (None, None); the entry is removed"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return None, None
+        session, soup, parked = entry
+        if time.monotonic() - parked > self.ttl:
+            session.close()
+            return None, None
+        return session, soup
+
+    def checkin(self, key, session, soup):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            self._entries[key] = (session, soup, time.monotonic())
+        if old and old[0] is not session:
+            old[0].close()
+
+    def prune(self):
+        """Close sessions idle for longer than the TTL"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if now - entry[2] > self.ttl]
+            sessions = [self._entries.pop(key)[0] for key in expired]
+        for session in sessions:
+            session.close()
+
+class DownloadService:
+    """Job queue, coalescing and runner thread behind the HTTP API"""
+
+    def __init__(self, logger, workers=None, result_ttl=None, session_ttl=None, retention=None):
+        self.logger = logger
+        self.workers = workers or downloader.SERVICE_WORKERS
+        self.result_ttl = downloader.SERVICE_RESULT_TTL if result_ttl is None else result_ttl
+        self.retention = downloader.SERVICE_JOB_RETENTION if retention is None else retention
+        self.sessions = SessionPool(downloader.SERVICE_SESSION_TTL if session_ttl is None else session_ttl)
+        self.jobs = {}
+        self.by_key = {}
+        self.running = None
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._runner = threading.Thread(target=self._run, name="service-runner", daemon=True)
+
+    def start(self):
+        self._runner.start()
+
+    def submit(self, config):
+        """Queue a configuration, or join an identical job; returns (job, coalesced)
+
+        Raises ValueError for an invalid configuration.
+        """
+        config = clean_config(config)
+
+        with self._lock:
+            self.prune()
+            job = self.by_key.get(config_key(config))
+            if job and job.reusable(self.result_ttl):
+                job.submissions += 1
+                return job, True
+            job = Job(config)
+            self.jobs[job.id] = job
+            self.by_key[job.key] = job
+        self._pending.put(job)
+        self.logger.info(f"Job {job.id} queued: {config['program_name']} {config['target_year']} "
+                         f"{config['study_years']}")
+        return job, False
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def health(self):
+        with self._lock:
+            running = self.running
+            jobs = len(self.jobs)
+        return {'status': 'ok', 'queued': self._pending.qsize(),
+                'running': running.id if running else None, 'jobs': jobs}
+
+    def prune(self):
+        """Forget finished jobs older than the retention (call with the lock held)"""
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished and now - job.finished > self.retention:
+                del self.jobs[job_id]
+                if self.by_key.get(job.key) is job:
+                    del self.by_key[job.key]
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            with self._lock:
+                self.running = job
+                job.status = 'running'
+                job.started = time.time()
+            try:
+                result = self.run_job(job)
+            except Exception as e:
+                self.logger.error(f"Job {job.id} failed: {e}")
+                # finished is set together with the status: submit() reads both under the lock
+                with self._lock:
+                    job.error = str(e)
+                    job.finished = time.time()
+                    job.status = 'failed'
+                    self.running = None
+            else:
+                with self._lock:
+                    job.result = result
+                    job.finished = time.time()
+                    job.status = 'done'
+                    self.running = None
+            finally:
+                self.sessions.prune()
+
+    def run_job(self, job):
+        """Navigate (or reuse a warm session) and sync the configuration's folder"""
+        logger = self.logger
+        config = job.config
+        downloader.USER_CONFIG = config
+        downloader.DOWNLOAD_DIR = os.path.join(downloader.BASE_DOWNLOAD_DIR, downloader.config_folder_name(config))
+        channel = downloader.get_progress_channel()
+        channel.subscribe(job.tracker)
+        downloader.start_metrics()
+        try:
+            session, soup = self.sessions.checkout(job.key)
+            if soup is not None:
+                logger.info(f"Job {job.id}: reusing a warm session")
+                # A rejected page state makes the first download navigate again
+                session.navigation_cached = True
+            else:
+                session = downloader.create_session()
+                soup = downloader.navigate_to_subjects(session, logger)
+                if not soup:
+                    raise RuntimeError("Could not reach the subjects page")
+
+            subjects = downloader.find_obligatory_subjects(soup, logger)
+            if not subjects:
+                raise RuntimeError("No obligatory subjects found")
+
+            # PDFs an earlier job fetched within the session TTL are not posted back again
+            success = downloader.download_pdfs(session, subjects, soup, logger, workers=self.workers, sync=True,
+                                               fresh_for=self.sessions.ttl)
+            self.sessions.checkin(job.key, session, soup)
+            return job_result(subjects, success)
+        finally:
+            channel.unsubscribe(job.tracker)
+            downloader.finish_metrics(logger)
+            downloader.flush_debug_capture(logger)
+
+def job_result(subjects, success):
+    """Result of a finished job: counts and the PDFs in downloader.DOWNLOAD_DIR"""
+    manifest = Manifest.load(downloader.DOWNLOAD_DIR)
+    files = []
+    for subject in subjects:
+        relpath = downloader.subject_relpath(subject)
+        entry = manifest.get(relpath)
+        if entry and os.path.exists(os.path.join(downloader.DOWNLOAD_DIR, relpath)):
+            files.append({'path': relpath, 'name': entry['name'], 'semester': entry['semester'],
+                          'size': entry['size'], 'sha256': entry['sha256']})
+    return {'success': success, 'total': len(subjects), 'folder': downloader.DOWNLOAD_DIR, 'files': files}
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """HTTP/JSON front end of a DownloadService (set as the class attribute service)"""
+
+    service = None
+    server_version = "ASEDownloadService/1"
+
+    def do_GET(self):
+        parts = [unquote(part) for part in self.path.split('?', 1)[0].strip('/').split('/')]
+        if parts == ['health']:
+            return self.send_json(200, self.service.health())
+        if parts == ['jobs']:
+            return self.send_json(200, {'jobs': [job.to_dict(files=False) for job in self.service.list()]})
+        if len(parts) >= 2 and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if not job:
+                return self.send_json(404, {'error': f"Unknown job: {parts[1]}"})
+            if len(parts) == 2:
+                return self.send_json(200, job.to_dict())
+            if parts[2] == 'files' and len(parts) > 3:
+                return self.send_file(job, '/'.join(parts[3:]))
+        self.send_json(404, {'error': f"Not found: {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self.send_json(404, {'error': f"Not found: {self.path}"})
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            config = json.loads(self.rfile.read(length) or b'null')
+            job, coalesced = self.service.submit(config)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        self.send_json(202, dict(job.to_dict(files=False), coalesced=coalesced))
+
+    def send_file(self, job, relpath):
+        """Stream one PDF listed in the job's result"""
+        files = {entry['path'] for entry in (job.result or {}).get('files', [])}
+        if relpath not in files:
+            return self.send_json(404, {'error': f"No such file in job {job.id}: {relpath}"})
+        path = os.path.join(job.result['folder'], relpath)
+        try:
+            with open(path, 'rb') as f:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/pdf')
+                self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+                self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(relpath)}"')
+                self.end_headers()
+                shutil.copyfileobj(f, self.wfile)
+        except FileNotFoundError:
+            self.send_json(410, {'error': f"File was removed: {relpath}"})
+
+    def send_json(self, status, data):
+        body = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(f"{self.address_string()} - {format % args}")
+
+def serve(host, port, workers, logger):
+    """Run the service until interrupted"""
+    service = DownloadService(logger, workers=workers)
+    service.start()
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"Download service listening on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Download service stopping")
+    finally:
+        server.server_close()
+
+def main():
+    """Start the download service from the command line"""
+    parser = argparse.ArgumentParser(description="Run the ASE PDF download service (HTTP/JSON job API)")
+    parser.add_argument('--host', default=downloader.SERVICE_HOST,
+                        help=f"address to listen on (default: {downloader.SERVICE_HOST})")
+    parser.add_argument('--port', type=int, default=downloader.SERVICE_PORT,
+                        help=f"port to listen on (default: {downloader.SERVICE_PORT})")
+    parser.add_argument('--workers', type=int, default=downloader.SERVICE_WORKERS,
+                        help=f"parallel downloads per job (default: {downloader.SERVICE_WORKERS})")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(downloader.BASE_DOWNLOAD_DIR, "_logs"), exist_ok=True)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler(os.path.join(downloader.BASE_DOWNLOAD_DIR, "_logs",
+                                                                   "service.log"), encoding='utf-8'),
+                                  logging.StreamHandler()])
+    serve(args.host, args.port, args.workers, logging.getLogger(__name__))
+
+if __name__ == "__main__":
+    main()
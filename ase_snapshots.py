@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Snapshot History
+Versioned history of the configuration folders (e.g.
+Informatica_economica_Anul_III_2023-2026), replacing whole-folder copies in
+_archive:
+
+- a snapshot is one small JSON file in _snapshots/<folder>/ listing every
+  PDF of the folder with its SHA-256; the PDFs themselves are the blobs of
+  the content-addressed _store, shared by every folder and snapshot
+- taking a snapshot only stats the files (hashes come from manifest.json),
+  and only PDFs missing from the store are copied in, so it costs
+  O(changed files); a folder that did not change since the last snapshot
+  adds nothing
+- retention keeps the last N snapshots plus the newest one of each of the
+  last D days; blobs no longer used by any snapshot or folder are deleted
+- restore relinks a snapshot's PDFs into the folder (or any other folder),
+  rewriting only the files that differ
+
+USAGE:
+    python ase_snapshots.py list Informatica_economica_Anul_III_2023-2026
+    python ase_snapshots.py diff Informatica_economica_Anul_III_2023-2026 20250301_101500
+    python ase_snapshots.py restore Informatica_economica_Anul_III_2023-2026 20250301_101500 [--target DIR]
+    python ase_snapshots.py prune [--keep-last 10] [--keep-daily 30]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import ase_universal_downloader as downloader
+from ase_storage import (JOURNAL_NAME, MANIFEST_NAME, AtomicFileWriter, BlobStore, Manifest, file_sha256,
+                         find_pdfs)
+
+SNAPSHOT_VERSION = 1
+SNAPSHOTS_DIR = "_snapshots"
+STORE_DIR = "_store"
+# Where older versions moved replaced folders; their PDFs may still link into _store
+ARCHIVE_DIR = "_archive"
+ID_FORMAT = "%Y%m%d_%H%M%S"
+
+# Blobs younger than this are never collected: a running download may have
+# stored one without linking it into its folder yet
+GC_GRACE = 3600
+
+SnapshotInfo = namedtuple('SnapshotInfo', ['id', 'created', 'files', 'size'])
+Changes = namedtuple('Changes', ['added', 'removed', 'changed'])
+
+
+def changes(old_files, new_files):
+    """Relpaths added, removed and changed from one file list to the other"""
+    return Changes(sorted(set(new_files) - set(old_files)),
+                   sorted(set(old_files) - set(new_files)),
+                   sorted(relpath for relpath in set(old_files) & set(new_files)
+                          if old_files[relpath]['sha256'] != new_files[relpath]['sha256']))
+
+def describe_changes(delta):
+    """e.g. '+2 ~1 -0'"""
+    return f"+{len(delta.added)} ~{len(delta.changed)} -{len(delta.removed)}"
+
+def folder_state(folder):
+    """{relpath: entry} of the PDFs in a folder, entries as in its manifest
+
+    Hashes come from the manifest while the size matches; other PDFs are
+    hashed.
+    """
+    manifest = Manifest.load(folder)
+    files = {}
+    for relpath, semester in find_pdfs(folder):
+        size = os.path.getsize(os.path.join(folder, relpath))
+        entry = manifest.get(relpath)
+        if not entry or not entry.get('sha256') or entry.get('size') != size:
+            entry = dict(entry or {'name': os.path.splitext(os.path.basename(relpath))[0], 'semester': semester},
+                         size=size, sha256=file_sha256(os.path.join(folder, relpath)))
+        files[relpath] = entry
+    return files
+
+class SnapshotHistory:
+    """Snapshots of one configuration folder
+
+    Args:
+        base: Folder holding the configuration folders (ASE_PDFs), with
+            _store and _snapshots
+        name: Name of the configuration folder
+    """
+
+    def __init__(self, base, name):
+        self.base = base
+        self.name = name
+        self.folder = os.path.join(base, name)
+        self.directory = os.path.join(base, SNAPSHOTS_DIR, name)
+        self.store = BlobStore(os.path.join(base, STORE_DIR))
+
+    @classmethod
+    def for_folder(cls, folder):
+        folder = os.path.abspath(folder)
+        return cls(os.path.dirname(folder), os.path.basename(folder))
+
+    def _path(self, snapshot_id):
+        return os.path.join(self.directory, f"{snapshot_id}.json")
+
+    def ids(self):
+        """Snapshot ids, oldest first"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len('.json')] for name in names if name.endswith('.json'))
+
+    def load(self, snapshot_id):
+        try:
+            with open(self._path(snapshot_id), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"No snapshot {snapshot_id} of {self.name}")
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot {snapshot_id} has an unsupported version")
+        return snapshot
+
+    def list(self):
+        """SnapshotInfo of every snapshot, oldest first"""
+        infos = []
+        for snapshot_id in self.ids():
+            try:
+                snapshot = self.load(snapshot_id)
+            except (OSError, ValueError):
+                continue
+            files = snapshot['files']
+            infos.append(SnapshotInfo(snapshot_id, snapshot['created'], len(files),
+                                      sum(entry['size'] for entry in files.values())))
+        return infos
+
+    def latest(self):
+        """Newest readable snapshot as (id, snapshot), or (None, None)"""
+        for snapshot_id in reversed(self.ids()):
+            try:
+                return snapshot_id, self.load(snapshot_id)
+            except (OSError, ValueError):
+                continue
+        return None, None
+
+    def take(self, logger, reason=None):
+        """Record the folder's current state; returns the snapshot id
+
+        Returns the latest id if nothing changed since it, and None for a
+        missing or empty folder.
+        """
+        if not os.path.isdir(self.folder):
+            return None
+        files = folder_state(self.folder)
+        if not files:
+            return None
+
+        latest_id, latest = self.latest()
+        if latest and not any(changes(latest['files'], files)):
+            logger.info(f"{self.name}: unchanged since snapshot {latest_id}")
+            return latest_id
+
+        stored = 0
+        for relpath, entry in files.items():
+            # Folders filled before the store existed (or with STORE_ENABLED off)
+            # hold plain files: their blobs are added once
+            if not os.path.exists(self.store.path(entry['sha256'])):
+                with open(os.path.join(self.folder, relpath), 'rb') as f:
+                    stored += self.store.put(entry['sha256'], f)
+
+        now = datetime.now()
+        snapshot_id = now.strftime(ID_FORMAT)
+        suffix = 1
+        while os.path.exists(self._path(snapshot_id)):
+            suffix += 1
+            snapshot_id = f"{now.strftime(ID_FORMAT)}_{suffix}"
+        snapshot = {'version': SNAPSHOT_VERSION, 'folder': self.name, 'created': now.isoformat(timespec='seconds'),
+                    'reason': reason, 'files': dict(sorted(files.items()))}
+        os.makedirs(self.directory, exist_ok=True)
+        with AtomicFileWriter(self._path(snapshot_id)) as writer:
+            writer.write(json.dumps(snapshot, indent=1, ensure_ascii=False).encode('utf-8'))
+            writer.commit()
+
+        delta = changes(latest['files'] if latest else {}, files)
+        logger.info(f"{self.name}: snapshot {snapshot_id} ({len(files)} PDFs, {describe_changes(delta)}, "
+                    f"{stored} new blob(s))")
+        return snapshot_id
+
+    def restore(self, snapshot_id, logger, target=None):
+        """Make target (the folder itself by default) hold exactly the snapshot's PDFs
+
+        The folder's current state is snapshotted first, so a restore can be
+        undone. Returns the changes applied.
+        """
+        snapshot = self.load(snapshot_id)
+        files = snapshot['files']
+        missing = [relpath for relpath, entry in files.items()
+                   if not os.path.exists(self.store.path(entry['sha256']))]
+        if missing:
+            raise FileNotFoundError(f"{len(missing)} PDF(s) of snapshot {snapshot_id} are missing from the store, "
+                                    f"e.g. {missing[0]}")
+
+        target = os.path.abspath(target or self.folder)
+        if target == os.path.abspath(self.folder):
+            self.take(logger, reason=f"before restoring {snapshot_id}")
+        current = folder_state(target) if os.path.isdir(target) else {}
+        delta = changes(current, files)
+
+        for relpath in delta.added + delta.changed:
+            path = os.path.join(target, relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.store.link(files[relpath]['sha256'], path)
+        for relpath in delta.removed:
+            os.remove(os.path.join(target, relpath))
+            try:
+                os.rmdir(os.path.dirname(os.path.join(target, relpath)))
+            except OSError:
+                pass  # Not empty yet
+
+        Manifest(target, dict(files)).save()
+        # The journal described the run that produced the replaced files
+        try:
+            os.remove(os.path.join(target, JOURNAL_NAME))
+        except FileNotFoundError:
+            pass
+        logger.info(f"Restored snapshot {snapshot_id} of {self.name} into {target} ({describe_changes(delta)})")
+        return delta
+
+    def prune(self, keep_last, keep_daily, logger):
+        """Delete snapshots beyond the last keep_last and the newest of each of the last keep_daily days
+
+        Returns the deleted ids.
+        """
+        keep = set()
+        days = set()
+        for position, info in enumerate(reversed(self.list())):
+            day = info.created[:10]
+            if position < keep_last:
+                keep.add(info.id)
+            if day not in days and len(days) < keep_daily:
+                days.add(day)
+                keep.add(info.id)
+
+        removed = [snapshot_id for snapshot_id in self.ids() if snapshot_id not in keep]
+        for snapshot_id in removed:
+            os.remove(self._path(snapshot_id))
+        if removed:
+            logger.info(f"{self.name}: pruned {len(removed)} snapshot(s)")
+        return removed
+
+def histories(base):
+    """SnapshotHistory of every folder with snapshots under base"""
+    try:
+        names = sorted(entry.name for entry in os.scandir(os.path.join(base, SNAPSHOTS_DIR)) if entry.is_dir())
+    except FileNotFoundError:
+        return []
+    return [SnapshotHistory(base, name) for name in names]
+
+def manifest_folders(base):
+    """Folders under base that can hold a manifest of PDFs linked from _store
+
+    Program folders sit directly in base; Run_* batch folders and the old
+    _archive keep them one level deeper. Nothing else (_cache, _logs, the
+    semester folders) is listed, so the check stays cheap on a large tree.
+    """
+    try:
+        entries = sorted(os.scandir(base), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return []
+    folders = []
+    for entry in entries:
+        if not entry.is_dir() or (entry.name.startswith(('_', '.')) and entry.name != ARCHIVE_DIR):
+            continue
+        if os.path.exists(os.path.join(entry.path, MANIFEST_NAME)):
+            folders.append(entry.path)
+            continue
+        folders.extend(child.path for child in os.scandir(entry.path)
+                       if child.is_dir() and os.path.exists(os.path.join(child.path, MANIFEST_NAME)))
+    return folders
+
+def referenced_blobs(base):
+    """SHA-256 of every PDF listed by a snapshot or by a program folder's manifest"""
+    hashes = set()
+    for history in histories(base):
+        for snapshot_id in history.ids():
+            try:
+                hashes.update(entry['sha256'] for entry in history.load(snapshot_id)['files'].values())
+            except (OSError, ValueError):
+                # An unreadable snapshot makes it impossible to know what is unused
+                raise RuntimeError(f"Snapshot {snapshot_id} of {history.name} is unreadable")
+    for folder in manifest_folders(base):
+        hashes.update(entry.get('sha256') for entry in Manifest.load(folder).entries.values())
+    return hashes
+
+def collect_garbage(base, logger):
+    """Delete store blobs used by no snapshot and no folder; returns bytes freed
+
+    A blob still hardlinked from anywhere (st_nlink > 1) is kept.
+    """
+    root = os.path.join(base, STORE_DIR)
+    if not os.path.isdir(root):
+        return 0
+    try:
+        referenced = referenced_blobs(base)
+    except Exception as e:
+        logger.warning(f"Store garbage collection skipped: {e}")
+        return 0
+
+    freed = 0
+    removed = 0
+    now = time.time()
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if not name.endswith('.pdf') or name[:-len('.pdf')] in referenced:
+                continue
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            if stat.st_nlink > 1 or now - stat.st_mtime < GC_GRACE:
+                continue
+            os.remove(path)
+            freed += stat.st_size
+            removed += 1
+    if removed:
+        logger.info(f"Store: deleted {removed} unused PDF(s), {freed / (1024 * 1024):.1f} MB freed")
+    return freed
+
+def record_snapshot(folder, logger, keep_last, keep_daily, reason=None):
+    """Snapshot a configuration folder and apply the retention policy
+
+    Returns the snapshot id, or None if there was nothing to snapshot.
+    """
+    history = SnapshotHistory.for_folder(folder)
+    snapshot_id = history.take(logger, reason)
+    if history.prune(keep_last, keep_daily, logger):
+        collect_garbage(history.base, logger)
+    return snapshot_id
+
+def print_list(history):
+    previous = {}
+    infos = history.list()
+    if not infos:
+        print(f"No snapshots of {history.name}")
+        return
+    print(f"Snapshots of {history.name}:")
+    for info in infos:
+        files = history.load(info.id)['files']
+        print(f"  {info.id}  {info.created}  {info.files:4} PDFs  {info.size / (1024 * 1024):7.1f} MB  "
+              f"{describe_changes(changes(previous, files))}")
+        previous = files
+
+def print_diff(history, old_id, new_id):
+    old = history.load(old_id)['files']
+    new = history.load(new_id)['files'] if new_id else folder_state(history.folder)
+    delta = changes(old, new)
+    print(f"{old_id} -> {new_id or 'current folder'}: {describe_changes(delta)}")
+    for sign, relpaths in (('+', delta.added), ('~', delta.changed), ('-', delta.removed)):
+        for relpath in relpaths:
+            print(f"  {sign} {relpath}")
+
+def main():
+    """Inspect, restore and prune snapshots from the command line"""
+    parser = argparse.ArgumentParser(description="Snapshot history of the download folders")
+    parser.add_argument('--base', default=downloader.BASE_DOWNLOAD_DIR,
+                        help=f"downloads folder (default: {downloader.BASE_DOWNLOAD_DIR})")
+    commands = parser.add_subparsers(dest='command', required=True)
+    listing = commands.add_parser('list', help="snapshots of a folder (every folder by default)")
+    listing.add_argument('folder', nargs='?')
+    diff = commands.add_parser('diff', help="PDFs changed since a snapshot (or between two)")
+    diff.add_argument('folder')
+    diff.add_argument('old')
+    diff.add_argument('new', nargs='?', help="second snapshot (default: the folder as it is now)")
+    restore = commands.add_parser('restore', help="bring a folder back to a snapshot")
+    restore.add_argument('folder')
+    restore.add_argument('snapshot')
+    restore.add_argument('--target', help="restore into this folder instead")
+    prune = commands.add_parser('prune', help="apply the retention policy to every folder")
+    prune.add_argument('--keep-last', type=int, default=downloader.SNAPSHOT_KEEP_LAST,
+                       help=f"snapshots kept per folder (default: {downloader.SNAPSHOT_KEEP_LAST})")
+    prune.add_argument('--keep-daily', type=int, default=downloader.SNAPSHOT_KEEP_DAILY,
+                       help=f"days with one snapshot kept (default: {downloader.SNAPSHOT_KEEP_DAILY})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+    if args.command == 'prune':
+        for history in histories(args.base):
+            history.prune(args.keep_last, args.keep_daily, logger)
+        collect_garbage(args.base, logger)
+        return 0
+
+    if args.command == 'list' and not args.folder:
+        for history in histories(args.base):
+            print_list(history)
+        return 0
+    history = SnapshotHistory(args.base, os.path.basename(os.path.normpath(args.folder)))
+    try:
+        if args.command == 'list':
+            print_list(history)
+        elif args.command == 'diff':
+            print_diff(history, args.old, args.new)
+        else:
+            history.restore(args.snapshot, logger, args.target)
+    except (ValueError, FileNotFoundError) as e:
+        print(e)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Storage Helpers
+Crash-safe file writes for downloaded PDFs:
+
+- AtomicFileWriter: writes into a hidden temp file next to the target,
+  fsyncs it and renames it over the final name only when complete, so a
+  crash never leaves a truncated PDF under its real name
+- ByteBudget: caps the bytes held in memory by all downloads together
+- write_stream_atomic / PDFSink: stream response chunks through both of
+  the above, checking the %PDF magic bytes before anything touches the disk
+- BlobStore: content-addressed PDF store; program folders hold hardlinks
+  (or symlinks/copies) to it, so identical PDFs are kept once
+- Manifest: per-folder record of downloaded PDFs used by sync mode
+- RunJournal: append-only log of a run, so an interrupted run can resume
+- NavigationCache: reached pages and cookies, so warm runs skip navigation
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter, namedtuple
+from datetime import datetime
+
+PDF_MAGIC = b'%PDF'
+
+
+class ByteBudget:
+    """Process-wide cap on in-flight download bytes
+
+    A single request larger than the whole budget is still let through
+    once nothing else is in flight, so oversized chunks cannot deadlock.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size):
+        with self._condition:
+            while self.in_flight and self.in_flight + size > self.max_bytes:
+                self._condition.wait()
+            self.in_flight += size
+
+    def try_acquire(self, size, reserve=0):
+        """Take size bytes only if they fit in the budget with reserve bytes to spare; never blocks"""
+        with self._condition:
+            if self.in_flight + size + reserve > self.max_bytes:
+                return False
+            self.in_flight += size
+            return True
+
+    def release(self, size):
+        with self._condition:
+            self.in_flight -= size
+            self._condition.notify_all()
+
+class AtomicFileWriter:
+    """Write a file through a temp file, then fsync and rename on commit()
+
+    Usable as a context manager: leaving the block without commit()
+    (including on an exception) removes the temp file.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.size = 0
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, self.temp_path = tempfile.mkstemp(prefix='.', suffix='.part', dir=directory)
+        self._file = os.fdopen(fd, 'wb')
+        self._committed = False
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        """Flush to disk and atomically move the temp file to its final name"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.temp_path, self.filepath)
+        self._committed = True
+        fsync_directory(os.path.dirname(os.path.abspath(self.filepath)))
+        return self.size
+
+    def abort(self):
+        if self._committed:
+            return
+        self._file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.abort()
+        return False
+
+def fsync_directory(directory):
+    """Persist a rename by syncing its directory (no-op where unsupported, e.g. Windows)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def budgeted_chunks(chunks, budget, chunk_size):
+    """Yield chunks, holding chunk_size bytes of the budget while each one is in use"""
+    iterator = iter(chunks)
+    while True:
+        if budget:
+            budget.acquire(chunk_size)
+        try:
+            chunk = next(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+        finally:
+            if budget:
+                budget.release(chunk_size)
+
+# write_seconds: time spent persisting the file after the last chunk (fsync, rename, store link)
+StreamResult = namedtuple('StreamResult', ['filepath', 'size', 'sha256', 'written', 'write_seconds'],
+                          defaults=(0.0,))
+
+class PDFSink:
+    """Receives a download chunk by chunk and stores it crash-safely
+
+    The leading bytes are checked against the magic before anything touches
+    the disk. When compare_sha256 is given (sync mode) or a BlobStore is
+    used, the body is spooled until its hash is known: an unchanged PDF
+    costs no disk writes at all, and a PDF already in the store only costs
+    a link. The spool stays in memory (up to spool_max bytes) only while
+    its bytes fit in the budget; otherwise it moves to a temp file, so all
+    downloads together never hold more than the budget.
+    """
+
+    def __init__(self, get_filepath, compare_sha256=None, spool_max=8 * 1024 * 1024, magic=PDF_MAGIC,
+                 store=None, budget=None, reserve=0):
+        self.get_filepath = get_filepath
+        self.compare_sha256 = compare_sha256
+        self.spool_max = spool_max
+        self.magic = magic
+        self.store = store
+        self.budget = budget
+        # Budget left free for the chunks being received (see budgeted_chunks)
+        self.reserve = reserve
+        self.head = b''
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self._out = None
+        self._in_memory = False
+        self._held = 0
+
+    def feed(self, chunk):
+        """Accept one chunk; returns False once the body is known not to match the magic"""
+        if not chunk:
+            return True
+
+        if self._out is None:
+            self.head += chunk
+            if len(self.head) < len(self.magic):
+                return True
+            if not self.head.startswith(self.magic):
+                return False
+            chunk, self.head = self.head, b''
+            if self.compare_sha256 or self.store:
+                self._out = tempfile.SpooledTemporaryFile(max_size=self.spool_max)
+                self._in_memory = True
+            else:
+                self._out = AtomicFileWriter(self.get_filepath())
+
+        if self._in_memory:
+            self._hold(len(chunk))
+        self.hasher.update(chunk)
+        self._out.write(chunk)
+        self.size += len(chunk)
+        return True
+
+    def _hold(self, size):
+        """Charge size more spooled bytes to the budget, or move the spool to disk"""
+        if self.size + size > self.spool_max or (self.budget and not self.budget.try_acquire(size, self.reserve)):
+            # Waiting for budget here could deadlock workers that each hold part of it
+            self._out.rollover()
+            self._in_memory = False
+            self._release()
+        elif self.budget:
+            self._held += size
+
+    def _release(self):
+        if self.budget and self._held:
+            self.budget.release(self._held)
+        self._held = 0
+
+    def finish(self):
+        """Complete the download; returns a StreamResult, or None if the body was not a PDF"""
+        start = time.monotonic()
+        try:
+            result = self._persist()
+        finally:
+            self._release()
+        return result._replace(write_seconds=time.monotonic() - start) if result else None
+
+    def _persist(self):
+        if self._out is None:
+            # Body shorter than the magic (or empty)
+            return None
+
+        sha256 = self.hasher.hexdigest()
+        if isinstance(self._out, AtomicFileWriter):
+            return StreamResult(self._out.filepath, self._out.commit(), sha256, True)
+
+        filepath = self.get_filepath()
+        with self._out as spool:
+            if sha256 == self.compare_sha256:
+                return StreamResult(filepath, self.size, sha256, False)
+
+            spool.seek(0)
+            if self.store:
+                self.store.put(sha256, spool)
+                self.store.link(sha256, filepath)
+                return StreamResult(filepath, self.size, sha256, True)
+
+            with AtomicFileWriter(filepath) as writer:
+                for chunk in iter(lambda: spool.read(1024 * 1024), b''):
+                    writer.write(chunk)
+                return StreamResult(filepath, writer.commit(), sha256, True)
+
+    def abort(self):
+        if self._out is not None:
+            if isinstance(self._out, AtomicFileWriter):
+                self._out.abort()
+            else:
+                self._out.close()
+        self._release()
+
+def write_stream_atomic(chunks, get_filepath, chunk_size, budget=None, compare_sha256=None, store=None):
+    """Stream chunks into a PDF file via PDFSink
+
+    get_filepath is only called once the magic bytes matched, so rejected
+    responses never create folders or temp files.
+
+    Returns a StreamResult, or None if the stream was not a PDF.
+    """
+    sink = PDFSink(get_filepath, compare_sha256=compare_sha256, store=store, budget=budget,
+                   reserve=chunk_size)
+    stream = budgeted_chunks(chunks, budget, chunk_size)
+    try:
+        for chunk in stream:
+            if not sink.feed(chunk):
+                stream.close()
+                return None
+        return sink.finish()
+    except BaseException:
+        sink.abort()
+        raise
+
+# =============================================================================
+# CONTENT-ADDRESSED STORE
+# =============================================================================
+
+class BlobStore:
+    """PDFs stored once under their SHA-256, e.g. _store/3f/3f9a...e1.pdf
+
+    Program folders get links to the blobs: a hardlink where the filesystem
+    allows it, a symlink otherwise, and a plain copy as the last resort.
+    Replacing a link never modifies the blob it pointed to, because links
+    are swapped in with os.replace like every other write.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.stats = Counter(stored=0, deduplicated=0, hardlink=0, symlink=0, copy=0)
+        self._lock = threading.Lock()
+
+    def path(self, sha256):
+        return os.path.join(self.root, sha256[:2], f"{sha256}.pdf")
+
+    def put(self, sha256, fileobj):
+        """Store the contents of fileobj unless the blob exists; returns True if it was written"""
+        path = self.path(sha256)
+        try:
+            # A fresh mtime keeps collect_garbage (GC_GRACE) off the blob until it is linked
+            os.utime(path)
+            self._count('deduplicated')
+            return False
+        except FileNotFoundError:
+            pass
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with AtomicFileWriter(path) as writer:
+            for chunk in iter(lambda: fileobj.read(1024 * 1024), b''):
+                writer.write(chunk)
+            writer.commit()
+        self._count('stored')
+        return True
+
+    def link(self, sha256, filepath):
+        """Point filepath at a stored blob; returns 'hardlink', 'symlink' or 'copy'"""
+        blob = self.path(sha256)
+        directory = os.path.dirname(os.path.abspath(filepath))
+        temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.link")
+        try:
+            os.link(blob, temp_path)
+            method = 'hardlink'
+        except OSError:
+            if not os.path.exists(blob):
+                # Removed by garbage collection; never leave a dangling symlink behind
+                raise FileNotFoundError(f"Blob {sha256} is missing from the store")
+            try:
+                # Absolute, so the link survives its folder being moved or renamed by hand
+                os.symlink(os.path.abspath(blob), temp_path)
+                method = 'symlink'
+            except (OSError, NotImplementedError):
+                # e.g. FAT32 drives, or Windows without symlink privileges
+                with open(blob, 'rb') as source, AtomicFileWriter(filepath) as writer:
+                    shutil.copyfileobj(source, writer)
+                    writer.commit()
+                self._count('copy')
+                return 'copy'
+
+        try:
+            os.replace(temp_path, filepath)
+        except OSError:
+            os.remove(temp_path)
+            raise
+        fsync_directory(directory)
+        self._count(method)
+        return method
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.stats)
+
+# =============================================================================
+# DOWNLOAD MANIFEST (sync mode)
+# =============================================================================
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+class Manifest:
+    """Per-folder record of every downloaded PDF
+
+    Entries are keyed by the path relative to the folder (e.g.
+    "Semestrul_I/Econometrie.pdf") and hold the subject name, semester,
+    postback target/argument, size, SHA-256, when the file last changed
+    (updated) and when it was last fetched (checked). Thread-safe, so
+    parallel workers can record into the same manifest.
+    """
+
+    def __init__(self, folder, entries=None):
+        self.folder = folder
+        self.entries = entries or {}
+        self.seen = set()
+        self.stats = Counter(new=0, updated=0, unchanged=0, removed=0)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, folder):
+        path = os.path.join(folder, MANIFEST_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(folder)
+        except (OSError, ValueError):
+            # A damaged manifest only costs a full re-download
+            return cls(folder)
+        if data.get('version') != MANIFEST_VERSION:
+            return cls(folder)
+        return cls(folder, data.get('files', {}))
+
+    def get(self, relpath):
+        with self._lock:
+            return self.entries.get(relpath)
+
+    def record(self, relpath, subject, result):
+        with self._lock:
+            self.seen.add(relpath)
+            if relpath not in self.entries:
+                self.stats['new'] += 1
+            elif result.written:
+                self.stats['updated'] += 1
+            else:
+                self.stats['unchanged'] += 1
+            now = datetime.now().isoformat(timespec='seconds')
+            self.entries[relpath] = {
+                'name': subject['name'],
+                'semester': subject.get('semester', 'Unknown'),
+                'target': subject['target'],
+                'argument': subject['argument'],
+                'size': result.size,
+                'sha256': result.sha256,
+                'updated': now if result.written else self.entries.get(relpath, {}).get('updated'),
+                'checked': now,
+            }
+
+    def mark_seen(self, relpath):
+        with self._lock:
+            self.seen.add(relpath)
+
+    def keep(self, relpath):
+        """Count an entry as unchanged without fetching it again"""
+        with self._lock:
+            self.seen.add(relpath)
+            self.stats['unchanged'] += 1
+
+    def removed(self):
+        """Entries that were not seen during this run"""
+        with self._lock:
+            return {relpath: entry for relpath, entry in self.entries.items() if relpath not in self.seen}
+
+    def drop(self, relpaths):
+        with self._lock:
+            for relpath in relpaths:
+                self.entries.pop(relpath, None)
+
+    def save(self):
+        with self._lock:
+            data = {'version': MANIFEST_VERSION,
+                    'updated': datetime.now().isoformat(timespec='seconds'),
+                    'files': dict(sorted(self.entries.items()))}
+        os.makedirs(self.folder, exist_ok=True)
+        with AtomicFileWriter(os.path.join(self.folder, MANIFEST_NAME)) as writer:
+            writer.write(json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+            writer.commit()
+
+def find_pdfs(folder):
+    """(relpath, semester folder) of every PDF in the semester folders of a download folder"""
+    pdfs = []
+    for semester in sorted(os.listdir(folder)):
+        semester_dir = os.path.join(folder, semester)
+        if semester.startswith(('_', '.')) or not os.path.isdir(semester_dir):
+            continue
+        for name in sorted(os.listdir(semester_dir)):
+            if name.lower().endswith('.pdf'):
+                pdfs.append((f"{semester}/{name}", semester))
+    return pdfs
+
+# =============================================================================
+# RUN JOURNAL (resume)
+# =============================================================================
+
+JOURNAL_NAME = "journal.jsonl"
+
+class RunJournal:
+    """Append-only JSON-lines log of one download run
+
+    Events: 'run' (configuration and start time), 'subject' (discovered),
+    'start' (download in flight), 'done' (saved, with size and SHA-256) and
+    'finished' (nothing left to do). Every line is flushed and fsynced, so
+    after a crash the file holds every event up to the last complete line;
+    a torn last line is ignored when loading.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, JOURNAL_NAME)
+        self.config = None
+        self.started = None
+        self.subjects = {}
+        self.in_flight = set()
+        self.done = {}
+        self.finished = False
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, folder):
+        journal = cls(folder)
+        try:
+            with open(journal.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return journal
+
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            kind = event.get('event')
+            if kind == 'run':
+                journal.config = event.get('config')
+                journal.started = event.get('time')
+            elif kind == 'subject':
+                journal.subjects[event['relpath']] = event['subject']
+            elif kind == 'start':
+                journal.in_flight.add(event['relpath'])
+            elif kind == 'done':
+                journal.in_flight.discard(event['relpath'])
+                journal.done[event['relpath']] = {'size': event['size'], 'sha256': event['sha256']}
+            elif kind == 'finished':
+                journal.finished = True
+        return journal
+
+    def resumable(self, config, max_age):
+        """Whether this is an unfinished run of config started less than max_age seconds ago"""
+        if self.finished or self.config != config or not self.started:
+            return False
+        try:
+            started = datetime.fromisoformat(self.started)
+        except ValueError:
+            return False
+        return (datetime.now() - started).total_seconds() < max_age
+
+    def start(self, config):
+        """Begin a new run, discarding the previous journal"""
+        os.makedirs(self.folder, exist_ok=True)
+        with self._lock:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self.config, self.subjects, self.in_flight, self.done = config, {}, set(), {}
+            self.started = datetime.now().isoformat(timespec='seconds')
+            self.finished = False
+            self._append({'event': 'run', 'config': config, 'time': self.started})
+
+    def resume(self):
+        """Keep appending to the loaded journal"""
+        with self._lock:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # Terminate a line torn by the crash before appending to it
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write('\n')
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _append(self, event):
+        self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record_subjects(self, subjects):
+        """Log newly discovered subjects, given as (relpath, subject) pairs"""
+        with self._lock:
+            for relpath, subject in subjects:
+                if relpath not in self.subjects:
+                    self.subjects[relpath] = subject
+                    self._append({'event': 'subject', 'relpath': relpath, 'subject': subject})
+
+    def record_start(self, relpath):
+        with self._lock:
+            self.in_flight.add(relpath)
+            self._append({'event': 'start', 'relpath': relpath})
+
+    def record_done(self, relpath, result):
+        with self._lock:
+            self.in_flight.discard(relpath)
+            self.done[relpath] = {'size': result.size, 'sha256': result.sha256}
+            self._append({'event': 'done', 'relpath': relpath, 'size': result.size, 'sha256': result.sha256})
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+            self._append({'event': 'finished', 'time': datetime.now().isoformat(timespec='seconds')})
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+def file_sha256(filepath, chunk_size=1024 * 1024):
+    """Hash a file on disk"""
+    hasher = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+# =============================================================================
+# NAVIGATION CACHE
+# =============================================================================
+
+class NavigationCache:
+    """On-disk cache of reached pages (HTML, URL and cookies) with a TTL
+
+    Each entry is a small gzip'd JSON file named after a hash of its key,
+    e.g. ('faculty', ['MARKETING']), so unrelated configurations never
+    overwrite each other.
+    """
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key):
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json.gz")
+
+    def get(self, key):
+        """Return the cached entry for key, or None if missing, damaged or expired"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key or time.time() - entry.get('saved', 0) > self.ttl:
+            return None
+        return entry
+
+    def put(self, key, url, html, cookies):
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {'key': key, 'saved': time.time(), 'url': url, 'html': html, 'cookies': cookies}
+        with AtomicFileWriter(self._path(key)) as writer:
+            writer.write(gzip.compress(json.dumps(entry, ensure_ascii=False).encode('utf-8')))
+            writer.commit()
+
+    def invalidate(self, *keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Transport Layer
+HTTP plumbing shared by every engine:
+
+- AdaptiveRateLimiter: token bucket whose refill rate follows AIMD
+  (additive increase while responses are fast, multiplicative decrease
+  on slow responses, 429 and 5xx)
+- CircuitBreaker: stops all requests for a while after repeated failures
+- ASESession: requests.Session with timeouts, a sized connection pool and
+  idempotency-aware retries (jittered exponential backoff), sending every
+  attempt through the limiter and the breaker
+- PostbackClient: ASP.NET form state of one page with a pre-encoded
+  postback body
+"""
+
+import logging
+import random
+import threading
+import time
+
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Methods that can always be repeated safely. ASP.NET postbacks that only
+# navigate or download are safe too, callers mark those with idempotent=True.
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# The two fields that change between postbacks from the same page
+EVENT_FIELDS = ('__EVENTTARGET', '__EVENTARGUMENT')
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+
+class AdaptiveRateLimiter:
+    """Token bucket with an AIMD-controlled refill rate
+
+    Args:
+        start_rate: Initial rate in requests per second
+        min_rate: Floor the rate never drops below
+        max_rate: Ceiling the rate never grows above
+        latency_target: Responses slower than this (seconds) count as congestion
+        increase_step: Requests/second added after every fast response
+        error_factor: Multiplier applied on 429/5xx/connection errors
+        slow_factor: Multiplier applied on slow responses
+        burst: Bucket capacity (how many requests may go out back to back)
+    """
+
+    def __init__(self, start_rate=1.0, min_rate=0.2, max_rate=5.0, latency_target=1.5,
+                 increase_step=0.25, error_factor=0.5, slow_factor=0.8, burst=1.0, logger=None):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("Rate limits must satisfy 0 < min_rate <= max_rate")
+
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(start_rate, min_rate), max_rate)
+        self.latency_target = latency_target
+        self.increase_step = increase_step
+        # Single-worker values that scale() multiplies
+        self._base_max_rate = max_rate
+        self._base_increase_step = increase_step
+        self.error_factor = error_factor
+        self.slow_factor = slow_factor
+        self.burst = burst
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_logged_rate = self.rate
+        # Responses (and failed requests) fed back so far, for run summaries
+        self.request_count = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def scale(self, workers, ceiling=None):
+        """Share the limiter between workers parallel senders
+
+        The ceiling and the additive step grow with the number of workers
+        (never above ceiling), so N workers may reach about N times the
+        single-worker rate; scale(1) restores the single-worker limits.
+        """
+        workers = max(1, workers)
+        with self._lock:
+            max_rate = self._base_max_rate * workers
+            self.max_rate = max(self.min_rate, min(max_rate, ceiling) if ceiling else max_rate)
+            self.increase_step = self._base_increase_step * workers
+            self.rate = min(self.rate, self.max_rate)
+
+    def reserve(self):
+        """Take a token and return how many seconds the caller must wait before sending"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            # A Retry-After pause pushes the whole queue back, keeping its spacing
+            return max(0.0, self._blocked_until - now) + wait
+
+    def acquire(self):
+        """Block until the next request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, latency, status_code=None, retry_after=None):
+        """Feed back one response (status_code None means the request failed outright)"""
+        with self._lock:
+            self.request_count += 1
+            if status_code is None or status_code == 429 or status_code >= 500:
+                self.rate = max(self.min_rate, self.rate * self.error_factor)
+                if retry_after:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+                reason = f"backing off after {'connection error' if status_code is None else f'HTTP {status_code}'}"
+            elif latency > self.latency_target:
+                self.rate = max(self.min_rate, self.rate * self.slow_factor)
+                reason = f"slowing down, response took {latency:.2f}s"
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                reason = "speeding up"
+
+            # Only log meaningful changes so fast runs don't flood the log
+            change = abs(self.rate - self._last_logged_rate) / self._last_logged_rate
+            decreased = self.rate < self._last_logged_rate
+            if change >= 0.1 or (decreased and change > 0):
+                self._last_logged_rate = self.rate
+                log = self.logger.warning if decreased else self.logger.info
+                log(f"Rate limiter: {self.rate:.2f} req/s ({reason}; floor {self.min_rate}, ceiling {self.max_rate})")
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Process-wide breaker: closed -> open after failure_threshold consecutive
+    failures -> half-open after reset_timeout seconds (one trial request) ->
+    closed again on success, open again on failure
+
+    A failure is a connection error, timeout, 429 or 5xx response.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, logger=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == 'open' and remaining <= 0:
+                # Let exactly one trial request through
+                self.state = 'half-open'
+                self.logger.info("Circuit breaker: trying one request after the pause")
+                return
+            raise CircuitOpenError(f"Circuit breaker open after {self.failures} consecutive failures, "
+                                   f"not contacting the site for another {max(0.0, remaining):.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                self.logger.info("Circuit breaker: site is responding again")
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half-open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self.logger.warning(f"Circuit breaker: {self.failures} consecutive failures, "
+                                    f"pausing all requests for {self.reset_timeout:.0f}s")
+
+class ASESession(requests.Session):
+    """requests.Session with timeouts, retries, a rate limiter and a circuit breaker
+
+    Args:
+        rate_limiter: Shared AdaptiveRateLimiter every attempt waits for
+        circuit_breaker: Shared CircuitBreaker checked before every attempt
+        timeout: Default (connect, read) timeout in seconds
+        retries: Maximum retries per request
+        backoff_base / backoff_max: Full-jitter exponential backoff bounds (seconds)
+        pool_size: Connections kept per host (one per concurrent user of the session)
+
+    Idempotent requests (GET/HEAD/OPTIONS, or idempotent=True) are retried on
+    connection errors, timeouts, 429 and 5xx. Anything else is only retried
+    when the connection could not even be opened, so it was never sent.
+    """
+
+    def __init__(self, rate_limiter=None, circuit_breaker=None, timeout=None, retries=0,
+                 backoff_base=1.0, backoff_max=30.0, pool_size=10, logger=None):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = logger or logging.getLogger(__name__)
+        # Set by navigate_to_subjects while the page state comes from its cache
+        self.navigation_cached = False
+
+        # Retries are handled here, so urllib3 must not retry on its own
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff before retry number attempt (1-based)"""
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max)
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        idempotent = kwargs.pop('idempotent', method.upper() in IDEMPOTENT_METHODS)
+
+        attempt = 0
+        while True:
+            if self.circuit_breaker:
+                self.circuit_breaker.check()
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            start = time.monotonic()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.RequestException as e:
+                if self.rate_limiter:
+                    self.rate_limiter.record(time.monotonic() - start)
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout)) if idempotent \
+                    else isinstance(e, requests.ConnectTimeout)
+                if retryable and attempt < self.retries:
+                    attempt += 1
+                    self._wait_retry(method, url, attempt, type(e).__name__)
+                    continue
+                if attempt:
+                    self.logger.error(f"{method} {url} failed after {attempt} retries: {e}")
+                raise
+
+            if self.rate_limiter:
+                self.rate_limiter.record(time.monotonic() - start, response.status_code,
+                                         parse_retry_after(response.headers.get('Retry-After')))
+            if response.status_code in RETRY_STATUSES:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+                if idempotent and attempt < self.retries:
+                    response.close()
+                    attempt += 1
+                    self._wait_retry(method, url, attempt, f"HTTP {response.status_code}")
+                    continue
+            elif self.circuit_breaker:
+                self.circuit_breaker.record_success()
+
+            response.retries = attempt
+            if attempt:
+                self.logger.info(f"{method} {url}: HTTP {response.status_code} after {attempt} retries")
+            return response
+
+    def _wait_retry(self, method, url, attempt, reason):
+        delay = self.backoff(attempt)
+        self.logger.warning(f"{method} {url}: {reason}, retry {attempt}/{self.retries} in {delay:.1f}s")
+        time.sleep(delay)
+
+class PostbackClient:
+    """Posts back to one ASP.NET page without rebuilding the form each time
+
+    Holds the form action and hidden fields of the current page
+    (__VIEWSTATE, __EVENTVALIDATION, ...). Everything except
+    __EVENTTARGET/__EVENTARGUMENT is url-encoded once per page state, so a
+    postback only encodes its two event fields and prepends them to the
+    cached template. update() switches to the state of a returned page.
+
+    session may be None when only body() is needed (async engine).
+    """
+
+    def __init__(self, action, form_data, session=None):
+        self.session = session
+        self.update(action, form_data)
+
+    def update(self, action, form_data):
+        """Take the form state of a newly returned page"""
+        self.action = action
+        self.form_data = form_data
+        self._template = urlencode([(name, value) for name, value in form_data.items()
+                                    if name not in EVENT_FIELDS]).encode('ascii')
+
+    def body(self, target, argument):
+        """Encoded body of the postback for (target, argument)"""
+        event = urlencode([('__EVENTTARGET', target), ('__EVENTARGUMENT', argument)]).encode('ascii')
+        return event + b'&' + self._template if self._template else event
+
+    def post(self, target, argument, **kwargs):
+        """Send the postback through the session (same kwargs as session.post)"""
+        headers = dict(kwargs.pop('headers', None) or {}, **{'Content-Type': FORM_CONTENT_TYPE})
+        return self.session.post(self.action, data=self.body(target, argument), headers=headers, **kwargs)
+
+def backoff_delay(attempt, base, maximum):
+    """Full-jitter exponential backoff in seconds before retry number attempt (1-based)"""
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
+
+def parse_retry_after(value):
+    """Return the Retry-After header as seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form is rare here; fall back to the limiter's own backoff
+        return None
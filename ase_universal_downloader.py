@@ -41,15 +41,28 @@ USER_CONFIG = {
 }
 """
 
-import requests
-from bs4 import BeautifulSoup
 import os
 import re
+import argparse
+import json
+import threading
 import time
+import queue
+from collections import Counter
 from datetime import datetime
 from urllib.parse import urljoin
 import logging
 
+from ase_cassette import Cassette, install as install_cassette
+from ase_debug import DebugCapture
+from ase_events import (BytesReceived, PhaseFinished, PhaseStarted, ProgressChannel, ProgressTracker,
+                        SubjectCompleted, SubjectDiscovered, describe, describe_file)
+from ase_metrics import RunMetrics
+from ase_parsing import LXML_AVAILABLE, decode_html, parse
+from ase_storage import (BlobStore, ByteBudget, Manifest, NavigationCache, RunJournal, StreamResult,
+                         write_stream_atomic)
+from ase_transport import AdaptiveRateLimiter, ASESession, CircuitBreaker, CircuitOpenError, PostbackClient
+
 # =============================================================================
 # USER CONFIGURATION - EDIT THIS SECTION FOR YOUR FACULTY/PROGRAM
 # =============================================================================
@@ -124,10 +137,138 @@ BASE_URL = "https://fisadisciplina.ase.ro/"
 BASE_DOWNLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ASE_PDFs")
 DATE_FORMAT = "%Y%m%d_%H%M%S"
 
+# Number of parallel download workers. 1 keeps the polite serial mode; higher
+# values give every worker its own session navigated to the subjects page.
+DOWNLOAD_WORKERS = 1
+MAX_DOWNLOAD_WORKERS = 8
+
+# Adaptive rate limit shared by every session in this process (requests/second).
+# The rate starts at RATE_LIMIT_START, grows while the server answers faster than
+# RATE_LIMIT_LATENCY_TARGET seconds and halves on 429/5xx responses.
+# RATE_LIMIT_MAX is the ceiling per download worker: N workers may reach N
+# times that, but never more than RATE_LIMIT_MAX_TOTAL for the whole process.
+RATE_LIMIT_START = 1.0
+RATE_LIMIT_MIN = 0.2
+RATE_LIMIT_MAX = 5.0
+RATE_LIMIT_MAX_TOTAL = 20.0
+RATE_LIMIT_LATENCY_TARGET = 1.5
+
+# HTTP transport: (connect, read) timeouts in seconds so a hung socket can
+# never freeze a run, retries with jittered exponential backoff, connections
+# kept per session, and a circuit breaker that pauses every request for
+# CIRCUIT_RESET_TIMEOUT seconds after CIRCUIT_FAILURE_THRESHOLD failures in a row
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_READ_TIMEOUT = 60
+HTTP_RETRIES = 3
+HTTP_BACKOFF_BASE = 1.0
+HTTP_BACKOFF_MAX = 30.0
+HTTP_POOL_SIZE = MAX_DOWNLOAD_WORKERS
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60
+
+# Record/replay (see ase_cassette): 'record' saves every request/response of a
+# run to the CASSETTE_PATH zip, 'replay' serves the run from it with no network
+# (no rate limit, no retries). Set from the command line with --record/--replay.
+CASSETTE_MODE = None
+CASSETTE_PATH = None
+
+# Run metrics: wall time (rate limiter waits included), bytes, HTTP status and
+# retries of every navigation step, page parse, subject postback and file
+# write, written at the end of a run to _logs/metrics_*.json. METRICS_PROMETHEUS
+# also writes _logs/ase_pdf_scraper.prom for the node_exporter textfile collector.
+METRICS_ENABLED = True
+METRICS_PROMETHEUS = False
+
+# Copies of the fetched pages in _debug (see ase_debug): 'always', 'on_error'
+# (the last DEBUG_BUFFER_PAGES pages are kept in memory and only written when
+# navigation or a download fails) or 'off'. Pages are gzip'd on a background
+# thread; captures older than DEBUG_MAX_AGE seconds, and the oldest beyond
+# DEBUG_MAX_BYTES in total, are deleted automatically.
+DEBUG_CAPTURE = 'on_error'
+DEBUG_BUFFER_PAGES = 8
+DEBUG_MAX_BYTES = 50 * 1024 * 1024
+DEBUG_MAX_AGE = 14 * 24 * 3600
+
+# The command line logs overall progress (PDFs, throughput, ETA) after every
+# subject, and the byte progress of a single PDF at most every
+# PROGRESS_LOG_INTERVAL seconds while it is still downloading
+PROGRESS_LOG_INTERVAL = 5
+
+# PDFs are streamed to disk in chunks; MAX_INFLIGHT_BYTES caps the memory
+# held by all parallel downloads together.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+MAX_INFLIGHT_BYTES = 4 * 1024 * 1024
+
+# Sync mode keeps the existing download folder and only writes PDFs that are
+# new or changed according to its manifest.json
+SYNC_MODE = False
+
+# Every run keeps an append-only journal.jsonl in its folder. A run that was
+# canceled or crashed less than RESUME_MAX_AGE seconds ago is resumed: only
+# the subjects it had not saved yet are downloaded again.
+RESUME_MAX_AGE = 24 * 3600
+
+# Keep every PDF once in a content-addressed store (ASE_PDFs/_store) and
+# fill the semester folders with hardlinks to it (symlinks or copies where
+# hardlinks are not possible), so identical PDFs across programs, cohorts
+# and runs share their disk space
+STORE_ENABLED = True
+
+# Snapshot history (see ase_snapshots): after every complete run into a
+# configuration folder (sync mode, the GUI, the service), and before the GUI
+# replaces one, the folder's PDFs are recorded in _snapshots as hashes of
+# _store blobs. The last SNAPSHOT_KEEP_LAST snapshots and the newest one of
+# each of the last SNAPSHOT_KEEP_DAILY days are kept.
+SNAPSHOT_ENABLED = True
+SNAPSHOT_KEEP_LAST = 10
+SNAPSHOT_KEEP_DAILY = 30
+
+# Cache the cookies and page state reached during navigation (per faculty /
+# program / years / form / year) so warm runs skip the heavy page loads.
+# ASP.NET sessions expire after ~20 minutes of inactivity by default.
+NAV_CACHE_ENABLED = True
+NAV_CACHE_TTL = 20 * 60
+
+# Catalog crawler (ase_catalog.py): parallel faculty page loads, a hard cap
+# on pages per crawl, and how old the catalog may get before the GUI
+# refreshes it in the background
+CATALOG_WORKERS = 4
+CATALOG_MAX_PAGES = 100
+CATALOG_MAX_AGE = 7 * 24 * 3600
+
+# Download service (ase_service.py): address of the local job API, how long a
+# finished job answers identical submissions without fetching again, how long
+# a session that reached a subjects page is kept warm for the next job of the
+# same configuration (whose PDFs fetched within that time are not fetched
+# again), parallel downloads per job and how long finished jobs stay queryable
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8642
+SERVICE_RESULT_TTL = 15 * 60
+SERVICE_SESSION_TTL = 15 * 60
+SERVICE_WORKERS = 2
+SERVICE_JOB_RETENTION = 24 * 3600
+
+# Field extraction (ase_extract.py): credits, hours, evaluation form and
+# coordinators read from the downloaded PDFs into fise.csv / .db / .parquet,
+# in EXTRACT_WORKERS processes (None = one per core). EXTRACT_AFTER_DOWNLOAD
+# runs it at the end of every download (--extract on the command line).
+EXTRACT_FORMAT = 'csv'
+EXTRACT_WORKERS = None
+EXTRACT_AFTER_DOWNLOAD = False
+
 # Will be set dynamically based on user's configuration
 RUN_TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
 DOWNLOAD_DIR = os.path.join(BASE_DOWNLOAD_DIR, f"Run_{RUN_TIMESTAMP}")
 
+# HTML parsing backend: 'lxml' builds a native lxml tree (much faster than
+# BeautifulSoup on the large ASP.NET pages), 'bs4' uses BeautifulSoup.
+# Falls back to bs4 + html.parser when lxml is not installed.
+HTML_BACKEND = 'lxml'
+
+# bs4 backend only: parse just the ASP.NET <form> (hidden fields and GridView
+# tables live inside it)
+HTML_PARSE_ONLY_FORM = True
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -155,28 +296,266 @@ def setup_logging():
     )
     return logging.getLogger(__name__)
 
-def validate_config():
-    """Validate user configuration"""
+def validate_config(config=None):
+    """Validate user configuration (USER_CONFIG unless another config is given)"""
+    config = USER_CONFIG if config is None else config
     required_keys = ['faculty_keywords', 'program_name', 'study_years', 'study_form', 'language', 'target_year']
     
     for key in required_keys:
-        if key not in USER_CONFIG:
+        if key not in config:
             raise ValueError(f"Missing required configuration: {key}")
     
-    if USER_CONFIG['language'] not in ['romanian', 'english']:
+    if config['language'] not in ['romanian', 'english']:
         raise ValueError("Language must be 'romanian' or 'english'")
     
-    if USER_CONFIG['study_form'] not in ['FRECVENTA', 'DISTANTA']:
+    if config['study_form'] not in ['FRECVENTA', 'DISTANTA']:
         raise ValueError("Study form must be 'FRECVENTA' or 'DISTANTA'")
     
     return True
 
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide adaptive rate limiter"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter(start_rate=RATE_LIMIT_START,
+                                                min_rate=RATE_LIMIT_MIN,
+                                                max_rate=RATE_LIMIT_MAX,
+                                                latency_target=RATE_LIMIT_LATENCY_TARGET,
+                                                logger=logging.getLogger(__name__))
+        return _rate_limiter
+
+_byte_budget = None
+
+def get_byte_budget():
+    """Return the process-wide in-flight download byte budget"""
+    global _byte_budget
+    with _rate_limiter_lock:
+        if _byte_budget is None:
+            _byte_budget = ByteBudget(MAX_INFLIGHT_BYTES)
+        return _byte_budget
+
+_blob_store = None
+
+def get_blob_store():
+    """Return the content-addressed store under BASE_DOWNLOAD_DIR, or None if disabled"""
+    global _blob_store
+    if not STORE_ENABLED:
+        return None
+    root = os.path.join(BASE_DOWNLOAD_DIR, "_store")
+    with _rate_limiter_lock:
+        if _blob_store is None or _blob_store.root != root:
+            _blob_store = BlobStore(root)
+        return _blob_store
+
+def log_store_summary(before, logger):
+    """Log how many PDFs this run stored vs. found already in the store"""
+    store = get_blob_store()
+    if not store:
+        return
+    stats = store.snapshot()
+    stats.subtract(before or {})
+    if stats['stored'] or stats['deduplicated']:
+        links = ", ".join(f"{stats[method]} {method}s" for method in ('hardlink', 'symlink', 'copy') if stats[method])
+        logger.info(f"Store: {stats['stored']} new, {stats['deduplicated']} already stored ({links})")
+
+_circuit_breaker = None
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker"""
+    global _circuit_breaker
+    with _rate_limiter_lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker(failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                                              reset_timeout=CIRCUIT_RESET_TIMEOUT,
+                                              logger=logging.getLogger(__name__))
+        return _circuit_breaker
+
+_metrics = None
+
+def get_metrics():
+    """Return the metrics collector of the current run"""
+    global _metrics
+    with _rate_limiter_lock:
+        if _metrics is None:
+            _metrics = RunMetrics()
+        return _metrics
+
+def start_metrics(labels=None):
+    """Start collecting metrics for a new run
+
+    labels default to the program, study years and year of USER_CONFIG.
+    """
+    global _metrics
+    if labels is None:
+        labels = {'program': USER_CONFIG['program_name'], 'study_years': USER_CONFIG['study_years'],
+                  'year': USER_CONFIG['target_year']}
+    with _rate_limiter_lock:
+        _metrics = RunMetrics(labels)
+        return _metrics
+
+def finish_metrics(logger):
+    """Write the metrics of the current run next to the logs and start over"""
+    global _metrics
+    with _rate_limiter_lock:
+        metrics, _metrics = _metrics, None
+    if not metrics or not METRICS_ENABLED:
+        return
+    try:
+        log_dir = os.path.join(BASE_DOWNLOAD_DIR, "_logs")
+        path = os.path.join(log_dir, f"metrics_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+        metrics.write_json(path)
+        if METRICS_PROMETHEUS:
+            metrics.write_prometheus(os.path.join(log_dir, "ase_pdf_scraper.prom"))
+    except Exception as e:
+        logger.error(f"Could not write metrics: {e}")
+        return
+
+    summary = metrics.summary()
+    download = summary['phases'].get('download')
+    if download:
+        logger.info(f"Metrics: {download['count']} downloads, p50 {download['p50']:.2f}s, "
+                    f"p90 {download['p90']:.2f}s, {summary['totals']['bytes_per_second'] / 1024:.0f} KB/s, "
+                    f"{summary['totals']['retries']} retries")
+    logger.info(f"Metrics saved to: {path}")
+
+def measure_response(measurement, response):
+    """Fill a metrics Measurement from a fully read requests response"""
+    measurement.status = response.status_code
+    measurement.bytes = len(response.content)
+    measurement.retries = getattr(response, 'retries', 0)
+
+_debug_capture = None
+
+def get_debug_capture():
+    """Return the process-wide debug capture for BASE_DOWNLOAD_DIR/_debug"""
+    global _debug_capture
+    directory = os.path.join(BASE_DOWNLOAD_DIR, "_debug")
+    with _rate_limiter_lock:
+        if _debug_capture is None or _debug_capture.directory != directory \
+                or _debug_capture.mode != DEBUG_CAPTURE:
+            _debug_capture = DebugCapture(directory, DEBUG_CAPTURE, max_bytes=DEBUG_MAX_BYTES,
+                                          max_age=DEBUG_MAX_AGE, buffer_pages=DEBUG_BUFFER_PAGES,
+                                          logger=logging.getLogger(__name__))
+        return _debug_capture
+
+def flush_debug_capture(logger):
+    """Wait for the debug pages of this run to be written"""
+    with _rate_limiter_lock:
+        capture = _debug_capture
+    if capture:
+        capture.flush()
+        if capture.dropped:
+            logger.warning(f"{capture.dropped} debug pages were dropped (writer fell behind)")
+
+_progress_channel = None
+
+def get_progress_channel():
+    """Return the process-wide channel progress events are published on"""
+    global _progress_channel
+    with _rate_limiter_lock:
+        if _progress_channel is None:
+            _progress_channel = ProgressChannel(logging.getLogger(__name__))
+        return _progress_channel
+
+def publish_progress(event):
+    """Publish a progress event (see ase_events)"""
+    channel = get_progress_channel()
+    if channel.active:
+        channel.publish(event)
+
+def progress_chunks(subject, chunks, total=None):
+    """Pass chunks through, publishing BytesReceived for each one"""
+    received = 0
+    for chunk in chunks:
+        received += len(chunk)
+        publish_progress(BytesReceived(subject, received, total))
+        yield chunk
+
+def content_length(headers):
+    """Content-Length header as an int, or None"""
+    try:
+        return int(headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+
+def log_progress(tracker, logger):
+    """Subscriber that logs the tracker's progress for the command line
+
+    Returns the callback to pass to ProgressChannel.subscribe.
+    """
+    last_logged = {}
+
+    def callback(event):
+        if isinstance(event, SubjectCompleted):
+            logger.info(f"Progress: {describe(tracker.snapshot())}")
+        elif isinstance(event, BytesReceived):
+            now = time.monotonic()
+            name = event.subject['name']
+            if name not in last_logged:
+                last_logged[name] = now
+            elif now - last_logged[name] >= PROGRESS_LOG_INTERVAL:
+                last_logged[name] = now
+                logger.info(f"  {describe_file((name, event.received, event.total))}")
+        elif isinstance(event, PhaseStarted) and event.phase == 'download':
+            last_logged.clear()
+    return callback
+
+_cassette = None
+
+def get_cassette():
+    """Return the process-wide cassette, or None unless CASSETTE_MODE is set"""
+    global _cassette
+    if not CASSETTE_MODE:
+        return None
+    with _rate_limiter_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE)
+        return _cassette
+
+def close_cassette(logger):
+    """Finish the cassette of this process, if any"""
+    global _cassette
+    with _rate_limiter_lock:
+        cassette, _cassette = _cassette, None
+    if cassette:
+        cassette.close()
+        action = "Recorded" if cassette.mode == 'record' else "Replayed"
+        logger.info(f"{action} cassette {cassette.path}: {cassette.summary()}")
+
 def create_session():
-    """Create a session with browser headers"""
-    session = requests.Session()
+    """Create a session with browser headers, timeouts, retries, rate limit and circuit breaker
+
+    In replay mode the session is served from the cassette, so pacing and
+    retries are switched off.
+    """
+    cassette = get_cassette()
+    replay = cassette is not None and cassette.mode == 'replay'
+    session = ASESession(rate_limiter=None if replay else get_rate_limiter(),
+                         circuit_breaker=None if replay else get_circuit_breaker(),
+                         timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                         retries=0 if replay else HTTP_RETRIES,
+                         backoff_base=HTTP_BACKOFF_BASE,
+                         backoff_max=HTTP_BACKOFF_MAX,
+                         pool_size=HTTP_POOL_SIZE,
+                         logger=logging.getLogger(__name__))
     session.headers.update(HEADERS)
+    if cassette:
+        install_cassette(session, cassette, HTTP_POOL_SIZE)
     return session
 
+def parse_html(html, backend=None):
+    """Parse a decoded page with the configured backend (see ase_parsing)"""
+    bs4_parser = 'lxml' if LXML_AVAILABLE else 'html.parser'
+    return parse(html, backend or HTML_BACKEND, bs4_parser, only_form=HTML_PARSE_ONLY_FORM)
+
+def response_html(response):
+    """Decoded HTML of a requests response"""
+    return decode_html(response.content, response.headers.get('Content-Type'))
+
 def get_form_data(soup):
     """Extract form data including ASP.NET viewstate"""
     form = soup.find('form')
@@ -197,8 +576,40 @@ def get_form_data(soup):
     
     return action, form_data
 
+def postback_client(soup, session=None):
+    """PostbackClient for the form of a parsed page, or None if it has no form"""
+    action, form_data = get_form_data(soup)
+    return PostbackClient(action, form_data, session) if action else None
+
+def catalog_argument(soup, key, labels, logger):
+    """Postback argument USER_CONFIG[key] from the catalog, if the page still links to it
+
+    The GUI adds faculty_argument and year_argument when the selection comes
+    from the crawled catalog (see ase_catalog.catalog_arguments). The row of
+    the link must still contain every label; a catalog older than the page
+    falls back to the keyword search.
+    """
+    argument = USER_CONFIG.get(key)
+    if not argument:
+        return None
+    target = f"'GridView1','{argument}'"
+    for link in soup.find_all('a', href=True):
+        if target not in link.get('href', ''):
+            continue
+        row = link.find_parent('tr')
+        row_text = row.get_text().upper() if row else ''
+        if all(label.upper() in row_text for label in labels):
+            logger.info(f"Using catalog link {argument}")
+            return argument
+        break
+    logger.warning(f"Catalog link {argument} does not match the page, searching by name...")
+    return None
+
 def find_faculty(soup, logger):
     """Find the user's faculty based on keywords"""
+    argument = catalog_argument(soup, 'faculty_argument', USER_CONFIG['faculty_keywords'], logger)
+    if argument:
+        return argument
     logger.info(f"Looking for faculty with keywords: {USER_CONFIG['faculty_keywords']}")
     
     for row in soup.find_all('tr'):
@@ -225,6 +636,10 @@ def find_faculty(soup, logger):
 
 def find_program_and_year(soup, logger):
     """Find the specific program and year"""
+    argument = catalog_argument(soup, 'year_argument',
+                                [USER_CONFIG['program_name'], USER_CONFIG['study_years']], logger)
+    if argument:
+        return argument
     logger.info(f"Looking for program: {USER_CONFIG['program_name']} ({USER_CONFIG['study_years']}) - {USER_CONFIG['study_form']}")
     
     for row in soup.find_all('tr'):
@@ -305,254 +720,1079 @@ def extract_clean_subject_name(full_text):
         # If no newline, just return the full text (it's already Romanian-only)
         return full_text.strip()
 
-def navigate_to_subjects(session, logger):
-    """Navigate through the website to find subjects"""
-    
-    # Step 1: Load main page
+def save_debug_page(prefix, html, logger):
+    """Hand a fetched page to the debug capture (written in the background, see DEBUG_CAPTURE)"""
+    get_debug_capture().capture(prefix, html)
+
+def report_debug_error(logger):
+    """Something failed: write the pages the on_error capture was holding"""
+    count = get_debug_capture().error()
+    if count:
+        logger.info(f"Saving {count} recent pages to {get_debug_capture().directory} for troubleshooting")
+
+NAVIGATION_STAGES = ('main', 'faculty', 'subjects')
+
+class StaleNavigationError(Exception):
+    """The server rejected page state that was restored from the navigation cache"""
+
+def get_navigation_cache():
+    """Return the on-disk navigation cache"""
+    return NavigationCache(os.path.join(BASE_DOWNLOAD_DIR, "_cache", "navigation"), NAV_CACHE_TTL)
+
+def navigation_keys():
+    """Cache keys for the main, faculty and subjects pages of USER_CONFIG"""
+    faculty = ['faculty', list(USER_CONFIG['faculty_keywords'])]
+    subjects = ['subjects', list(USER_CONFIG['faculty_keywords']), USER_CONFIG['program_name'],
+                USER_CONFIG['study_years'], USER_CONFIG['study_form'], USER_CONFIG['target_year']]
+    return {'main': ['main'], 'faculty': faculty, 'subjects': subjects}
+
+def cache_page(session, stage, response, html):
+    """Store a reached page together with the session cookies"""
+    if not NAV_CACHE_ENABLED:
+        return
+    cookies = [{'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path}
+               for c in session.cookies]
+    get_navigation_cache().put(navigation_keys()[stage], response.url, html, cookies)
+
+def restore_cached_page(session, logger):
+    """Load the deepest cached page for USER_CONFIG into the session
+
+    Returns (stage, soup) or (None, None) if nothing usable is cached.
+    """
+    cache = get_navigation_cache()
+    keys = navigation_keys()
+    for stage in ('subjects', 'faculty', 'main'):
+        entry = cache.get(keys[stage])
+        if not entry:
+            continue
+        for cookie in entry['cookies']:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        logger.info(f"Using cached {stage} page (skipping {NAVIGATION_STAGES.index(stage) + 1} page loads)")
+        return stage, parse_html(entry['html'])
+    return None, None
+
+def invalidate_navigation_cache():
+    """Forget every cached page for USER_CONFIG"""
+    get_navigation_cache().invalidate(*navigation_keys().values())
+
+def load_main_page(session, logger):
+    """Step 1: Load main page"""
     logger.info("Step 1: Loading main page...")
-    response = session.get(BASE_URL)
+    metrics = get_metrics()
+    with metrics.timer('navigate.main') as measurement:
+        response = session.get(BASE_URL)
+        measure_response(measurement, response)
+    html = response_html(response)
+    save_debug_page("main_page", html, logger)
     if response.status_code != 200:
         logger.error("Failed to load website")
+        report_debug_error(logger)
         return None
     
-    soup = BeautifulSoup(response.content, 'html.parser')
+    with metrics.timer('parse.main'):
+        soup = parse_html(html)
     logger.info("Main page loaded successfully")
-    
-    # Step 2: Find and select faculty
-    action, form_data = get_form_data(soup)
-    if not action:
+    cache_page(session, 'main', response, html)
+    return soup
+
+def select_faculty(session, soup, logger):
+    """Step 2: Find and select faculty"""
+    client = postback_client(soup, session)
+    if not client:
         logger.error("No form found on main page")
         return None
     
     faculty_param = find_faculty(soup, logger)
     if not faculty_param:
+        report_debug_error(logger)
         return None
     
-    form_data['__EVENTTARGET'] = 'GridView1'
-    form_data['__EVENTARGUMENT'] = faculty_param
-    
-    response = session.post(action, data=form_data)
+    # Postbacks here only navigate, so they are safe to retry
+    metrics = get_metrics()
+    with metrics.timer('navigate.faculty') as measurement:
+        response = client.post('GridView1', faculty_param, idempotent=True)
+        measure_response(measurement, response)
+    html = response_html(response)
+    save_debug_page("faculty_programs", html, logger)
     if response.status_code != 200:
         logger.error("Faculty selection failed")
+        report_debug_error(logger)
         return None
     
-    soup = BeautifulSoup(response.content, 'html.parser')
+    with metrics.timer('parse.faculty'):
+        soup = parse_html(html)
     logger.info("Faculty selected successfully")
+    cache_page(session, 'faculty', response, html)
+    return soup
 
-    # Save debug page to _debug folder
-    debug_dir = os.path.join(BASE_DOWNLOAD_DIR, "_debug")
-    os.makedirs(debug_dir, exist_ok=True)
-    debug_file = os.path.join(debug_dir, f"faculty_programs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
-    with open(debug_file, 'w', encoding='utf-8') as f:
-        f.write(response.text)
-    logger.debug(f"Debug page saved to: {debug_file}")
-    
-    # Step 3: Find and select program/year
-    action, form_data = get_form_data(soup)
-    if not action:
+def select_program_year(session, soup, logger):
+    """Step 3: Find and select program/year"""
+    client = postback_client(soup, session)
+    if not client:
         logger.error("No form found on programs page")
         return None
     
     year_param = find_program_and_year(soup, logger)
     if not year_param:
+        report_debug_error(logger)
         return None
     
-    form_data['__EVENTTARGET'] = 'GridView1'
-    form_data['__EVENTARGUMENT'] = year_param
-    
-    response = session.post(action, data=form_data)
+    metrics = get_metrics()
+    with metrics.timer('navigate.program') as measurement:
+        response = client.post('GridView1', year_param, idempotent=True)
+        measure_response(measurement, response)
+    html = response_html(response)
+    save_debug_page("subjects_page", html, logger)
     if response.status_code != 200:
         logger.error("Year selection failed")
+        report_debug_error(logger)
         return None
     
-    soup = BeautifulSoup(response.content, 'html.parser')
+    with metrics.timer('parse.subjects'):
+        soup = parse_html(html)
     logger.info(f"Successfully reached {USER_CONFIG['target_year']} subjects page!")
+    cache_page(session, 'subjects', response, html)
+    return soup
 
-    # Save subjects page to _debug folder
-    debug_dir = os.path.join(BASE_DOWNLOAD_DIR, "_debug")
-    os.makedirs(debug_dir, exist_ok=True)
-    debug_file = os.path.join(debug_dir, f"subjects_page_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
-    with open(debug_file, 'w', encoding='utf-8') as f:
-        f.write(response.text)
-    logger.debug(f"Subjects page saved to: {debug_file}")
-    
+def navigate_to_subjects(session, logger, use_cache=None):
+    """Navigate through the website to find subjects
+
+    Publishes the 'navigate' phase events around reach_subjects_page.
+    """
+    publish_progress(PhaseStarted('navigate'))
+    soup = None
+    try:
+        soup = reach_subjects_page(session, logger, use_cache)
+        return soup
+    finally:
+        publish_progress(PhaseFinished('navigate', soup is not None))
+
+def reach_subjects_page(session, logger, use_cache=None):
+    """Load the main, faculty and subjects pages in turn
+
+    With use_cache, a warm run resumes from the deepest cached page (jumping
+    straight to the subjects page when possible) and falls back to a full
+    navigation if the restored state is rejected. Reached pages are cached
+    whenever NAV_CACHE_ENABLED is set.
+    """
+    use_cache = NAV_CACHE_ENABLED if use_cache is None else use_cache
+    session.navigation_cached = False
+
+    stage, soup = restore_cached_page(session, logger) if use_cache else (None, None)
+    if stage == 'subjects':
+        # Validated by the first subject postback (see download_subject)
+        session.navigation_cached = True
+        return soup
+
+    if stage is None:
+        soup = load_main_page(session, logger)
+        if not soup:
+            return None
+    if stage in (None, 'main'):
+        soup = select_faculty(session, soup, logger)
+        if not soup:
+            return retry_without_cache(session, logger, stage)
+    soup = select_program_year(session, soup, logger)
+    if not soup:
+        return retry_without_cache(session, logger, stage)
     return soup
 
+def retry_without_cache(session, logger, stage):
+    """Fall back to a full navigation after a cached page led nowhere"""
+    if stage is None:
+        return None
+    logger.warning("Cached navigation state was rejected, navigating from the main page...")
+    invalidate_navigation_cache()
+    session.cookies.clear()
+    return navigate_to_subjects(session, logger, use_cache=False)
+
+# Header keywords used to locate the columns of the subjects grid
+SUBJECT_COLUMNS = {
+    'subject': ('disciplina', 'denumire', 'subject', 'course'),
+    'type': ('tip', 'type', 'regim'),
+    'romanian': ('ro', 'romana', 'romanian'),
+    'english': ('en', 'engleza', 'english'),
+}
+
+def table_rows(table):
+    """Rows that belong to the table itself, never to tables nested in its cells"""
+    rows = []
+    for child in table.find_all(['tr', 'thead', 'tbody', 'tfoot'], recursive=False):
+        if child.name == 'tr':
+            rows.append(child)
+        else:
+            rows.extend(child.find_all('tr', recursive=False))
+    return rows
+
+def header_columns(cells):
+    """Map column roles (see SUBJECT_COLUMNS) to indexes from a header row"""
+    columns = {}
+    for index, cell in enumerate(cells):
+        words = re.findall(r'[a-z]+', remove_diacritics(cell.get_text(' ', strip=True)).lower())
+        for role, keywords in SUBJECT_COLUMNS.items():
+            if role in columns:
+                continue
+            if any(word == keyword or (len(keyword) > 3 and word.startswith(keyword))
+                   for word in words for keyword in keywords):
+                columns[role] = index
+                break
+    # Without a type column this is not the grid header
+    return columns if 'type' in columns else None
+
+def row_button(row, cells, column, button_pattern):
+    """Download button for the configured language, from its column when known"""
+    if column is not None and column < len(cells):
+        buttons = cells[column].find_all('input', type='image')
+    else:
+        buttons = row.find_all('input', type='image')
+    for button in buttons:
+        if button_pattern in button.get('onclick', ''):
+            return button
+    return None
+
 def find_obligatory_subjects(soup, logger):
-    """Find all obligatory subjects with semester information"""
+    """Find all obligatory subjects with semester information
+
+    Single pass: every table only walks its own rows, rows that merely wrap
+    a nested table are skipped (the nested table is walked on its own), and
+    column indexes come from the grid header once per table.
+    """
     logger.info("Searching for obligatory subjects...")
+    start = time.monotonic()
 
     subjects = []
     seen_subjects = set()
+    seen_buttons = set()
 
     # Determine which download buttons to look for
-    button_pattern = 'ProgramaRO' if USER_CONFIG['language'] == 'romanian' else 'ProgramaEN'
+    language = USER_CONFIG['language']
+    button_pattern = 'ProgramaRO' if language == 'romanian' else 'ProgramaEN'
 
-    # Find all tables (subjects are usually in tables)
-    tables = soup.find_all('table')
-
-    for table in tables:
+    for table in soup.find_all('table'):
         current_semester = None  # Reset for each table
-        rows = table.find_all('tr')
-
-        for row in rows:
-            # Check if this row is a semester header
-            row_text = row.get_text(strip=True)
-            if 'Semestrul I' in row_text and 'Semestrul II' not in row_text:
-                current_semester = 'Semestrul_I'
-                logger.info(f"Found semester header: {current_semester}")
+        columns = None
+
+        for row in table_rows(table):
+            cells = row.find_all(['td', 'th'], recursive=False)
+            if not cells or any(cell.find('table') for cell in cells):
+                continue
+
+            if not row.find('input', type='image'):
+                # Semester header or grid header
+                row_text = row.get_text(strip=True)
+                if 'Semestrul I' in row_text and 'Semestrul II' not in row_text:
+                    current_semester = 'Semestrul_I'
+                    logger.info(f"Found semester header: {current_semester}")
+                elif 'Semestrul II' in row_text:
+                    current_semester = 'Semestrul_II'
+                    logger.info(f"Found semester header: {current_semester}")
+                elif columns is None:
+                    columns = header_columns(cells)
+                continue
+
+            columns_known = columns is not None and len(cells) > max(columns.values())
+            button = row_button(row, cells, columns.get(language) if columns_known else None, button_pattern)
+            if not button:
                 continue
-            elif 'Semestrul II' in row_text:
-                current_semester = 'Semestrul_II'
-                logger.info(f"Found semester header: {current_semester}")
+
+            # Obligatory subjects are marked with 'O' in the type column
+            if columns_known:
+                is_obligatory = cells[columns['type']].get_text(strip=True) == 'O'
+            else:
+                is_obligatory = any(cell.get_text(strip=True) == 'O' for cell in cells)
+            if not is_obligatory:
                 continue
 
-            # Find download button in this row
-            button = row.find('input', type='image')
-            if not button or button_pattern not in button.get('onclick', ''):
+            # Extract download parameters from button onclick
+            match = re.search(r"'([^']+)','([^']+)'", button.get('onclick', ''))
+            if not match or match.groups() in seen_buttons:
                 continue
+            seen_buttons.add(match.groups())
 
-            # Check if this row contains an obligatory subject (marked with 'O')
-            cells = row.find_all(['td', 'th'])
-            is_obligatory = False
-            subject_name = "Unknown_Subject"
+            # Use separator='\n' to preserve line breaks from <br> tags
+            subject_cell = cells[columns.get('subject', 0)] if columns_known else cells[0]
+            subject_name = extract_clean_subject_name(subject_cell.get_text(separator='\n', strip=True))
 
-            # Look for 'O' in the type column and extract subject name
-            for cell in cells:
-                cell_text = cell.get_text(strip=True)
+            # Skip if we've already found this subject
+            clean_subject = re.sub(r'[^a-zA-ZăâîșțĂÂÎȘȚ\s]', '', subject_name).lower().strip()
+            if clean_subject in seen_subjects:
+                continue
+            seen_subjects.add(clean_subject)
 
-                # Check if this is the type column with 'O'
-                if cell_text == 'O':
-                    is_obligatory = True
+            subjects.append({
+                'name': subject_name,
+                'target': match.group(1),
+                'argument': match.group(2),
+                'semester': current_semester or 'Unknown'
+            })
+            publish_progress(SubjectDiscovered(subjects[-1], len(subjects)))
+            logger.info(f"Found: {subject_name} ({current_semester or 'Unknown semester'})")
 
-                    # Get subject name from first cell (subject column)
-                    if len(cells) > 0:
-                        subject_cell = cells[0]
-                        # Use separator='\n' to preserve line breaks from <br> tags
-                        full_text = subject_cell.get_text(separator='\n', strip=True)
-                        subject_name = extract_clean_subject_name(full_text)
+    logger.info(f"Total obligatory subjects found: {len(subjects)}")
+    get_metrics().record('extract.subjects', time.monotonic() - start)
+    if not subjects:
+        report_debug_error(logger)
+    return subjects
 
-                    break
+def config_folder_name(config):
+    """Folder name for a configuration, e.g. Informatica_economica_Anul_III_2023-2026"""
+    program = config['program_name'].replace(" ", "_")
+    year = config['target_year'].replace(" ", "_")
+    return remove_diacritics(f"{program}_{year}_{config['study_years']}")
 
-            if is_obligatory:
-                # Clean subject name for deduplication
-                clean_subject = re.sub(r'[^a-zA-ZăâîșțĂÂÎȘȚ\s]', '', subject_name).lower().strip()
+def clean_filename(name):
+    """Clean filename: remove diacritics, clean special chars, remove extra spaces"""
+    clean_name = remove_diacritics(name)
+    clean_name = re.sub(r'[<>:"/\\|?*]', '_', clean_name)
+    clean_name = re.sub(r'\s+', '_', clean_name)
+    return clean_name.strip('._')
 
-                # Skip if we've already found this subject
-                if clean_subject in seen_subjects:
-                    continue
+def subject_relpath(subject):
+    """Path of a subject's PDF relative to DOWNLOAD_DIR (manifest key)"""
+    return f"{subject.get('semester', 'Unknown')}/{clean_filename(subject['name'])}.pdf"
 
-                seen_subjects.add(clean_subject)
+def subject_filepath(subject):
+    """Return (semester, filename, filepath) for a subject, creating the semester folder"""
+    semester = subject.get('semester', 'Unknown')
+    semester_dir = os.path.join(DOWNLOAD_DIR, semester)
+    os.makedirs(semester_dir, exist_ok=True)
 
-                # Extract download parameters from button onclick
-                onclick = button.get('onclick', '')
-                match = re.search(r"'([^']+)','([^']+)'", onclick)
-                if match:
-                    subjects.append({
-                        'name': subject_name,
-                        'target': match.group(1),
-                        'argument': match.group(2),
-                        'semester': current_semester if current_semester else 'Unknown'
-                    })
-                    logger.info(f"Found: {subject_name} ({current_semester if current_semester else 'Unknown semester'})")
+    filename = f"{clean_filename(subject['name'])}.pdf"
+    return semester, filename, os.path.join(semester_dir, filename)
 
-    logger.info(f"Total obligatory subjects found: {len(subjects)}")
-    return subjects
+def sync_baseline(manifest, subject, sync):
+    """Return the SHA-256 the existing file must match to be left untouched, or None
+
+    Only files still on disk with the size recorded in the manifest count,
+    so a deleted or edited file is always written again.
+    """
+    if not sync or manifest is None:
+        return None
+    entry = manifest.get(subject_relpath(subject))
+    if not entry:
+        return None
+    filepath = os.path.join(DOWNLOAD_DIR, subject_relpath(subject))
+    try:
+        if os.path.getsize(filepath) != entry['size']:
+            return None
+    except OSError:
+        return None
+    return entry['sha256']
+
+def log_saved(subject, result, logger):
+    """Log a successfully downloaded PDF"""
+    semester = subject.get('semester', 'Unknown')
+    filename = os.path.basename(result.filepath)
+    if result.written:
+        logger.info(f"SUCCESS: Saved {semester}/{filename} ({result.size // 1024} KB)")
+    else:
+        logger.info(f"UNCHANGED: Kept {semester}/{filename} ({result.size // 1024} KB)")
+
+def is_html(content_type):
+    """Whether a Content-Type header announces an HTML page"""
+    return 'html' in (content_type or '').lower()
 
-def download_pdfs(session, subjects, soup, logger, cancel_check=None):
+def update_from_page(client, subject, html, logger):
+    """Continue from the form state of a page a download postback returned
+
+    Only taken when the page still lists the subject, so an error page never
+    replaces the state of the subjects page.
+    """
+    if subject['argument'] not in html:
+        return
+    action, form_data = get_form_data(parse_html(html))
+    if action:
+        client.update(action, form_data)
+        logger.debug(f"Form state updated from the page returned for {subject['name']}")
+
+def download_subject(client, subject, logger, manifest=None, sync=False, journal=None):
+    """Download a single subject PDF into its semester folder
+
+    client is the PostbackClient of the subjects page. The response is
+    streamed in DOWNLOAD_CHUNK_SIZE chunks into a temp file that is renamed
+    to the final name only once complete. In sync mode a PDF whose hash
+    matches the manifest is not written at all.
+
+    Returns True if the PDF was saved (or is already up to date).
+    """
+    session = client.session
+    metrics = get_metrics()
+    if journal:
+        journal.record_start(subject_relpath(subject))
+
+    # Submit download request
+    with metrics.timer('download') as measurement, \
+            client.post(subject['target'], subject['argument'], stream=True, idempotent=True) as response:
+        measurement.status = response.status_code
+        measurement.retries = getattr(response, 'retries', 0)
+        result = None
+        if response.status_code == 200 and is_html(response.headers.get('Content-Type')) \
+                and not response.content.startswith(b'%PDF'):
+            # A page instead of the PDF
+            measurement.status = 'page'
+            measurement.bytes = len(response.content)
+            html = response_html(response)
+            save_debug_page("download_page", html, logger)
+            update_from_page(client, subject, html, logger)
+        elif response.status_code == 200:
+            # iter_content replays response.content if it was read above
+            chunks = progress_chunks(subject, response.iter_content(DOWNLOAD_CHUNK_SIZE),
+                                     content_length(response.headers))
+            result = write_stream_atomic(chunks,
+                                         lambda: subject_filepath(subject)[2],
+                                         DOWNLOAD_CHUNK_SIZE, get_byte_budget(),
+                                         compare_sha256=sync_baseline(manifest, subject, sync),
+                                         store=get_blob_store())
+            measurement.bytes = result.size if result else 0
+            if not result:
+                measurement.status = 'not_pdf'
+
+    if result:
+        metrics.record('write', result.write_seconds, result.size if result.written else 0)
+        # The server accepted the (possibly cached) page state
+        session.navigation_cached = False
+        if manifest is not None:
+            manifest.record(subject_relpath(subject), subject, result)
+        if journal:
+            journal.record_done(subject_relpath(subject), result)
+        log_saved(subject, result, logger)
+        return True
+
+    if getattr(session, 'navigation_cached', False):
+        raise StaleNavigationError(f"Cached subjects page rejected while downloading {subject['name']}")
+
+    logger.error(f"Download failed for {subject['name']}")
+    report_debug_error(logger)
+    return False
+
+def download_subject_with_fallback(client, subject, logger, manifest=None, sync=False, journal=None):
+    """download_subject that re-navigates once if the cached page state is stale
+
+    On re-navigation the client switches to the fresh subjects page. Returns
+    the success flag, or None if the subjects page could not be reached again.
+    """
+    try:
+        return download_subject(client, subject, logger, manifest, sync, journal)
+    except StaleNavigationError:
+        soup = retry_without_cache(client.session, logger, 'subjects')
+        action, form_data = get_form_data(soup) if soup else (None, None)
+        if not action:
+            logger.error("Could not reach the subjects page again")
+            return None
+        client.update(action, form_data)
+        return download_subject(client, subject, logger, manifest, sync, journal)
+
+def interrupted_run(folder):
+    """Whether folder holds a resumable interrupted run of USER_CONFIG"""
+    return RunJournal.load(folder).resumable(USER_CONFIG, RESUME_MAX_AGE)
+
+def find_interrupted_run():
+    """Newest Run_* folder of USER_CONFIG if that run was interrupted, else None"""
+    try:
+        runs = sorted((name for name in os.listdir(BASE_DOWNLOAD_DIR) if name.startswith("Run_")), reverse=True)
+    except OSError:
+        return None
+    for name in runs:
+        folder = os.path.join(BASE_DOWNLOAD_DIR, name)
+        journal = RunJournal.load(folder)
+        if journal.config == USER_CONFIG:
+            return folder if journal.resumable(USER_CONFIG, RESUME_MAX_AGE) else None
+    return None
+
+def open_journal(subjects, logger, manifest=None):
+    """Start the run journal of DOWNLOAD_DIR, or resume it after an interrupted run
+
+    Subjects the interrupted run already saved (still on disk with the
+    journaled size) are recorded in the manifest and left out.
+
+    Returns (journal, remaining_subjects).
+    """
+    journal = RunJournal.load(DOWNLOAD_DIR)
+    saved = {}
+    if journal.resumable(USER_CONFIG, RESUME_MAX_AGE):
+        for subject in subjects:
+            relpath = subject_relpath(subject)
+            entry = journal.done.get(relpath)
+            try:
+                if entry and os.path.getsize(os.path.join(DOWNLOAD_DIR, relpath)) == entry['size']:
+                    saved[relpath] = subject
+            except OSError:
+                pass
+
+    if saved:
+        journal.resume()
+        logger.info(f"Resuming interrupted run: {len(saved)}/{len(subjects)} PDFs already downloaded")
+        if manifest is not None:
+            for relpath, subject in saved.items():
+                entry = journal.done[relpath]
+                previous = manifest.get(relpath)
+                written = not previous or previous['sha256'] != entry['sha256']
+                manifest.record(relpath, subject, StreamResult(os.path.join(DOWNLOAD_DIR, relpath),
+                                                               entry['size'], entry['sha256'], written))
+    else:
+        journal.start(USER_CONFIG)
+
+    journal.record_subjects((subject_relpath(subject), subject) for subject in subjects)
+    return journal, [subject for subject in subjects if subject_relpath(subject) not in saved]
+
+def fresh_subjects(manifest, subjects, max_age):
+    """Subjects fetched with the same postback less than max_age seconds ago
+
+    The manifest entry must hold the subject's target/argument and a
+    'checked' time within max_age, and the file must still be on disk with
+    the recorded size.
+    """
+    fresh = []
+    now = datetime.now()
+    for subject in subjects:
+        relpath = subject_relpath(subject)
+        entry = manifest.get(relpath)
+        if not entry or (entry.get('target'), entry.get('argument')) != (subject['target'], subject['argument']):
+            continue
+        try:
+            age = (now - datetime.fromisoformat(entry['checked'])).total_seconds()
+            if 0 <= age < max_age and os.path.getsize(os.path.join(DOWNLOAD_DIR, relpath)) == entry['size']:
+                fresh.append(subject)
+        except (KeyError, TypeError, ValueError, OSError):
+            pass
+    return fresh
+
+def finish_manifest(manifest, logger, canceled):
+    """Report sync results and persist the manifest
+
+    Subjects that disappeared from the site are only reported (their files
+    are left in place) and dropped from the manifest after a complete run.
+    """
+    stats = manifest.stats
+    if not canceled:
+        removed = manifest.removed()
+        for relpath, entry in sorted(removed.items()):
+            logger.warning(f"REMOVED: {entry['name']} is no longer listed (file kept: {relpath})")
+        manifest.drop(removed)
+        stats['removed'] = len(removed)
+
+    manifest.save()
+    logger.info(f"Sync summary: {stats['new']} new, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+    if not canceled and is_config_folder(manifest.folder):
+        record_snapshot(manifest.folder, logger)
+
+def is_config_folder(folder):
+    """Whether folder is a configuration folder updated in place (not a Run_* folder)"""
+    folder = os.path.abspath(folder)
+    return (os.path.dirname(folder) == os.path.abspath(BASE_DOWNLOAD_DIR)
+            and not os.path.basename(folder).startswith("Run_"))
+
+def record_snapshot(folder, logger, reason=None):
+    """Add the folder's current PDFs to its snapshot history (see ase_snapshots)
+
+    Returns the snapshot id, or None if disabled, empty or failed.
+    """
+    if not SNAPSHOT_ENABLED:
+        return None
+    try:
+        import ase_snapshots
+        return ase_snapshots.record_snapshot(folder, logger, SNAPSHOT_KEEP_LAST, SNAPSHOT_KEEP_DAILY, reason)
+    except Exception as e:
+        logger.warning(f"Could not snapshot {folder}: {e}")
+        return None
+
+def download_pdfs(session, subjects, soup, logger, cancel_check=None, workers=None, sync=None, fresh_for=None):
     """Download all PDFs organized by semester
 
     Args:
         cancel_check: Optional callable that returns True if download should be canceled
+        workers: Number of parallel workers (defaults to DOWNLOAD_WORKERS, 1 = serial)
+        sync: Only write new or changed PDFs (defaults to SYNC_MODE)
+        fresh_for: Don't post back for PDFs fetched less than this many seconds ago
+                   (see fresh_subjects)
+    """
+    sync = SYNC_MODE if sync is None else sync
+    manifest = Manifest.load(DOWNLOAD_DIR)
+    for subject in subjects:
+        manifest.mark_seen(subject_relpath(subject))
+    store = get_blob_store()
+    store_before = store.snapshot() if store else None
+    journal, remaining = open_journal(subjects, logger, manifest)
+    if fresh_for:
+        fresh = {subject_relpath(subject) for subject in fresh_subjects(manifest, remaining, fresh_for)}
+        if fresh:
+            logger.info(f"{len(fresh)} PDFs were fetched less than {fresh_for // 60:.0f} min ago, not fetching them again")
+            for relpath in fresh:
+                manifest.keep(relpath)
+            remaining = [subject for subject in remaining if subject_relpath(subject) not in fresh]
+
+    publish_progress(PhaseStarted('download', len(remaining)))
+    finished = False
+    try:
+        workers = max(1, min(workers or DOWNLOAD_WORKERS, MAX_DOWNLOAD_WORKERS, len(remaining) or 1))
+        get_rate_limiter().scale(workers, RATE_LIMIT_MAX_TOTAL)
+        if workers > 1:
+            success_count, canceled = download_pdfs_concurrent(session, remaining, soup, logger, cancel_check,
+                                                               workers, manifest, sync, journal)
+        else:
+            success_count, canceled = download_pdfs_serial(session, remaining, soup, logger, cancel_check,
+                                                           manifest, sync, journal)
+
+        success_count += len(subjects) - len(remaining)
+        if not canceled and success_count == len(subjects):
+            journal.finish()
+        finished = not canceled
+    finally:
+        journal.close()
+        publish_progress(PhaseFinished('download', finished))
+
+    finish_manifest(manifest, logger, canceled)
+    log_store_summary(store_before, logger)
+    return success_count
+
+def download_pdfs_serial(session, subjects, soup, logger, cancel_check, manifest, sync, journal=None):
+    """Download PDFs one at a time (polite default mode)
+
+    Returns (success_count, canceled).
     """
     logger.info("Starting downloads...")
 
     success_count = 0
+    client = postback_client(soup, session)
+    if not client:
+        logger.error("No form found on subjects page")
+        return success_count, False
 
     for i, subject in enumerate(subjects, 1):
         # Check if user canceled
         if cancel_check and cancel_check():
             logger.warning("Download canceled by user")
-            break
+            return success_count, True
 
         logger.info(f"Downloading {i}/{len(subjects)}: {subject['name']} [{subject.get('semester', 'Unknown')}]")
 
+        success = False
         try:
-            # Get current form data
-            action, form_data = get_form_data(soup)
-            if not action:
-                logger.error(f"No form data for {subject['name']}")
-                continue
+            success = download_subject_with_fallback(client, subject, logger, manifest, sync, journal)
+            if success is None:
+                return success_count, False
+            if success:
+                success_count += 1
+        except CircuitOpenError as e:
+            # Not attempted: the subject stays pending for the next run
+            success = None
+            logger.error(f"{e} - stopping, the next run resumes the remaining downloads")
+            return success_count, False
+        except Exception as e:
+            logger.error(f"Error downloading {subject['name']}: {e}")
+        finally:
+            if success is not None:
+                publish_progress(SubjectCompleted(subject, bool(success)))
+    
+    return success_count, False
 
-            # Set download parameters
-            form_data['__EVENTTARGET'] = subject['target']
-            form_data['__EVENTARGUMENT'] = subject['argument']
+def download_pdfs_concurrent(session, subjects, soup, logger, cancel_check, workers, manifest, sync, journal=None):
+    """Download PDFs with a bounded pool of workers
 
-            # Submit download request
-            response = session.post(action, data=form_data)
+    Worker 1 reuses the session that already reached the subjects page. Every
+    other worker creates its own session and navigates to the same page, so
+    each one posts back with its own consistent ASP.NET state. All sessions
+    share the process-wide rate limiter, which keeps the combined pace polite.
 
-            if response.status_code == 200 and response.content.startswith(b'%PDF'):
-                # Create semester subfolder
-                semester = subject.get('semester', 'Unknown')
-                semester_dir = os.path.join(DOWNLOAD_DIR, semester)
-                os.makedirs(semester_dir, exist_ok=True)
+    Returns (success_count, canceled).
+    """
+    logger.info(f"Starting downloads with {workers} parallel workers...")
 
-                # Clean filename: remove diacritics, clean special chars, remove extra spaces
-                clean_name = remove_diacritics(subject['name'])
-                clean_name = re.sub(r'[<>:"/\\|?*]', '_', clean_name)
-                clean_name = re.sub(r'\s+', '_', clean_name)
-                clean_name = clean_name.strip('._')
+    pending = queue.Queue()
+    for subject in subjects:
+        pending.put(subject)
 
-                filename = f"{clean_name}.pdf"
+    lock = threading.Lock()
+    state = {'started': 0, 'success': 0, 'canceled': False}
 
-                filepath = os.path.join(semester_dir, filename)
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
+    def is_canceled():
+        if cancel_check and cancel_check():
+            with lock:
+                if not state['canceled']:
+                    state['canceled'] = True
+                    logger.warning("Download canceled by user")
+            return True
+        return False
 
-                size_kb = len(response.content) // 1024
-                logger.info(f"SUCCESS: Saved {semester}/{filename} ({size_kb} KB)")
-                success_count += 1
-            else:
-                logger.error(f"Download failed for {subject['name']}")
-                
-        except Exception as e:
-            logger.error(f"Error downloading {subject['name']}: {e}")
-        
-        # Be nice to the server
-        time.sleep(2)
-    
-    return success_count
+    def worker(worker_id):
+        worker_session, worker_soup = session, soup
+        if worker_id > 1:
+            # Fresh navigation: a separate ASP.NET session per worker avoids the
+            # server serializing requests that share one session cookie
+            worker_session = create_session()
+            worker_soup = navigate_to_subjects(worker_session, logger, use_cache=False)
+            if not worker_soup:
+                logger.error(f"Worker {worker_id} could not reach the subjects page, leaving its share to the others")
+                return
+        client = postback_client(worker_soup, worker_session)
+        if not client:
+            logger.error(f"Worker {worker_id}: no form found on subjects page")
+            return
+
+        while not is_canceled():
+            try:
+                subject = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            with lock:
+                state['started'] += 1
+                position = state['started']
+            logger.info(f"Downloading {position}/{len(subjects)}: {subject['name']} [{subject.get('semester', 'Unknown')}] (worker {worker_id})")
+
+            success = False
+            try:
+                success = download_subject_with_fallback(client, subject, logger, manifest, sync, journal)
+                if success:
+                    with lock:
+                        state['success'] += 1
+                if success is None:
+                    return
+            except CircuitOpenError as e:
+                # Not attempted: the subject stays pending for the next run
+                success = None
+                logger.error(f"{e} - worker {worker_id} stopping, the next run resumes the remaining downloads")
+                return
+            except Exception as e:
+                logger.error(f"Error downloading {subject['name']}: {e}")
+            finally:
+                if success is not None:
+                    publish_progress(SubjectCompleted(subject, bool(success)))
+
+    threads = [threading.Thread(target=worker, args=(worker_id,), daemon=True)
+               for worker_id in range(1, workers + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return state['success'], state['canceled']
+
+def normalize_config(config):
+    """Copy of a configuration with the study form written without diacritics
+
+    EXAMPLE_CONFIGS use e.g. 'FRECVENȚĂ', while validate_config expects 'FRECVENTA'.
+    """
+    config = dict(config)
+    config['study_form'] = remove_diacritics(config.get('study_form', 'FRECVENTA')).upper()
+    return config
+
+def batch_download_dir(config, sync):
+    """Output folder of one configuration in a batch run"""
+    if sync:
+        return os.path.join(BASE_DOWNLOAD_DIR, config_folder_name(config))
+    return os.path.join(BASE_DOWNLOAD_DIR, f"Run_{RUN_TIMESTAMP}", config_folder_name(config))
+
+def download_batch(configs, logger, cancel_check=None, workers=None, sync=None):
+    """Download several configurations in one run, sharing their navigation
+
+    The configurations are arranged as a tree: the main page is loaded once,
+    each faculty page once per faculty, and every program/year postback fans
+    out from the saved faculty page. Run one after another, every config
+    would cost all 3 page loads.
+
+    Args:
+        configs: Dict of name -> configuration (same keys as USER_CONFIG)
+
+    Returns a list of per-config result dicts (name, status, success, total,
+    requests, folder) in the order the configs were given.
+    """
+    global USER_CONFIG, DOWNLOAD_DIR
+    sync = SYNC_MODE if sync is None else sync
+    original_config, original_dir = USER_CONFIG, DOWNLOAD_DIR
+
+    rate_limiter = get_rate_limiter()
+    start_count = rate_limiter.request_count
+    results = {name: {'name': name, 'status': 'not started', 'success': 0, 'total': 0,
+                      'requests': 0, 'folder': None}
+               for name in configs}
+    page_loads = Counter(main=0, faculty=0, program=0)
+
+    try:
+        download_batch_tree(configs, results, page_loads, logger, cancel_check, workers, sync)
+    finally:
+        USER_CONFIG, DOWNLOAD_DIR = original_config, original_dir
+
+    log_batch_summary(results.values(), rate_limiter.request_count - start_count, page_loads, logger)
+    return list(results.values())
+
+def download_batch_tree(configs, results, page_loads, logger, cancel_check, workers, sync):
+    """Walk the main page -> faculty page -> program/year tree of a batch"""
+    global USER_CONFIG
+
+    # Validate everything up front so a typo doesn't stop the batch halfway
+    valid = {}
+    for name, config in configs.items():
+        USER_CONFIG = normalize_config(config)
+        try:
+            validate_config()
+            valid[name] = USER_CONFIG
+        except ValueError as e:
+            results[name]['status'] = f"invalid configuration: {e}"
+            logger.error(f"Skipping {name}: {e}")
+    if not valid:
+        return
+
+    rate_limiter = get_rate_limiter()
+    session = create_session()
+    count = rate_limiter.request_count
+    main_soup = load_main_page(session, logger)
+    page_loads['main'] += 1
+    shared_requests = rate_limiter.request_count - count
+    if not main_soup:
+        for name in valid:
+            results[name]['status'] = "main page failed"
+        return
+
+    # Group configurations by the faculty row they select on the main page
+    faculties = {}
+    for name, config in valid.items():
+        USER_CONFIG = config
+        faculty_param = find_faculty(main_soup, logger)
+        if faculty_param:
+            faculties.setdefault(faculty_param, []).append(name)
+        else:
+            results[name]['status'] = "faculty not found"
+
+    logger.info(f"Batch: {len(valid)} configurations across {len(faculties)} faculties")
+
+    for names in faculties.values():
+        if cancel_check and cancel_check():
+            return
+
+        USER_CONFIG = valid[names[0]]
+        count = rate_limiter.request_count
+        faculty_soup = select_faculty(session, main_soup, logger)
+        page_loads['faculty'] += 1
+        # Shared page loads are charged to the first config that needed them
+        results[names[0]]['requests'] += shared_requests + rate_limiter.request_count - count
+        shared_requests = 0
+        if not faculty_soup:
+            for name in names:
+                results[name]['status'] = "faculty selection failed"
+            continue
+
+        for name in names:
+            if cancel_check and cancel_check():
+                return
+            count = rate_limiter.request_count
+            page_loads['program'] += 1
+            download_batch_config(session, faculty_soup, name, valid[name], results[name],
+                                  logger, cancel_check, workers, sync)
+            results[name]['requests'] += rate_limiter.request_count - count
+
+def download_batch_config(session, faculty_soup, name, config, result, logger, cancel_check, workers, sync):
+    """Download one configuration of a batch, starting from its saved faculty page"""
+    global USER_CONFIG, DOWNLOAD_DIR
+    USER_CONFIG = config
+    DOWNLOAD_DIR = batch_download_dir(config, sync)
+    result['folder'] = DOWNLOAD_DIR
+
+    logger.info("=" * 50)
+    logger.info(f"Batch: {name} ({config['program_name']} {config['study_years']}, {config['target_year']})")
+
+    try:
+        soup = select_program_year(session, faculty_soup, logger)
+        if not soup:
+            result['status'] = "program/year not found"
+            return
+
+        subjects = find_obligatory_subjects(soup, logger)
+        result['total'] = len(subjects)
+        if not subjects:
+            result['status'] = "no obligatory subjects"
+            return
+
+        result['success'] = download_pdfs(session, subjects, soup, logger, cancel_check=cancel_check,
+                                          workers=workers, sync=sync)
+        result['status'] = "ok" if result['success'] == len(subjects) else "incomplete"
+    except Exception as e:
+        result['status'] = f"error: {e}"
+        logger.error(f"Batch: {name} failed: {e}")
+
+def log_batch_summary(results, total_requests, page_loads, logger):
+    """Log the per-config outcome of a batch run and the page loads it saved"""
+    logger.info("=" * 50)
+    logger.info("BATCH SUMMARY")
+    for result in results:
+        logger.info(f"  {result['name']}: {result['status']} - {result['success']}/{result['total']} PDFs "
+                    f"({result['requests']} requests)")
+
+    # One by one, every config that got as far as its program postback would
+    # have loaded the main, faculty and program pages itself
+    separate = 3 * page_loads['program']
+    shared = sum(page_loads.values())
+    logger.info(f"Total requests: {total_requests} "
+                f"(navigation: {shared} page loads instead of {separate} for separate runs)")
+
+def extract_fields(folders, logger):
+    """Post-download stage: write the fields of the folders' PDFs to a table (see ase_extract)"""
+    if not folders:
+        return None
+    import ase_extract
+    records, path = ase_extract.extract_to_file(folders, logger, EXTRACT_FORMAT, workers=EXTRACT_WORKERS)
+    if records is not None:
+        print(f"\nFields of {len(records)} PDFs written to {path}")
+    return path
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Download obligatory subject PDFs from ASE")
+    parser.add_argument('--workers', type=int, default=DOWNLOAD_WORKERS,
+                        help=f"parallel download workers, 1-{MAX_DOWNLOAD_WORKERS} (default: {DOWNLOAD_WORKERS}, serial); "
+                             f"the request rate is capped at {RATE_LIMIT_MAX:g} req/s per worker and "
+                             f"{RATE_LIMIT_MAX_TOTAL:g} req/s in total")
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync',
+                        help="'sync' uses requests, 'async' uses the aiohttp engine (default: sync)")
+    parser.add_argument('--sync', action='store_true', default=SYNC_MODE,
+                        help="download into a stable per-program folder and only write new or changed PDFs")
+    parser.add_argument('--no-nav-cache', dest='nav_cache', action='store_false', default=NAV_CACHE_ENABLED,
+                        help="always navigate from the main page instead of reusing cached page state")
+    parser.add_argument('--batch', nargs='+', metavar='NAME',
+                        help=f"download several EXAMPLE_CONFIGS in one run ('all' or any of: {', '.join(EXAMPLE_CONFIGS)})")
+    parser.add_argument('--batch-file', metavar='PATH',
+                        help="download every configuration in a JSON file ({name: config}) in one run")
+    parser.add_argument('--prometheus', action='store_true', default=METRICS_PROMETHEUS,
+                        help="also write run metrics as a Prometheus textfile (_logs/ase_pdf_scraper.prom)")
+    parser.add_argument('--debug-capture', choices=['off', 'on_error', 'always'], default=DEBUG_CAPTURE,
+                        help=f"which fetched pages to keep in _debug (default: {DEBUG_CAPTURE})")
+    parser.add_argument('--extract', action='store_true', default=EXTRACT_AFTER_DOWNLOAD,
+                        help=f"read credits, hours, evaluation and coordinators from the PDFs into fise.{EXTRACT_FORMAT}")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument('--record', metavar='CASSETTE',
+                          help="save every request/response of this run to a cassette (.zip)")
+    cassette.add_argument('--replay', metavar='CASSETTE',
+                          help="re-run offline from a recorded cassette, using its configuration")
+    return parser.parse_args()
+
+def load_batch_configs(args):
+    """Configurations selected with --batch / --batch-file, or None for a single run"""
+    if not args.batch and not args.batch_file:
+        return None
+
+    configs = {}
+    if args.batch:
+        names = list(EXAMPLE_CONFIGS) if 'all' in args.batch else args.batch
+        for name in names:
+            if name not in EXAMPLE_CONFIGS:
+                raise ValueError(f"Unknown batch configuration: {name}")
+            configs[name] = EXAMPLE_CONFIGS[name]
+    if args.batch_file:
+        with open(args.batch_file, 'r', encoding='utf-8') as f:
+            configs.update(json.load(f))
+    return configs
+
+def setup_cassette(args, batch_configs):
+    """Open the --record/--replay cassette
+
+    Recording stores the configuration in the cassette; replay takes it
+    from there. Returns the batch configurations to run (or None).
+    """
+    global CASSETTE_MODE, CASSETTE_PATH, USER_CONFIG
+    if not args.record and not args.replay:
+        return batch_configs
+
+    CASSETTE_MODE, CASSETTE_PATH = ('record', args.record) if args.record else ('replay', args.replay)
+    # Every page must go through the cassette, and only the sync engine is wired to it
+    if args.engine == 'async':
+        print("Record/replay runs use the sync engine")
+    args.nav_cache = False
+    args.engine = 'sync'
+    cassette = get_cassette()
+    if CASSETTE_MODE == 'record':
+        cassette.meta = {'batch': batch_configs} if batch_configs else {'config': USER_CONFIG}
+        return batch_configs
+    if not batch_configs and cassette.meta.get('batch'):
+        return cassette.meta['batch']
+    if cassette.meta.get('config'):
+        USER_CONFIG = cassette.meta['config']
+    return batch_configs
 
 def main():
     """Main function"""
+    global DOWNLOAD_DIR, METRICS_PROMETHEUS, DEBUG_CAPTURE, NAV_CACHE_ENABLED
+    args = parse_args()
+    METRICS_PROMETHEUS = args.prometheus
+    DEBUG_CAPTURE = args.debug_capture
+
     print("ASE PDF Downloader - Universal Version")
     print("=" * 50)
     
+    logger = logging.getLogger(__name__)
+
+    # Progress lines (PDFs done, throughput, ETA) are rendered from the download events
+    tracker = ProgressTracker()
+    progress_callbacks = (tracker, log_progress(tracker, logger))
+    for callback in progress_callbacks:
+        get_progress_channel().subscribe(callback)
     try:
+        batch_configs = setup_cassette(args, load_batch_configs(args))
+        # cache_page checks the global, so --no-nav-cache (or a cassette) also stops cache writes
+        NAV_CACHE_ENABLED = args.nav_cache
+        if CASSETTE_MODE:
+            print(f"Cassette {CASSETTE_MODE}: {CASSETTE_PATH}")
+        if batch_configs:
+            if args.sync:
+                # Every configuration syncs its own stable folder
+                DOWNLOAD_DIR = BASE_DOWNLOAD_DIR
+            logger = setup_logging()
+            if args.engine == 'async':
+                logger.warning("Batch mode always uses the sync engine")
+            print(f"Batch run: {len(batch_configs)} configurations")
+            start_metrics({'program': 'batch'})
+            results = download_batch(batch_configs, logger, workers=args.workers, sync=args.sync)
+            print(f"\nBatch complete!")
+            for result in results:
+                print(f"   {result['name']}: {result['status']} - {result['success']}/{result['total']} PDFs")
+            if args.extract:
+                folders = sorted({result['folder'] for result in results if result['success']})
+                extract_fields(folders, logger)
+            return
+
         # Validate configuration
         validate_config()
         print(f"Configuration validated for: {USER_CONFIG['faculty_keywords'][0]} - {USER_CONFIG['program_name']}")
-        print(f"Creating run folder: Run_{RUN_TIMESTAMP}")
+        interrupted = None if args.sync else find_interrupted_run()
+        if args.sync:
+            # Sync mode updates one stable folder per configuration
+            DOWNLOAD_DIR = os.path.join(BASE_DOWNLOAD_DIR, config_folder_name(USER_CONFIG))
+            print(f"Syncing folder: {os.path.basename(DOWNLOAD_DIR)}")
+        elif interrupted:
+            # Pick up where a canceled or crashed run stopped
+            DOWNLOAD_DIR = interrupted
+            print(f"Resuming interrupted run folder: {os.path.basename(DOWNLOAD_DIR)}")
+        else:
+            print(f"Creating run folder: Run_{RUN_TIMESTAMP}")
         
         logger = setup_logging()
-        session = create_session()
         
         logger.info(f"Starting download for: {USER_CONFIG}")
+        start_metrics()
         
-        # Navigate to subjects page
-        soup = navigate_to_subjects(session, logger)
-        if not soup:
-            logger.error("Failed to navigate to subjects page")
-            return
-        
-        # Find obligatory subjects
-        subjects = find_obligatory_subjects(soup, logger)
-        if not subjects:
-            logger.error("No obligatory subjects found")
-            return
-        
-        # Download PDFs
-        success_count = download_pdfs(session, subjects, soup, logger)
+        if args.engine == 'async':
+            import ase_async_downloader
+            result = ase_async_downloader.run_download(logger, workers=args.workers, sync=args.sync)
+            if not result or not result[1]:
+                return
+            success_count, subjects = result
+        else:
+            session = create_session()
+
+            # Navigate to subjects page
+            soup = navigate_to_subjects(session, logger, use_cache=args.nav_cache)
+            if not soup:
+                logger.error("Failed to navigate to subjects page")
+                return
+            
+            # Find obligatory subjects
+            subjects = find_obligatory_subjects(soup, logger)
+            if not subjects:
+                logger.error("No obligatory subjects found")
+                return
+            
+            # Download PDFs
+            success_count = download_pdfs(session, subjects, soup, logger, workers=args.workers, sync=args.sync)
         
         # Summary
         logger.info("=" * 50)
@@ -569,8 +1809,11 @@ def main():
         print(f"            [PDF files - no diacritics, full names]")
         print(f"      _logs/")
         print(f"         download_*.log")
-        print(f"      _debug/  (for troubleshooting)")
-        print(f"      _archive/  (old downloads for comparison)")
+        print(f"      _debug/  (pages for troubleshooting, see DEBUG_CAPTURE)")
+        print(f"      _snapshots/  (history of the program folders, see ase_snapshots.py)")
+
+        if args.extract:
+            extract_fields([DOWNLOAD_DIR], logger)
         
     except ValueError as e:
         print(f"Configuration Error: {e}")
@@ -579,6 +1822,13 @@ def main():
     except Exception as e:
         print(f"Unexpected error: {e}")
         print("Check the log files for more details.")
+        report_debug_error(logger)
+    finally:
+        for callback in progress_callbacks:
+            get_progress_channel().unsubscribe(callback)
+        finish_metrics(logger)
+        close_cassette(logger)
+        flush_debug_capture(logger)
 
 if __name__ == "__main__":
     main()
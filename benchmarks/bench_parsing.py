@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Parser Benchmarks
+Times the page parsing and lookup functions of ase_universal_downloader
+(parse_html, get_form_data, find_faculty, find_program_and_year,
+find_obligatory_subjects, extract_clean_subject_name) on:
+
+- fixtures: the committed GridView-shaped pages in benchmarks/fixtures
+- synthetic: generated pages with thousands of rows and a large viewstate
+  (see synthetic.py)
+- debug: real pages saved by a run in ASE_PDFs/_debug (with --pages)
+
+Every function reports its best and median time per call and its peak
+traced memory. Results are compared with a stored baseline; a function
+slower (or hungrier) than the baseline by more than --threshold is
+measured again (--confirm times, keeping the best) and fails the run with
+exit code 1 if it stays over, so a noisy machine doesn't cause false alarms.
+
+USAGE:
+    python benchmarks/bench_parsing.py --save-baseline   # on the reference commit
+    python benchmarks/bench_parsing.py                   # after a change
+    python benchmarks/bench_parsing.py --pages ASE_PDFs/_debug
+"""
+
+import argparse
+import gc
+import glob
+import gzip
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import ase_universal_downloader as downloader
+import synthetic
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+BASELINE_VERSION = 1
+
+# Large enough that a quadratic pass shows up clearly
+SYNTHETIC_SIZE = {'faculties': 200, 'programs': 1000, 'subjects': 3000, 'viewstate_kb': 300}
+
+# Differences below these are noise: timer and scheduler jitter on the
+# sub-millisecond functions, allocator and interned strings for memory
+TIME_SLACK_MS = 1.0
+MEMORY_SLACK_KB = 64
+
+
+def load_fixture_pages():
+    """The committed fixture pages as {'main', 'faculty', 'subjects'}"""
+    pages = {}
+    for name in ('main', 'faculty', 'subjects'):
+        with open(os.path.join(FIXTURES_DIR, f"{name}.html"), 'r', encoding='utf-8') as f:
+            pages[name] = f.read()
+    return pages
+
+def load_debug_pages(folder):
+    """Newest main, faculty and subjects pages saved by save_debug_page (gzip'd or plain)"""
+    pages = {}
+    for name, prefix in (('main', 'main_page'), ('faculty', 'faculty_programs'), ('subjects', 'subjects_page')):
+        paths = glob.glob(os.path.join(folder, f"{prefix}_*.html")) + \
+            glob.glob(os.path.join(folder, f"{prefix}_*.html.gz"))
+        if paths:
+            newest = max(paths, key=os.path.getmtime)
+            with (gzip.open if newest.endswith('.gz') else open)(newest, 'rt', encoding='utf-8') as f:
+                pages[name] = f.read()
+    return pages
+
+def build_cases(args):
+    """[(case name, pages, config)] to benchmark"""
+    cases = [
+        ('fixtures', load_fixture_pages(), synthetic.BENCH_CONFIG),
+        ('synthetic', synthetic.pages(**SYNTHETIC_SIZE), synthetic.BENCH_CONFIG),
+    ]
+    if args.pages:
+        pages = load_debug_pages(args.pages)
+        if not pages:
+            raise SystemExit(f"No saved pages found in {args.pages}")
+        # Real pages were saved for the configured program
+        cases.append(('debug', pages, downloader.USER_CONFIG))
+    return cases
+
+def case_functions(pages, logger):
+    """[(function name, callable, check)] for the pages of one case
+
+    check(result) tells whether the function found what the page holds, so
+    a broken fixture can't produce a fast but meaningless number.
+    """
+    soups = {name: downloader.parse_html(html) for name, html in pages.items()}
+    functions = []
+    for name, html in pages.items():
+        functions.append((f"parse_html[{name}]", lambda html=html: downloader.parse_html(html), bool))
+    for name, soup in soups.items():
+        functions.append((f"get_form_data[{name}]", lambda soup=soup: downloader.get_form_data(soup),
+                          lambda result: result[0] is not None))
+    if 'main' in soups:
+        functions.append(("find_faculty", lambda: downloader.find_faculty(soups['main'], logger), bool))
+    if 'faculty' in soups:
+        functions.append(("find_program_and_year",
+                          lambda: downloader.find_program_and_year(soups['faculty'], logger), bool))
+    if 'subjects' in soups:
+        functions.append(("find_obligatory_subjects",
+                          lambda: downloader.find_obligatory_subjects(soups['subjects'], logger), bool))
+        texts = [row.get_text(separator='\n', strip=True) for row in soups['subjects'].find_all('td')]
+        functions.append(("extract_clean_subject_name",
+                          lambda: [downloader.extract_clean_subject_name(text) for text in texts], bool))
+    return functions
+
+def measure(function, repeat):
+    """Best and median seconds per call, and peak traced KB of one call"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    samples = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(samples), statistics.median(samples), peak / 1024
+
+def run(cases, repeat):
+    """Benchmark every case
+
+    Returns (results, benchmarks): results maps 'case/function' to
+    {'time_ms', 'median_ms', 'peak_kb'}, benchmarks maps it to
+    (config, function) for measuring again.
+    """
+    logger = logging.getLogger("bench")
+    logger.propagate = False
+    logger.setLevel(logging.CRITICAL)
+
+    results = {}
+    benchmarks = {}
+    for case, pages, config in cases:
+        downloader.USER_CONFIG = config
+        sizes = ", ".join(f"{name} {len(html) // 1024} KB" for name, html in pages.items())
+        print(f"\n{case} ({sizes})")
+        for name, function, check in case_functions(pages, logger):
+            if not check(function()):
+                raise SystemExit(f"{case}/{name} found nothing - the pages don't match the configuration")
+            best, median, peak = measure(function, repeat)
+            results[f"{case}/{name}"] = {'time_ms': best * 1000, 'median_ms': median * 1000, 'peak_kb': peak}
+            benchmarks[f"{case}/{name}"] = (config, function)
+            print(f"  {name:<32} {best * 1000:10.3f} ms  (median {median * 1000:.3f})  {peak:10.0f} KB")
+    return results, benchmarks
+
+def over_threshold(result, base, threshold):
+    """(slower, hungrier) flags of one result against its baseline entry"""
+    slower = base['time_ms'] > 0 and result['time_ms'] - base['time_ms'] * (1 + threshold) > TIME_SLACK_MS
+    hungrier = result['peak_kb'] - base['peak_kb'] * (1 + threshold) > MEMORY_SLACK_KB
+    return slower, hungrier
+
+def confirm(result, base, benchmark, threshold, attempts, repeat):
+    """Measure a flagged function again, keeping its best time; returns the updated result"""
+    config, function = benchmark
+    downloader.USER_CONFIG = config
+    for _ in range(attempts):
+        best, _, peak = measure(function, repeat)
+        result = dict(result, time_ms=min(result['time_ms'], best * 1000), peak_kb=min(result['peak_kb'], peak))
+        if not any(over_threshold(result, base, threshold)):
+            break
+    return result
+
+def compare(results, benchmarks, baseline, threshold, attempts, repeat):
+    """Print the change against the baseline; returns the regressed keys"""
+    regressions = []
+    print(f"\nAgainst baseline (threshold {threshold:.0%}):")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            print(f"  {key:<45} new")
+            continue
+        if any(over_threshold(result, base, threshold)):
+            result = results[key] = confirm(result, base, benchmarks[key], threshold, attempts, repeat)
+        slower, hungrier = over_threshold(result, base, threshold)
+        time_change = result['time_ms'] / base['time_ms'] - 1 if base['time_ms'] else 0.0
+        flag = "  REGRESSION" if slower or hungrier else ""
+        print(f"  {key:<45} time {time_change:+7.1%}  memory {result['peak_kb'] - base['peak_kb']:+8.0f} KB{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+def load_baseline(path):
+    """Stored results, or None if there is no usable baseline"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if baseline.get('version') != BASELINE_VERSION:
+        return None
+    return baseline
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': BASELINE_VERSION,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'html_backend': downloader.HTML_BACKEND,
+            'results': results,
+        }, f, indent=2)
+    print(f"\nBaseline saved to {path}")
+
+def main():
+    """Run the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark the ASE page parsing functions")
+    parser.add_argument('--pages', metavar='DIR', help="also benchmark real pages saved in this _debug folder")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help=f"baseline file (default: {BASELINE_PATH})")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown/memory growth as a fraction (default: 0.25)")
+    parser.add_argument('--repeat', type=int, default=5, help="timing samples per function (default: 5)")
+    parser.add_argument('--confirm', type=int, default=3,
+                        help="extra measurements of a function over the threshold (default: 3)")
+    args = parser.parse_args()
+
+    results, benchmarks = run(build_cases(args), args.repeat)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        # A check without a baseline would pass whatever the timings are
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline on the reference version first")
+        return 1
+    if baseline.get('python') != platform.python_version() or baseline.get('machine') != platform.machine():
+        print(f"\nNote: baseline was taken with Python {baseline.get('python')} on {baseline.get('machine')}")
+
+    regressions = compare(results, benchmarks, baseline['results'], args.threshold, args.confirm, args.repeat)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+ASE PDF Downloader - Startup Benchmark
+Measures how long the GUI takes to appear, in fresh processes:
+
+- import_gui: python -c "import ase_gui_downloader" from launch to exit
+  (no display needed)
+- first_frame: launch until the window is drawn
+- stack_ready: launch until the downloader stack finished loading in the
+  background
+
+first_frame and stack_ready come from the ASE_STARTUP_PROBE hook of the GUI
+and need a display; they are skipped when the window cannot open. With
+--command the same probe times a packaged build, e.g.
+dist/ASE_PDF_Scraper/ASE_PDF_Scraper.exe.
+
+Every metric is the median of --runs launches. Like bench_parsing.py, a
+metric slower than the baseline by more than --threshold is measured again
+(--confirm times) and fails the run with exit code 1 if it stays over.
+
+USAGE:
+    python benchmarks/bench_startup.py --save-baseline   # on the reference commit
+    python benchmarks/bench_startup.py                   # after a change
+    python benchmarks/bench_startup.py --command dist/ASE_PDF_Scraper/ASE_PDF_Scraper.exe
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, "startup_baseline.json")
+BASELINE_VERSION = 1
+
+# A launch that takes longer than this is hung (e.g. a modal dialog)
+LAUNCH_TIMEOUT = 60
+
+# Differences below this are noise (process start-up and window manager jitter)
+TIME_SLACK_MS = 50
+
+
+def time_import(runs):
+    """Median seconds of a fresh interpreter importing the GUI module"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import ase_gui_downloader"], cwd=REPO_DIR, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def probe_once(command):
+    """Launch the GUI with the startup probe; returns {metric: seconds} or None without a display"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "probe.json")
+        env = dict(os.environ, ASE_STARTUP_PROBE=path)
+        launched = time.time()
+        result = subprocess.run(command, cwd=REPO_DIR, env=env, capture_output=True, timeout=LAUNCH_TIMEOUT)
+        if result.returncode != 0 or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            timings = json.load(f)
+    return {metric: stamp - launched for metric, stamp in timings.items()}
+
+def time_window(command, runs):
+    """Median first_frame/stack_ready seconds, or {} when the GUI cannot open"""
+    samples = {}
+    for _ in range(runs):
+        timings = probe_once(command)
+        if timings is None:
+            return {}
+        for metric, seconds in timings.items():
+            samples.setdefault(metric, []).append(seconds)
+    return {metric: statistics.median(values) for metric, values in samples.items()}
+
+def measure(args):
+    """{metric: median seconds} for this run"""
+    results = {}
+    if not args.command:
+        results['import_gui'] = time_import(args.runs)
+    command = args.command or [sys.executable, "ase_gui_downloader.py"]
+    window = time_window(command, args.runs)
+    if not window:
+        print("Window metrics skipped: the GUI could not open (no display?)")
+    results.update(window)
+    for metric, seconds in results.items():
+        print(f"  {metric:<12} {seconds * 1000:8.0f} ms")
+    return results
+
+def over_threshold(seconds, base, threshold):
+    return base > 0 and (seconds - base * (1 + threshold)) * 1000 > TIME_SLACK_MS
+
+def compare(results, baseline, threshold, attempts, args):
+    """Print the change against the baseline; returns the regressed metrics"""
+    regressions = []
+    print(f"\nAgainst baseline (threshold {threshold:.0%}):")
+    for metric, seconds in results.items():
+        base = baseline.get(metric)
+        if base is None:
+            print(f"  {metric:<12} new")
+            continue
+        for _ in range(attempts if over_threshold(seconds, base, threshold) else 0):
+            seconds = min(seconds, measure(args).get(metric, seconds))
+            if not over_threshold(seconds, base, threshold):
+                break
+        flag = "  REGRESSION" if over_threshold(seconds, base, threshold) else ""
+        print(f"  {metric:<12} {seconds * 1000:8.0f} ms  ({seconds / base - 1:+.1%}){flag}")
+        if flag:
+            regressions.append(metric)
+    return regressions
+
+def load_baseline(path):
+    """Stored results, or None if there is no usable baseline"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if baseline.get('version') != BASELINE_VERSION:
+        return None
+    return baseline
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': BASELINE_VERSION,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        }, f, indent=2)
+    print(f"\nBaseline saved to {path}")
+
+def main():
+    """Run the startup benchmark from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark the GUI startup time")
+    parser.add_argument('--command', nargs='+', metavar='ARG',
+                        help="launch this instead of the GUI script (e.g. a packaged build)")
+    parser.add_argument('--runs', type=int, default=5, help="launches per metric (default: 5)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help=f"baseline file (default: {BASELINE_PATH})")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown as a fraction (default: 0.25)")
+    parser.add_argument('--confirm', type=int, default=2,
+                        help="extra measurements of a metric over the threshold (default: 2)")
+    args = parser.parse_args()
+
+    print("Startup times (median):")
+    results = measure(args)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline on the reference version first")
+        return 0
+    if baseline.get('python') != platform.python_version() or baseline.get('machine') != platform.machine():
+        print(f"\nNote: baseline was taken with Python {baseline.get('python')} on {baseline.get('machine')}")
+
+    regressions = compare(results, baseline['results'], args.threshold, args.confirm, args)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
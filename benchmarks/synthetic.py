@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Synthetic ASP.NET GridView pages for the parser benchmarks
+
+Generates the three pages of the site (main, faculty programs, subjects)
+with the markup WebForms renders: a <form> with __VIEWSTATE and
+__EVENTVALIDATION hidden fields, GridView1 tables with header/alternating
+rows, __doPostBack links and image buttons. Row counts and viewstate size
+are parameters, and the rows BENCH_CONFIG looks for are always last, so
+every find_* function walks the whole grid.
+
+USAGE:
+    python benchmarks/synthetic.py --subjects 3000 --viewstate-kb 300 --output pages/
+"""
+
+import argparse
+import base64
+import os
+import random
+
+# Configuration the generated pages (and the committed fixtures) are built for
+BENCH_CONFIG = {
+    'faculty_keywords': ['CIBERNETICA', 'CYBERNETICS'],
+    'program_name': 'Informatica economica',
+    'study_years': '2023-2026',
+    'study_form': 'FRECVENTA',
+    'language': 'romanian',
+    'target_year': 'Anul III',
+}
+
+FACULTIES = [
+    'ADMINISTRAREA AFACERILOR CU PREDARE IN LIMBI STRAINE', 'ADMINISTRATIE SI MANAGEMENT PUBLIC',
+    'AGRIBUSINESS SI ECONOMIA MEDIULUI', 'BUSINESS SI TURISM', 'COMERT',
+    'CONTABILITATE SI INFORMATICA DE GESTIUNE', 'DREPT', 'ECONOMIE TEORETICA SI APLICATA',
+    'FINANTE, ASIGURARI, BANCI SI BURSE DE VALORI', 'MANAGEMENT', 'MARKETING',
+    'RELATII ECONOMICE INTERNATIONALE',
+]
+TARGET_FACULTY = 'CIBERNETICA, STATISTICA SI INFORMATICA ECONOMICA'
+
+PROGRAMS = ['Cibernetica economica', 'Statistica si previziune economica', 'Economie si afaceri internationale',
+            'Finante si banci', 'Contabilitate si informatica de gestiune', 'Marketing', 'Management',
+            'Economia comertului, turismului si serviciilor', 'Administrarea afacerilor']
+SUBJECTS = [('Econometrie', 'Econometrics'), ('Baze de date', 'Databases'), ('Rețele de calculatoare', 'Computer networks'),
+            ('Programare orientată obiect', 'Object oriented programming'), ('Statistică', 'Statistics'),
+            ('Structuri de date', 'Data structures'), ('Sisteme de operare', 'Operating systems'),
+            ('Analiză și diagnoză', 'Analysis and diagnosis'), ('Etică în afaceri', 'Business ethics'),
+            ('Tehnologii web', 'Web technologies')]
+YEAR_LINKS = [('unu', 'Anul I'), ('doi', 'Anul II'), ('trei', 'Anul III')]
+
+ROW_STYLE = 'color:#000066;'
+ALT_STYLE = 'background-color:#F7F7F7;'
+HEADER_STYLE = 'color:White;background-color:#006699;font-weight:bold;'
+
+
+def viewstate(size_kb, seed=0):
+    """Base64 blob of about size_kb KB, like a real serialized __VIEWSTATE"""
+    raw = random.Random(seed).randbytes(size_kb * 1024 * 3 // 4)
+    return base64.b64encode(raw).decode('ascii')
+
+def series(n):
+    """Letter suffix for the n-th repetition of a name: a, b, ..., z, ba, bb, ..."""
+    letters = ''
+    while True:
+        n, digit = divmod(n, 26)
+        letters = chr(ord('a') + digit) + letters
+        if not n:
+            return letters
+
+def page(title, grid, viewstate_kb, seed=0):
+    """Full WebForms page around a grid"""
+    return f'''<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><meta http-equiv="Content-Type" content="text/html; charset=utf-8" /><title>{title}</title>
+<link href="Styles/Site.css" rel="stylesheet" type="text/css" /></head>
+<body>
+    <form method="post" action="./Default.aspx" id="form1">
+<div class="aspNetHidden">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate(viewstate_kb, seed)}" />
+</div>
+<script type="text/javascript">
+//<![CDATA[
+var theForm = document.forms['form1'];
+function __doPostBack(eventTarget, eventArgument) {{
+    if (!theForm.onsubmit || (theForm.onsubmit() != false)) {{
+        theForm.__EVENTTARGET.value = eventTarget;
+        theForm.__EVENTARGUMENT.value = eventArgument;
+        theForm.submit();
+    }}
+}}
+//]]>
+</script>
+<div class="aspNetHidden">
+	<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="CA0B0334" />
+	<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{viewstate(max(1, viewstate_kb // 20), seed + 1)}" />
+</div>
+    <div class="page">
+        <div class="header"><h1>Fișe de disciplină</h1></div>
+        <div class="main">
+{grid}
+        </div>
+    </div>
+    </form>
+</body>
+</html>
+'''
+
+def grid(header_cells, rows):
+    """GridView1 table with a header row and alternating row styles"""
+    header = ''.join(f'<th scope="col">{cell}</th>' for cell in header_cells)
+    body = '\n'.join(f'\t\t<tr style="{ALT_STYLE if i % 2 else ROW_STYLE}">\n{row}\n\t\t</tr>'
+                     for i, row in enumerate(rows))
+    return (f'<div>\n\t<table cellspacing="0" cellpadding="4" rules="all" border="1" id="GridView1" '
+            f'style="border-color:#CCCCCC;border-width:1px;border-style:None;border-collapse:collapse;">\n'
+            f'\t\t<tr style="{HEADER_STYLE}">\n\t\t\t{header}\n\t\t</tr>\n{body}\n\t</table>\n</div>')
+
+def main_page(faculties=len(FACULTIES) + 1, viewstate_kb=20):
+    """Faculty list with one Planuri link per row, the target faculty last"""
+    names = [FACULTIES[i % len(FACULTIES)] + (f' {i // len(FACULTIES)}' if i >= len(FACULTIES) else '')
+             for i in range(faculties - 1)] + [TARGET_FACULTY]
+    rows = [f'\t\t\t<td>{name}</td><td><a href="javascript:__doPostBack(&#39;GridView1&#39;,&#39;plan${i}&#39;)">'
+            f'Planuri de învățământ</a></td>' for i, name in enumerate(names)]
+    return page("Facultăți", grid(['Facultatea', '&nbsp;'], rows), viewstate_kb, seed=1)
+
+def faculty_page(programs=40, viewstate_kb=40):
+    """Program rows (name, years, form, year links), the target program last"""
+    rows = []
+    for i in range(programs):
+        last = i == programs - 1
+        name = BENCH_CONFIG['program_name'] if last else PROGRAMS[i % len(PROGRAMS)]
+        years = BENCH_CONFIG['study_years'] if last else f'{2020 + i % 6}-{2023 + i % 6}'
+        form = 'FRECVENȚĂ' if last or i % 3 else 'DISTANȚĂ'
+        links = ' '.join(f'<a href="javascript:__doPostBack(&#39;GridView1&#39;,&#39;{prefix}${i}&#39;)">{label}</a>'
+                         for prefix, label in YEAR_LINKS)
+        rows.append(f'\t\t\t<td>{name}</td><td>{years}</td><td>{form}</td><td>Licență</td><td>{links}</td>')
+    return page("Programe de studii", grid(['Program de studii', 'Anii', 'Forma', 'Ciclul', 'Anul'], rows),
+                viewstate_kb, seed=2)
+
+def subjects_page(subjects=60, viewstate_kb=80):
+    """Subject rows split into two semesters, every fourth one optional
+
+    Columns as on the site: the bilingual subject name first, then credits,
+    type and the RO/EN buttons.
+    """
+    rows = []
+    for i in range(subjects):
+        if i in (0, subjects // 2):
+            semester = 'Semestrul I' if i == 0 else 'Semestrul II'
+            rows.append(f'\t\t\t<td colspan="5"><b>{semester}</b></td>')
+        ro, en = SUBJECTS[i % len(SUBJECTS)]
+        if i >= len(SUBJECTS):
+            # Letters, since subject names are deduplicated ignoring digits
+            ro, en = f'{ro} {series(i // len(SUBJECTS))}', f'{en} {series(i // len(SUBJECTS))}'
+        kind = 'F' if i % 4 == 3 else 'O'
+        buttons = ''.join(
+            f'<td><input type="image" name="GridView1$ctl{i + 2:02d}$ImageButton{lang}" src="Images/pdf.gif" '
+            f'onclick="javascript:__doPostBack(&#39;GridView1&#39;,&#39;Programa{lang}${i}&#39;);return false;" '
+            f'style="height:24px;width:24px;" /></td>' for lang in ('RO', 'EN'))
+        rows.append(f'\t\t\t<td>{ro}<br />{en}</td><td>5</td><td>{kind}</td>{buttons}')
+    return page("Fișe de disciplină", grid(['Disciplina', 'Credite', 'Tip', 'RO', 'EN'], rows),
+                viewstate_kb, seed=3)
+
+def pages(faculties=len(FACULTIES) + 1, programs=40, subjects=60, viewstate_kb=80):
+    """{'main': html, 'faculty': html, 'subjects': html}"""
+    return {
+        'main': main_page(faculties, max(1, viewstate_kb // 4)),
+        'faculty': faculty_page(programs, max(1, viewstate_kb // 2)),
+        'subjects': subjects_page(subjects, viewstate_kb),
+    }
+
+def main():
+    """Write a set of synthetic pages to a folder"""
+    parser = argparse.ArgumentParser(description="Generate synthetic ASE GridView pages")
+    parser.add_argument('--faculties', type=int, default=len(FACULTIES) + 1)
+    parser.add_argument('--programs', type=int, default=40)
+    parser.add_argument('--subjects', type=int, default=60)
+    parser.add_argument('--viewstate-kb', type=int, default=80, help="size of the subjects page viewstate")
+    parser.add_argument('--output', default='.', help="folder for main.html, faculty.html and subjects.html")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for name, html in pages(args.faculties, args.programs, args.subjects, args.viewstate_kb).items():
+        path = os.path.join(args.output, f"{name}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        print(f"{path}: {len(html) // 1024} KB")
+
+if __name__ == "__main__":
+    main()